@@ -0,0 +1,115 @@
+#api.py
+import hashlib
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.db.models import Count, Max
+from django.db.models.fields.files import FieldFile
+
+from .filtros import filtrar_convocatorias
+from .imagenes import CAMPOS_IMAGEN, url_rendicion
+from .models import Convocatoria
+from .paginacion import paginar
+
+# Campos que expone la API (los internos como `rendiciones` o `activa` no)
+CAMPOS = tuple(
+    campo.name for campo in Convocatoria._meta.concrete_fields
+    if campo.name not in ('rendiciones', 'activa')
+)
+
+# Campos del listado cuando no se piden otros con ?campos=
+CAMPOS_LISTADO = (
+    'id', 'nombre', 'deporte', 'categoria', 'rama', 'estado',
+    'fecha_inicio_torneo', 'fecha_limite_inscripcion', 'updated_at',
+)
+
+ORDEN = ['-fecha_inicio_torneo', '-id']
+
+LIMITE_POR_DEFECTO = 20
+LIMITE_MAXIMO = 100
+
+
+class ParametroInvalido(ValueError):
+    pass
+
+
+# ==================== PARÁMETROS ====================
+def campos_solicitados(params, por_defecto=CAMPOS):
+    """
+    Campos pedidos en `?campos=nombre,deporte` (siempre incluye el id), o
+    `por_defecto` si no se piden
+    """
+    texto = params.get('campos', '').strip()
+    if not texto:
+        return tuple(por_defecto)
+    campos = ['id']
+    for campo in texto.split(','):
+        campo = campo.strip()
+        if campo not in CAMPOS:
+            raise ParametroInvalido(f"Campo desconocido: {campo}")
+        if campo not in campos:
+            campos.append(campo)
+    return tuple(campos)
+
+
+def limite(params):
+    try:
+        valor = int(params.get('limite', LIMITE_POR_DEFECTO))
+    except ValueError:
+        raise ParametroInvalido("limite debe ser un número")
+    return max(1, min(valor, LIMITE_MAXIMO))
+
+
+def columnas(campos):
+    """
+    Columnas a leer para `campos`: también las del cursor, y las rendiciones
+    si se piden imágenes
+    """
+    columnas = set(campos) | {campo.lstrip('-') for campo in ORDEN}
+    if columnas & set(CAMPOS_IMAGEN):
+        columnas.add('rendiciones')
+    return columnas
+
+
+# ==================== SERIALIZACIÓN ====================
+def _valor(valor):
+    if isinstance(valor, FieldFile):
+        return url_rendicion(valor, 'web') if valor else None
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+def serializar(convocatoria, campos):
+    return {campo: _valor(getattr(convocatoria, campo)) for campo in campos}
+
+
+# ==================== CONSULTAS ====================
+def etag(*partes):
+    return '"' + hashlib.sha256(':'.join(str(parte) for parte in partes).encode()).hexdigest()[:32] + '"'
+
+
+def version_listado(convocatorias):
+    """
+    (max updated_at, total) del conjunto filtrado en una sola consulta. El
+    total cambia si se elimina una convocatoria, lo que no mueve el máximo
+    """
+    datos = convocatorias.aggregate(ultima=Max('updated_at'), total=Count('id'))
+    return datos['ultima'], datos['total']
+
+
+def listado(convocatorias, params):
+    """
+    Filtra con los parámetros del filtro (kword, deporte, categoria, estado,
+    desde, hasta, abiertas). Devuelve (queryset filtrado, campos, limite)
+    """
+    campos = campos_solicitados(params, CAMPOS_LISTADO)
+    return filtrar_convocatorias(convocatorias, params), campos, limite(params)
+
+
+def pagina(convocatorias, campos, cursor, tamano):
+    """Página por cursor sobre (fecha_inicio_torneo, id), ya serializada"""
+    elementos, siguiente = paginar(convocatorias.only(*columnas(campos)), ORDEN, cursor, tamano)
+    return [serializar(convocatoria, campos) for convocatoria in elementos], siguiente
@@ -0,0 +1,420 @@
+#benchmarks.py
+import asyncio
+import json
+import logging
+import os
+import random
+import shutil
+import tempfile
+import time
+import tracemalloc
+from collections import Counter, namedtuple
+from contextlib import contextmanager
+from datetime import date, timedelta
+from io import BytesIO
+
+from asgiref.sync import async_to_sync
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection, transaction
+from django.test import AsyncClient, Client
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from PIL import Image as PILImage, ImageDraw
+
+from . import busqueda, facetas
+from .imagenes import generar_rendiciones, hash_contenido
+from .models import Convocatoria
+
+# Línea base por número de filas: {"1000": {escenario: medidas}}
+BASE = os.path.join(os.path.dirname(__file__), 'bench_base.json')
+
+# Margen antes de considerar regresión: relativo y, para no fallar por
+# ruido en valores pequeños, también absoluto
+TOLERANCIA = 0.25
+MINIMOS = {'p50_ms': 5, 'p95_ms': 10, 'memoria_kb': 256}
+
+DEPORTES = ['Fútbol', 'Básquetbol', 'Voleibol', 'Béisbol', 'Atletismo', 'Natación', 'Frontón', 'Ajedrez']
+PALABRAS = (
+    "liga torneo copa municipal infantil juvenil veteranos femenil varonil mixta "
+    "temporada invierno verano primavera otoño relámpago estatal regional barrio "
+    "unidad deportiva cancha parque colonia centro norte sur oriente poniente "
+    "inscripción equipos jugadores árbitros reglamento premiación trofeo medallas "
+    "categoría rama sede jornada partido final semifinal cuartos grupos puntos"
+).split()
+
+# Longitud (en caracteres) de los textos, como en las convocatorias reales
+TEXTOS = {
+    'descripcion': (300, 1500),
+    'sistema_competencia': (200, 1000),
+    'fase_final': (100, 600),
+    'forma_pago': (50, 300),
+    'requisitos': (200, 800),
+    'documentos_requeridos': (100, 500),
+    'normatividad_aplicable': (500, 3000),
+    'arbitraje': (100, 600),
+    'transitorios': (100, 600),
+}
+
+
+# ==================== DATOS SINTÉTICOS ====================
+def _texto(azar, minimo, maximo):
+    longitud = azar.randint(minimo, maximo)
+    palabras = []
+    total = 0
+    while total < longitud:
+        palabra = azar.choice(PALABRAS)
+        palabras.append(palabra)
+        total += len(palabra) + 1
+    return ' '.join(palabras).capitalize() + '.'
+
+
+def _jpeg(azar, tamano):
+    imagen = PILImage.new('RGB', tamano, tuple(azar.randint(0, 255) for _ in range(3)))
+    dibujo = ImageDraw.Draw(imagen)
+    for _ in range(30):
+        x, y = azar.randint(0, tamano[0]), azar.randint(0, tamano[1])
+        dibujo.ellipse((x, y, x + tamano[0] // 5, y + tamano[1] // 5), fill=tuple(azar.randint(0, 255) for _ in range(3)))
+    salida = BytesIO()
+    imagen.save(salida, format='JPEG', quality=85)
+    return salida.getvalue()
+
+
+def _imagenes(azar, cantidad=8):
+    """
+    Un juego de logos y fondos con sus rendiciones, que las filas comparten
+    (generar una imagen por fila haría la carga de datos muy lenta)
+    """
+    juegos = []
+    for numero in range(cantidad):
+        juego = {'rendiciones': {}}
+        for campo, carpeta, tamano in (
+            ('logo_ayuntamiento', 'convocatorias/logos', (600, 300)),
+            ('imagen_fondo', 'convocatorias/fondos', (1920, 1080)),
+        ):
+            nombre = default_storage.save(f"{carpeta}/bench_{numero}.jpg", ContentFile(_jpeg(azar, tamano)))
+            with default_storage.open(nombre, 'rb') as archivo:
+                contenido_hash = hash_contenido(archivo)
+                juego['rendiciones'][campo] = {
+                    'original': nombre,
+                    'hash': contenido_hash,
+                    **generar_rendiciones(archivo, contenido_hash),
+                }
+            juego[campo] = nombre
+        juegos.append(juego)
+    return juegos
+
+
+def generar(filas, semilla=42, con_imagenes=True):
+    """
+    Crea `filas` convocatorias reproducibles (misma semilla, mismos datos)
+    con textos de tamaño realista, índice de búsqueda y, opcionalmente,
+    imágenes con rendiciones. Devuelve sus ids
+    """
+    azar = random.Random(semilla)
+    juegos = _imagenes(azar) if con_imagenes else [{}]
+    hoy = date.today()
+    ids = []
+    for base in range(0, filas, 2000):
+        lote = []
+        for _ in range(min(2000, filas - base)):
+            inicio = hoy + timedelta(days=azar.randint(-200, 200))
+            juego = azar.choice(juegos)
+            lote.append(Convocatoria(
+                nombre=f"{azar.choice(['Liga', 'Torneo', 'Copa'])} {' '.join(azar.sample(PALABRAS, 3))}",
+                deporte=azar.choice(DEPORTES),
+                categoria=azar.choice(['Libre', 'Juvenil', 'Veteranos']),
+                rama=azar.choice(['Femenil', 'Varonil', 'Mixta']),
+                estado=azar.choice(['Abierta', 'Abierta', 'Cerrada', 'En curso', 'Finalizada']),
+                fecha_inicio_torneo=inicio,
+                fecha_limite_inscripcion=inicio - timedelta(days=azar.randint(1, 30)),
+                costo_inscripcion=azar.choice([0, 150, 300, 500, 1200]),
+                costo_arbitraje=azar.choice([None, 100, 250]),
+                activa=azar.random() > 0.05,
+                logo_ayuntamiento=juego.get('logo_ayuntamiento'),
+                imagen_fondo=juego.get('imagen_fondo'),
+                rendiciones=juego.get('rendiciones', {}),
+                **{campo: _texto(azar, *longitud) for campo, longitud in TEXTOS.items()},
+            ))
+        creadas = Convocatoria.objects.bulk_create(lote)
+        busqueda.indexar(creadas)
+        ids += [convocatoria.pk for convocatoria in creadas]
+    facetas.invalidar()
+    return ids
+
+
+# ==================== ESCENARIOS ====================
+# `preparar(azar, ids)` devuelve (método, url, datos); `valida(response)`
+# distingue un formulario rechazado (también responde 200)
+Escenario = namedtuple('Escenario', 'nombre preparar valida')
+
+
+def _datos_formulario(azar):
+    inicio = date.today() + timedelta(days=azar.randint(10, 90))
+    return {
+        'nombre': f"Liga {' '.join(azar.sample(PALABRAS, 3))}",
+        'deporte': azar.choice(DEPORTES),
+        'categoria': 'Libre',
+        'rama': 'Mixta',
+        'estado': 'Abierta',
+        'fecha_inicio_torneo': inicio.isoformat(),
+        'fecha_limite_inscripcion': (inicio - timedelta(days=5)).isoformat(),
+        'costo_inscripcion': '300.00',
+        'institucion_responsable': "Instituto Municipal de Cultura Física y Deporte",
+        'created_at': timezone.localtime().strftime('%Y-%m-%d %H:%M:%S'),
+        'activa': 'on',
+        **{campo: _texto(azar, *longitud) for campo, longitud in TEXTOS.items()},
+    }
+
+
+def _crear(azar, ids):
+    datos = _datos_formulario(azar)
+    datos['logo_ayuntamiento'] = SimpleUploadedFile('logo.jpg', _jpeg(azar, (600, 300)), 'image/jpeg')
+    return 'post', reverse('convocatorias:create'), datos
+
+
+def _editar(azar, ids):
+    datos = _datos_formulario(azar)
+    datos['guardar'] = '1'
+    return 'post', reverse('convocatorias:editar_convocatoria', args=[azar.choice(ids)]), datos
+
+
+def _sin_errores(response):
+    return b'errorlist' not in response.content
+
+
+ESCENARIOS = (
+    Escenario('filtro', lambda azar, ids: ('get', reverse('convocatorias:filtro'), {}), None),
+    Escenario(
+        'filtro_deporte',
+        lambda azar, ids: ('get', reverse('convocatorias:filtro'), {'deporte': azar.choice(DEPORTES)}),
+        None
+    ),
+    Escenario(
+        'filtro_palabra',
+        lambda azar, ids: ('get', reverse('convocatorias:filtro'), {'kword': ' '.join(azar.sample(PALABRAS, 2))}),
+        None
+    ),
+    Escenario('seleccionar_convocatoria', lambda azar, ids: ('get', reverse('convocatorias:edit'), {}), None),
+    Escenario('seleccionar_pdf', lambda azar, ids: ('get', reverse('convocatorias:seleccionar_pdf'), {}), None),
+    Escenario(
+        'generar_pdf',
+        lambda azar, ids: ('get', reverse('convocatorias:generar_pdf', args=[azar.choice(ids)]), {}),
+        None
+    ),
+    Escenario('crear', _crear, _sin_errores),
+    Escenario('editar', _editar, _sin_errores),
+)
+
+
+# ==================== MEDICIÓN ====================
+def _percentil(valores, percentil):
+    ordenados = sorted(valores)
+    return ordenados[min(len(ordenados) - 1, int(round(percentil / 100 * (len(ordenados) - 1))))]
+
+
+def _ejecutar(cliente, escenario, azar, ids):
+    metodo, url, datos = escenario.preparar(azar, ids)
+    response = getattr(cliente, metodo)(url, datos)
+    if response.streaming:
+        # El cliente cierra la respuesta al agotar el contenido
+        for _bloque in response.streaming_content:
+            pass
+    if response.status_code >= 400 or (escenario.valida and not escenario.valida(response)):
+        raise AssertionError(f"{escenario.nombre}: {metodo.upper()} {url} respondió {response.status_code}")
+    return response
+
+
+def medir(cliente, escenario, ids, repeticiones, azar):
+    """
+    p50/p95 de latencia y consultas por petición. La memoria pico se mide
+    en una ejecución aparte: tracemalloc alenta el código que observa
+    """
+    tiempos = []
+    consultas = []
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            _ejecutar(cliente, escenario, azar, ids)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        consultas.append(len(capturadas))
+
+    tracemalloc.start()
+    try:
+        _ejecutar(cliente, escenario, azar, ids)
+        _actual, pico = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'p50_ms': round(_percentil(tiempos, 50), 2),
+        'p95_ms': round(_percentil(tiempos, 95), 2),
+        'consultas': max(consultas),
+        'memoria_kb': pico // 1024,
+    }
+
+
+@contextmanager
+def entorno_aislado():
+    """
+    Almacenamiento, caché de PDF y subidas en un directorio temporal, sin
+    tareas en segundo plano. Las filas se revierten al salir
+    """
+    directorio = tempfile.mkdtemp(prefix='convocatorias_bench_')
+    almacenamiento = {
+        **settings.STORAGES,
+        'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage', 'OPTIONS': {'location': directorio}},
+    }
+    try:
+        with override_settings(
+            ALLOWED_HOSTS=['testserver'],
+            STORAGES=almacenamiento,
+            CONVOCATORIAS_PDF_CACHE={'OPTIONS': {'directorio': os.path.join(directorio, 'pdf')}},
+            CONVOCATORIAS_PDF_PRERENDER=False,
+            CONVOCATORIAS_SUBIDAS_DIR=os.path.join(directorio, 'subidas'),
+        ), transaction.atomic():
+            yield
+            transaction.set_rollback(True)
+    finally:
+        # Los conteos en caché serían de los datos sintéticos
+        facetas.invalidar()
+        shutil.rmtree(directorio, ignore_errors=True)
+
+
+def ejecutar(filas, repeticiones=20, semilla=42, con_imagenes=True, escenarios=ESCENARIOS, avisar=None):
+    """
+    Genera los datos, recorre los escenarios con el cliente de pruebas y
+    devuelve {escenario: {'p50_ms', 'p95_ms', 'consultas', 'memoria_kb'}}.
+    Nada queda en la base ni en el almacenamiento
+    """
+    resultados = {}
+    with entorno_aislado():
+        inicio = time.perf_counter()
+        ids = generar(filas, semilla, con_imagenes)
+        if avisar:
+            avisar(f"{filas} convocatorias generadas en {time.perf_counter() - inicio:.1f} s")
+
+        cliente = Client()
+        azar = random.Random(semilla)
+        for escenario in escenarios:
+            # Una petición de calentamiento (plantillas compiladas, estilos de PDF...)
+            _ejecutar(cliente, escenario, azar, ids)
+            resultados[escenario.nombre] = medir(cliente, escenario, ids, repeticiones, azar)
+            if avisar:
+                avisar(f"{escenario.nombre:26} {resultados[escenario.nombre]}")
+    return resultados
+
+
+# ==================== DESCARGAS SIMULTÁNEAS ====================
+# Un pico de descargas de PDF contra las vistas async: cuántas se sirven y
+# cuántas se rechazan con 503 por el límite de construcciones en vuelo, y
+# cuánto se alenta el filtro mientras tanto. async_to_sync hace que las
+# consultas corran en este hilo, dentro de la transacción de entorno_aislado
+async def _descargar(cliente, url):
+    inicio = time.perf_counter()
+    response = await cliente.get(url)
+    if response.streaming:
+        async for _bloque in response.streaming_content:
+            pass
+    return response.status_code, (time.perf_counter() - inicio) * 1000
+
+
+async def _filtrar(cliente, repeticiones):
+    tiempos = []
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        response = await cliente.get(reverse('convocatorias:filtro'))
+        if response.status_code != 200:
+            raise AssertionError(f"filtro respondió {response.status_code}")
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+    return tiempos
+
+
+async def _pico(urls, repeticiones):
+    cliente = AsyncClient()
+    reposo = await _filtrar(cliente, repeticiones)
+
+    inicio = time.perf_counter()
+    descargas = [asyncio.ensure_future(_descargar(cliente, url)) for url in urls]
+    durante = await _filtrar(cliente, repeticiones)
+    respuestas = await asyncio.gather(*descargas)
+    return reposo, durante, respuestas, (time.perf_counter() - inicio) * 1000
+
+
+def ejecutar_descargas(filas=1000, descargas=200, distintas=20, repeticiones=20, semilla=42,
+                       con_imagenes=True, avisar=None):
+    """
+    `descargas` peticiones simultáneas del PDF de `distintas` convocatorias
+    (ninguno en caché al empezar). Devuelve los códigos de respuesta, p50/p95
+    de las descargas servidas y del filtro en reposo y durante el pico
+    """
+    with entorno_aislado():
+        ids = generar(filas, semilla, con_imagenes)
+        azar = random.Random(semilla)
+        elegidas = azar.sample(ids, min(distintas, len(ids)))
+        urls = [reverse('convocatorias:generar_pdf', args=[azar.choice(elegidas)]) for _ in range(descargas)]
+
+        # Los 503 son parte de lo que se mide, no errores
+        registro = logging.getLogger('django.request')
+        nivel = registro.level
+        registro.setLevel(logging.CRITICAL)
+        try:
+            reposo, durante, respuestas, total = async_to_sync(_pico)(urls, repeticiones)
+        finally:
+            registro.setLevel(nivel)
+
+    servidas = [tiempo for estado, tiempo in respuestas if estado == 200]
+    resultado = {
+        'estados': dict(sorted(Counter(estado for estado, _tiempo in respuestas).items())),
+        'total_ms': round(total, 2),
+        'descarga_p50_ms': round(_percentil(servidas, 50), 2) if servidas else None,
+        'descarga_p95_ms': round(_percentil(servidas, 95), 2) if servidas else None,
+        'filtro_reposo_p50_ms': round(_percentil(reposo, 50), 2),
+        'filtro_reposo_p95_ms': round(_percentil(reposo, 95), 2),
+        'filtro_pico_p50_ms': round(_percentil(durante, 50), 2),
+        'filtro_pico_p95_ms': round(_percentil(durante, 95), 2),
+    }
+    if avisar:
+        for nombre, valor in resultado.items():
+            avisar(f"{nombre:22} {valor}")
+    return resultado
+
+
+# ==================== LÍNEA BASE ====================
+def cargar_base(ruta=BASE):
+    try:
+        with open(ruta, encoding='utf-8') as archivo:
+            return json.load(archivo)
+    except FileNotFoundError:
+        return {}
+
+
+def guardar_base(filas, resultados, ruta=BASE):
+    base = cargar_base(ruta)
+    base[str(filas)] = resultados
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump(base, archivo, indent=2, sort_keys=True)
+        archivo.write('\n')
+
+
+def comparar(resultados, base, tolerancia=TOLERANCIA):
+    """
+    Regresiones de `resultados` contra `base` (las medidas de la misma
+    cantidad de filas). Cualquier consulta de más es regresión; tiempos y
+    memoria, si superan la tolerancia relativa y el mínimo absoluto
+    """
+    regresiones = []
+    for nombre, medidas in resultados.items():
+        referencia = base.get(nombre)
+        if not referencia:
+            continue
+        if medidas['consultas'] > referencia['consultas']:
+            regresiones.append(f"{nombre}: {medidas['consultas']} consultas (base {referencia['consultas']})")
+        for clave, minimo in MINIMOS.items():
+            actual, anterior = medidas[clave], referencia[clave]
+            if actual > anterior * (1 + tolerancia) and actual - anterior > minimo:
+                regresiones.append(f"{nombre}: {clave} {actual} (base {anterior})")
+    return regresiones
@@ -0,0 +1,100 @@
+#borradores.py
+import secrets
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+
+from . import subidas
+from .forms import SubidasMixin
+from .models import Convocatoria
+
+
+class BorradorExpirado(Exception):
+    pass
+
+
+# ==================== ALMACÉN DE BORRADORES ====================
+# Un borrador es el cleaned_data ya validado de la vista previa. Las
+# imágenes quedan como subidas completas (subidas.py) y solo se guarda su id
+def _llave(token):
+    return f"convocatorias:borrador:{token}"
+
+
+def _ttl():
+    return getattr(settings, 'CONVOCATORIAS_BORRADOR_TTL', 60 * 60)
+
+
+def _cache():
+    """
+    Caché de los borradores: el alias CONVOCATORIAS_BORRADORES_CACHE
+    ('default' si no está). La vista previa y la confirmación pueden caer en
+    procesos distintos, así que con más de un proceso tiene que ser una caché
+    compartida (Redis, Memcached, base de datos), no LocMemCache
+    """
+    return caches[getattr(settings, 'CONVOCATORIAS_BORRADORES_CACHE', 'default')]
+
+
+def guardar(form):
+    """Guarda el formulario validado como borrador y devuelve su token"""
+    campos_modelo = {campo.name for campo in Convocatoria._meta.concrete_fields}
+    datos = {}
+    archivos = {}
+    for campo, valor in form.cleaned_data.items():
+        if campo not in campos_modelo:
+            continue
+        if campo in SubidasMixin.CAMPOS_SUBIDA:
+            subida_id = form.cleaned_data.get(f'{campo}_subida')
+            if subida_id:
+                # Ya viene de una subida por partes: solo se cierra el archivo
+                valor.close()
+            elif valor:
+                subida_id = subidas.guardar(valor)
+            if subida_id:
+                archivos[campo] = subida_id
+            continue
+        datos[campo] = valor
+
+    token = secrets.token_urlsafe(24)
+    _cache().set(_llave(token), {'datos': datos, 'archivos': archivos}, _ttl())
+    return token
+
+
+def cargar(token):
+    """El borrador `{'datos', 'archivos'}`, o None si no existe o expiró"""
+    return _cache().get(_llave(token)) if token else None
+
+
+def instancia(borrador):
+    """Convocatoria sin guardar con los datos del borrador (para la vista previa)"""
+    return Convocatoria(**borrador['datos'])
+
+
+def confirmar(token):
+    """
+    Guarda la convocatoria del borrador sin volver a validar ni recibir los
+    datos. El borrador se retira antes de guardar, así un doble envío no
+    crea dos convocatorias
+    """
+    borrador = cargar(token)
+    if borrador is None or not _cache().delete(_llave(token)):
+        raise BorradorExpirado("La vista previa expiró; vuelve a llenar el formulario")
+
+    convocatoria = instancia(borrador)
+    abiertos = []
+    try:
+        for campo, subida_id in borrador['archivos'].items():
+            archivo = subidas.abrir(subida_id)
+            if archivo is None:
+                raise BorradorExpirado("Las imágenes de la vista previa expiraron; vuelve a subirlas")
+            abiertos.append(archivo)
+            setattr(convocatoria, campo, archivo)
+        with transaction.atomic():
+            convocatoria.save()
+    finally:
+        for archivo in abiertos:
+            archivo.close()
+
+    for subida_id in borrador['archivos'].values():
+        subidas.eliminar(subida_id)
+    return convocatoria
@@ -0,0 +1,159 @@
+#busqueda.py
+import re
+import unicodedata
+
+from django.db.models import Case, Exists, IntegerField, Max, OuterRef, Q, Sum, When
+
+from .models import TerminoBusqueda
+from .paginacion import apaginar, paginar
+
+# Campos indexados y su peso en el ranking
+CAMPOS_INDEXADOS = (
+    ('nombre', 3),
+    ('deporte', 2),
+    ('descripcion', 1),
+)
+
+LONGITUD_MAXIMA = 64
+
+# Orden de los resultados de una búsqueda (ver coincidencias())
+ORDEN_RELEVANCIA = ['-puntaje', '-convocatoria']
+
+_SEPARADOR = re.compile(r'[^0-9a-zñ]+')
+
+
+# ==================== NORMALIZACIÓN ====================
+def normalizar(texto):
+    """
+    Lista de términos de `texto`: minúsculas, sin acentos (la ñ se
+    conserva) y separados por cualquier caracter no alfanumérico
+    """
+    if not texto:
+        return []
+    texto = texto.lower().replace('ñ', '\0')
+    texto = ''.join(
+        c for c in unicodedata.normalize('NFKD', texto)
+        if not unicodedata.combining(c)
+    ).replace('\0', 'ñ')
+    return [t[:LONGITUD_MAXIMA] for t in _SEPARADOR.split(texto) if t]
+
+
+def terminos_de(valores):
+    """
+    {termino: peso} para un dict {campo: texto}. Un término suma el peso de
+    cada campo indexado en el que aparece
+    """
+    terminos = {}
+    for campo, peso in CAMPOS_INDEXADOS:
+        for termino in set(normalizar(valores.get(campo))):
+            terminos[termino] = terminos.get(termino, 0) + peso
+    return terminos
+
+
+# ==================== ÍNDICE ====================
+def indexar(convocatorias):
+    """Reconstruye los términos de búsqueda de las convocatorias dadas"""
+    convocatorias = list(convocatorias)
+    TerminoBusqueda.objects.filter(convocatoria__in=[c.pk for c in convocatorias]).delete()
+    TerminoBusqueda.objects.bulk_create([
+        TerminoBusqueda(convocatoria_id=convocatoria.pk, termino=termino, peso=peso)
+        for convocatoria in convocatorias
+        for termino, peso in terminos_de({
+            campo: getattr(convocatoria, campo) for campo, _peso in CAMPOS_INDEXADOS
+        }).items()
+    ], batch_size=1000)
+
+
+# ==================== BÚSQUEDA ====================
+def _coincide(termino, prefijo):
+    # Rango en lugar de LIKE 'x%' para que se use el índice en cualquier base
+    if prefijo:
+        return Q(termino__gte=termino, termino__lt=termino + '\uffff')
+    return Q(termino=termino)
+
+
+def coincidencias(query):
+    """
+    Consulta agrupada sobre el índice de términos: una fila
+    {'convocatoria', 'puntaje'} por cada convocatoria que contiene todos los
+    términos de `query`. El último término se toma como prefijo (búsqueda
+    mientras se escribe). None si `query` no tiene términos
+    """
+    terminos = list(dict.fromkeys(normalizar(query)))
+    if not terminos:
+        return None
+
+    condiciones = [
+        _coincide(termino, prefijo=(i == len(terminos) - 1))
+        for i, termino in enumerate(terminos)
+    ]
+    cualquiera = Q()
+    for condicion in condiciones:
+        cualquiera |= condicion
+
+    return (
+        TerminoBusqueda.objects
+        .filter(cualquiera)
+        .values('convocatoria')
+        .annotate(
+            puntaje=Sum('peso'),
+            **{
+                f'termino_{i}': Max(Case(When(condicion, then=1), default=0, output_field=IntegerField()))
+                for i, condicion in enumerate(condiciones)
+            }
+        )
+        .filter(**{f'termino_{i}': 1 for i in range(len(condiciones))})
+    )
+
+
+def buscar(convocatorias, query):
+    """Filtra `convocatorias` a las que contienen todos los términos de `query`"""
+    encontradas = coincidencias(query)
+    if encontradas is None:
+        return convocatorias.none()
+    return convocatorias.filter(pk__in=encontradas.values('convocatoria'))
+
+
+def paginar_busqueda(convocatorias, query, cursor=None, tamano=20):
+    """
+    Página de resultados de `query` dentro de `convocatorias`, ordenada por
+    relevancia (`puntaje`) con paginación por cursor. El ranking se calcula
+    solo con el índice de términos y después se leen únicamente las filas
+    de la página. Devuelve (elementos, siguiente_cursor)
+    """
+    encontradas = _coincidencias_en(convocatorias, query)
+    if encontradas is None:
+        return [], None
+
+    filas, siguiente = paginar(encontradas, ORDEN_RELEVANCIA, cursor, tamano)
+    # Se leen desde `convocatorias` para respetar su proyección (only())
+    por_id = convocatorias.order_by().in_bulk([fila['convocatoria'] for fila in filas])
+    return _con_puntaje(filas, por_id), siguiente
+
+
+async def apaginar_busqueda(convocatorias, query, cursor=None, tamano=20):
+    """paginar_busqueda() con el ORM asíncrono, para las vistas async"""
+    encontradas = _coincidencias_en(convocatorias, query)
+    if encontradas is None:
+        return [], None
+
+    filas, siguiente = await apaginar(encontradas, ORDEN_RELEVANCIA, cursor, tamano)
+    por_id = await convocatorias.order_by().ain_bulk([fila['convocatoria'] for fila in filas])
+    return _con_puntaje(filas, por_id), siguiente
+
+
+def _coincidencias_en(convocatorias, query):
+    encontradas = coincidencias(query)
+    if encontradas is None:
+        return None
+    # EXISTS y no IN: así la base recorre primero el índice de términos
+    return encontradas.filter(Exists(convocatorias.filter(pk=OuterRef('convocatoria'))))
+
+
+def _con_puntaje(filas, por_id):
+    elementos = []
+    for fila in filas:
+        convocatoria = por_id[fila['convocatoria']]
+        convocatoria.puntaje = fila['puntaje']
+        elementos.append(convocatoria)
+    return elementos
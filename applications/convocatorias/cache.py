@@ -0,0 +1,259 @@
+#cache.py
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils.module_loading import import_string
+
+from . import documento
+
+
+# ==================== CLAVE DEL PDF ====================
+@lru_cache(maxsize=256)
+def _hash_archivo(ruta, mtime, tamano):
+    """
+    Hash SHA-256 del contenido de un archivo. `mtime` y `tamano` solo
+    forman parte de la llave del lru_cache para no releer archivos sin cambios
+    """
+    digest = hashlib.sha256()
+    with open(ruta, 'rb') as archivo:
+        for bloque in iter(lambda: archivo.read(64 * 1024), b''):
+            digest.update(bloque)
+    return digest.hexdigest()
+
+
+def hash_logo(convocatoria):
+    """Hash del logo del ayuntamiento, o cadena vacía si no hay logo"""
+    if not convocatoria.logo_ayuntamiento:
+        return ''
+    try:
+        ruta = convocatoria.logo_ayuntamiento.path
+        stat = os.stat(ruta)
+    except (OSError, NotImplementedError, ValueError):
+        return ''
+    return _hash_archivo(ruta, stat.st_mtime_ns, stat.st_size)
+
+
+def clave_pdf(convocatoria):
+    """
+    Clave del PDF de una convocatoria: id + updated_at + hash del logo +
+    versión del documento. Cualquier cambio en el registro, en el logo o en
+    el diseño produce una clave nueva
+    """
+    contenido = (
+        f"{convocatoria.pk}:{convocatoria.updated_at.isoformat()}:{hash_logo(convocatoria)}:"
+        f"{documento.VERSION}"
+    )
+    return f"{convocatoria.pk}-{hashlib.sha256(contenido.encode()).hexdigest()[:32]}"
+
+
+# ==================== BACKENDS ====================
+class CachePDFBase:
+    """
+    Interfaz de los backends de caché de PDF. Las claves empiezan con
+    `<id>-` para poder invalidar todas las versiones de una convocatoria
+    """
+
+    def __init__(self, max_bytes=64 * 1024 * 1024, **opciones):
+        self.max_bytes = max_bytes
+
+    def abrir(self, clave):
+        """Archivo binario con el PDF en caché, o None"""
+        raise NotImplementedError
+
+    def guardar(self, clave, origen):
+        """Copia el archivo binario `origen` a la caché"""
+        raise NotImplementedError
+
+    def invalidar(self, convocatoria_id):
+        """Elimina todas las versiones en caché de una convocatoria"""
+        raise NotImplementedError
+
+
+class CacheDisco(CachePDFBase):
+    """
+    Guarda cada PDF como archivo en un directorio local. Al superar
+    `max_bytes` se eliminan los menos usados (según su mtime, que se
+    actualiza en cada lectura)
+    """
+
+    # El tamaño total se lleva sumando cada escritura; el directorio solo
+    # se recorre al pasar de max_bytes o cada REVISION segundos (otros
+    # procesos escriben en el mismo directorio)
+    REVISION = 300
+
+    def __init__(self, directorio=None, **opciones):
+        super().__init__(**opciones)
+        self.directorio = directorio or os.path.join(tempfile.gettempdir(), 'convocatorias_pdf')
+        os.makedirs(self.directorio, exist_ok=True)
+        self._lock = threading.Lock()
+        self._total = None
+        self._revisado = 0.0
+
+    def _ruta(self, clave):
+        return os.path.join(self.directorio, f"{clave}.pdf")
+
+    def abrir(self, clave):
+        ruta = self._ruta(clave)
+        try:
+            archivo = open(ruta, 'rb')
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(ruta)
+        except OSError:
+            pass
+        return archivo
+
+    def guardar(self, clave, origen):
+        # Escritura atómica: archivo temporal en el mismo directorio + replace
+        ruta = self._ruta(clave)
+        fd, temporal = tempfile.mkstemp(dir=self.directorio, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as destino:
+                shutil.copyfileobj(origen, destino)
+                tamano = destino.tell()
+            try:
+                tamano -= os.stat(ruta).st_size
+            except FileNotFoundError:
+                pass
+            os.replace(temporal, ruta)
+        except BaseException:
+            if os.path.exists(temporal):
+                os.remove(temporal)
+            raise
+        self._sumar(tamano)
+
+    def invalidar(self, convocatoria_id):
+        prefijo = f"{convocatoria_id}-"
+        liberados = 0
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if entrada.name.startswith(prefijo) and entrada.name.endswith('.pdf'):
+                    try:
+                        tamano = entrada.stat().st_size
+                        os.remove(entrada.path)
+                    except FileNotFoundError:
+                        continue
+                    liberados += tamano
+        if liberados:
+            self._sumar(-liberados)
+
+    def _sumar(self, diferencia):
+        with self._lock:
+            vigente = time.monotonic() - self._revisado < self.REVISION
+            if self._total is not None and vigente:
+                self._total += diferencia
+                if self._total <= self.max_bytes:
+                    return
+            self._total = self._desalojar()
+            self._revisado = time.monotonic()
+
+    def _desalojar(self):
+        """Recorre el directorio, elimina los menos usados si hace falta y devuelve el total"""
+        archivos = []
+        total = 0
+        with os.scandir(self.directorio) as entradas:
+            for entrada in entradas:
+                if not entrada.name.endswith('.pdf'):
+                    continue
+                try:
+                    stat = entrada.stat()
+                except FileNotFoundError:
+                    continue
+                archivos.append((stat.st_mtime, stat.st_size, entrada.path))
+                total += stat.st_size
+        if total <= self.max_bytes:
+            return total
+        for _mtime, tamano, ruta in sorted(archivos):
+            try:
+                os.remove(ruta)
+            except FileNotFoundError:
+                pass
+            total -= tamano
+            if total <= self.max_bytes:
+                break
+        return total
+
+
+class CacheDjango(CachePDFBase):
+    """
+    Guarda los PDF en una caché de Django (`alias`). Lleva un índice
+    propio en orden de uso para respetar `max_bytes`
+    """
+
+    INDICE = 'convocatorias:pdf:indice'
+
+    def __init__(self, alias='default', timeout=None, **opciones):
+        super().__init__(**opciones)
+        self.alias = alias
+        self.timeout = timeout
+        self._lock = threading.Lock()
+
+    @property
+    def cache(self):
+        return caches[self.alias]
+
+    def _llave(self, clave):
+        return f"convocatorias:pdf:{clave}"
+
+    def abrir(self, clave):
+        datos = self.cache.get(self._llave(clave))
+        if datos is None:
+            return None
+        with self._lock:
+            indice = self.cache.get(self.INDICE, {})
+            if clave in indice:
+                indice[clave] = indice.pop(clave)
+                self.cache.set(self.INDICE, indice, None)
+        return BytesIO(datos)
+
+    def guardar(self, clave, origen):
+        datos = origen.read()
+        with self._lock:
+            indice = self.cache.get(self.INDICE, {})
+            indice.pop(clave, None)
+            indice[clave] = len(datos)
+            total = sum(indice.values())
+            while total > self.max_bytes and len(indice) > 1:
+                viejo = next(iter(indice))
+                total -= indice.pop(viejo)
+                self.cache.delete(self._llave(viejo))
+            self.cache.set(self._llave(clave), datos, self.timeout)
+            self.cache.set(self.INDICE, indice, None)
+
+    def invalidar(self, convocatoria_id):
+        prefijo = f"{convocatoria_id}-"
+        with self._lock:
+            indice = self.cache.get(self.INDICE, {})
+            for clave in [c for c in indice if c.startswith(prefijo)]:
+                del indice[clave]
+                self.cache.delete(self._llave(clave))
+            self.cache.set(self.INDICE, indice, None)
+
+
+_backend = None
+
+
+def obtener_backend():
+    """
+    Backend configurado en settings.CONVOCATORIAS_PDF_CACHE, por ejemplo:
+
+        CONVOCATORIAS_PDF_CACHE = {
+            'BACKEND': 'applications.convocatorias.cache.CacheDjango',
+            'OPTIONS': {'alias': 'default', 'max_bytes': 128 * 1024 * 1024},
+        }
+    """
+    global _backend
+    if _backend is None:
+        config = getattr(settings, 'CONVOCATORIAS_PDF_CACHE', {})
+        clase = import_string(config.get('BACKEND', 'applications.convocatorias.cache.CacheDisco'))
+        _backend = clase(**config.get('OPTIONS', {}))
+    return _backend
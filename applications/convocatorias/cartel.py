@@ -0,0 +1,217 @@
+#cartel.py
+import hashlib
+import os
+from functools import lru_cache
+from io import BytesIO
+
+import reportlab
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image as PILImage, ImageDraw, ImageFont, ImageOps
+
+from .documento import VERSION as VERSION_DOCUMENTO, documento
+from .imagenes import ruta_rendicion
+from .metricas import medir
+
+# Cambiarla regenera todos los carteles (forma parte de la llave)
+VERSION = 1
+
+# formato de la URL -> (formato de Pillow, content type)
+FORMATOS = {
+    'png': ('PNG', 'image/png'),
+    'jpg': ('JPEG', 'image/jpeg'),
+}
+
+# Publicación cuadrada y historia (9:16)
+TAMANOS = {
+    'cuadrado': (1080, 1080),
+    'historia': (1080, 1920),
+}
+
+MARGEN = 80
+LOGO_MAXIMO = (280, 140)
+
+# Los colores del PDF
+AZUL = (26, 84, 144)
+AZUL_CLARO = (230, 242, 255)
+BLANCO = (255, 255, 255)
+
+# Las fuentes TrueType que trae ReportLab (ya es dependencia por el PDF)
+DIRECTORIO_FUENTES = os.path.join(os.path.dirname(reportlab.__file__), 'fonts')
+
+# Carteles ya compuestos, por hash de su contenido (como las rendiciones).
+# limpiar_media conserva los que corresponden al contenido actual de una
+# convocatoria activa (ver rutas_vigentes()) y borra los demás
+DIRECTORIO = 'convocatorias/carteles'
+
+
+@lru_cache(maxsize=16)
+def fuente(tamano, negrita=False):
+    return ImageFont.truetype(os.path.join(DIRECTORIO_FUENTES, 'VeraBd.ttf' if negrita else 'Vera.ttf'), tamano)
+
+
+def lineas(texto, letra, ancho):
+    """Parte `texto` en líneas que caben en `ancho` píxeles con `letra`"""
+    resultado = []
+    actual = ''
+    for palabra in texto.split():
+        propuesta = f"{actual} {palabra}".strip()
+        if actual and letra.getlength(propuesta) > ancho:
+            resultado.append(actual)
+            actual = palabra
+        else:
+            actual = propuesta
+    if actual:
+        resultado.append(actual)
+    return resultado
+
+
+# ==================== CAPAS ====================
+# Todo se hace con operaciones de Pillow sobre la imagen completa (en C);
+# no se recorren píxeles en Python
+def _abrir(archivo, rendicion, tamano):
+    """
+    Imagen de un FieldFile: su rendición `rendicion` si ya existe, o el
+    original. En JPEG se decodifica a la escala más cercana a `tamano`
+    """
+    ruta = ruta_rendicion(archivo, rendicion) or archivo.name
+    with default_storage.open(ruta, 'rb') as contenido, PILImage.open(contenido) as original:
+        original.draft('RGB', tamano)
+        imagen = ImageOps.exif_transpose(original)
+        imagen.load()
+    return imagen
+
+
+@lru_cache(maxsize=len(TAMANOS))
+def _velo(tamano):
+    """
+    Capa azul semitransparente, más opaca hacia abajo, para que el texto se
+    lea sobre cualquier fondo. Es igual para todos los carteles del tamaño
+    """
+    degradado = PILImage.linear_gradient('L').resize(tamano)
+    velo = PILImage.new('RGBA', tamano, AZUL)
+    velo.putalpha(degradado.point(lambda valor: 150 + valor * 90 // 255))
+    return velo
+
+
+def _fondo(doc, tamano):
+    if doc.fondo:
+        try:
+            imagen = ImageOps.fit(_abrir(doc.fondo, 'web', tamano).convert('RGB'), tamano, PILImage.LANCZOS)
+        except (OSError, ValueError):
+            pass
+        else:
+            return PILImage.alpha_composite(imagen.convert('RGBA'), _velo(tamano))
+    return PILImage.new('RGBA', tamano, AZUL + (255,))
+
+
+def _logo(doc):
+    if not doc.logo:
+        return None
+    try:
+        imagen = _abrir(doc.logo, 'miniatura', LOGO_MAXIMO).convert('RGBA')
+    except (OSError, ValueError):
+        return None
+    imagen.thumbnail(LOGO_MAXIMO)
+    return imagen
+
+
+# ==================== DIBUJO ====================
+def dibujar(doc, tamano=TAMANOS['cuadrado']):
+    """
+    Imagen RGB del cartel: imagen de fondo con velo, logo, nombre,
+    institución y los destacados del documento (fechas y costo)
+    """
+    imagen = _fondo(doc, tamano)
+    ancho = tamano[0] - 2 * MARGEN
+    y = MARGEN
+
+    logo = _logo(doc)
+    if logo is not None:
+        imagen.alpha_composite(logo, (MARGEN, y))
+        y += logo.height + 40
+
+    # Los destacados van al pie; el título usa las líneas que quepan arriba
+    pie = tamano[1] - MARGEN - 64 * len(doc.destacados)
+
+    dibujo = ImageDraw.Draw(imagen)
+    dibujo.text((MARGEN, y), "CONVOCATORIA", font=fuente(40, negrita=True), fill=AZUL_CLARO)
+    y += 80
+    # En la historia hay espacio para un título más grande y más largo
+    alto_titulo, maximo_lineas = (84, 6) if tamano[1] > tamano[0] else (72, 4)
+    caben = (pie - y - 20 - 2 * 42 - 40) // (alto_titulo + 14)
+    titulo = fuente(alto_titulo, negrita=True)
+    for linea in lineas(doc.nombre.upper(), titulo, ancho)[:max(1, min(maximo_lineas, caben))]:
+        dibujo.text((MARGEN, y), linea, font=titulo, fill=BLANCO)
+        y += alto_titulo + 14
+    y += 20
+    for linea in lineas(doc.institucion, fuente(32), ancho)[:2]:
+        dibujo.text((MARGEN, y), linea, font=fuente(32), fill=AZUL_CLARO)
+        y += 42
+
+    y = pie
+    for etiqueta, valor in doc.destacados:
+        dibujo.text((MARGEN, y), f"{etiqueta}:", font=fuente(40), fill=AZUL_CLARO)
+        dibujo.text((tamano[0] - MARGEN, y), valor, font=fuente(40, negrita=True), fill=BLANCO, anchor='ra')
+        y += 64
+    return imagen.convert('RGB')
+
+
+def construir_cartel(convocatoria, tamano='cuadrado', formato='png'):
+    """Bytes del cartel de la convocatoria (ver TAMANOS y FORMATOS)"""
+    formato_pillow, _content_type = FORMATOS[formato]
+    salida = BytesIO()
+    with medir('cartel'):
+        dibujar(documento(convocatoria), TAMANOS[tamano]).save(salida, format=formato_pillow, optimize=True)
+    return salida.getvalue()
+
+
+# ==================== CARTEL EN CACHÉ ====================
+def _hash_imagen(archivo):
+    """Hash del contenido de la imagen (el de sus rendiciones), o su nombre mientras no las tiene"""
+    if not archivo:
+        return ''
+    datos = (archivo.instance.rendiciones or {}).get(archivo.field.name) or {}
+    if datos.get('original') == archivo.name and datos.get('hash'):
+        return datos['hash']
+    return archivo.name
+
+
+def llave(convocatoria, tamano, formato, doc=None):
+    """
+    Hash de todo lo que se ve en el cartel. No depende de updated_at:
+    editar un campo que el cartel no muestra no lo vuelve a componer
+    """
+    doc = doc or documento(convocatoria)
+    contenido = repr((
+        VERSION, VERSION_DOCUMENTO, tamano, formato,
+        doc.nombre, doc.institucion, doc.destacados,
+        _hash_imagen(doc.fondo), _hash_imagen(doc.logo),
+    ))
+    return hashlib.sha256(contenido.encode()).hexdigest()
+
+
+def ruta_cartel(clave, formato):
+    return f"{DIRECTORIO}/{clave[:2]}/{clave}.{formato}"
+
+
+def rutas_vigentes(convocatoria):
+    """Rutas que tendrían hoy los carteles de la convocatoria, en cada tamaño y formato"""
+    doc = documento(convocatoria)
+    return {
+        ruta_cartel(llave(convocatoria, tamano, formato, doc), formato)
+        for tamano in TAMANOS
+        for formato in FORMATOS
+    }
+
+
+def obtener_cartel(convocatoria, tamano='cuadrado', formato='png', clave=None):
+    """
+    Ruta en el almacenamiento del cartel. Solo se compone si no existe ya
+    uno con el mismo contenido (`clave`, ver llave())
+    """
+    clave = clave or llave(convocatoria, tamano, formato)
+    ruta = ruta_cartel(clave, formato)
+    if not default_storage.exists(ruta):
+        ruta = default_storage.save(ruta, ContentFile(construir_cartel(convocatoria, tamano, formato)))
+    return ruta
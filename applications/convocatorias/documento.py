@@ -0,0 +1,192 @@
+#documento.py
+# Modelo de presentación de una convocatoria: encabezado y secciones con los
+# valores ya formateados. La vista previa (preview.html), el PDF (pdf.py) y
+# el cartel (cartel.py) lo dibujan cada uno a su manera; ninguno vuelve a
+# recorrer los campos del modelo
+import hashlib
+import json
+import threading
+from collections import OrderedDict, namedtuple
+
+# Cambiarla invalida los PDF y carteles en caché (forma parte de sus llaves)
+VERSION = 1
+
+# Documentos memorizados por (id, updated_at, huella de las rendiciones)
+MEMO_MAXIMO = 256
+
+# tipo 'datos': elementos [(etiqueta, valor)], se dibuja como tabla
+# tipo 'texto': elementos [párrafo]
+# tipo 'lista': elementos [(etiqueta, valor)], una línea por elemento
+Seccion = namedtuple('Seccion', 'titulo tipo elementos')
+
+# `logo` y `fondo` son los FieldFile (o None); `destacados` son los datos
+# que caben en un cartel: [(etiqueta, valor)]
+Documento = namedtuple('Documento', 'nombre institucion logo fondo destacados secciones')
+
+
+# ==================== FORMATOS ====================
+def _valor(campo):
+    return lambda convocatoria: getattr(convocatoria, campo)
+
+
+def _fecha(campo):
+    def formato(convocatoria):
+        valor = getattr(convocatoria, campo)
+        return valor.strftime('%d/%m/%Y') if valor else None
+    return formato
+
+
+def _dinero(campo):
+    def formato(convocatoria):
+        valor = getattr(convocatoria, campo)
+        return f"${valor}" if valor is not None else None
+    return formato
+
+
+def _reunion_previa(convocatoria):
+    # Los campos junta_previa_* y *_reunion_previa son dos versiones del mismo dato
+    fecha = convocatoria.junta_previa_fecha or convocatoria.fecha_reunion_previa
+    if not fecha:
+        return None
+    hora = convocatoria.junta_previa_hora or convocatoria.hora_reunion_previa
+    return f"{fecha.strftime('%d/%m/%Y')} a las {hora.strftime('%H:%M')}" if hora else fecha.strftime('%d/%m/%Y')
+
+
+# ==================== SECCIONES ====================
+# El diseño es una lista declarativa que se arma al importar el módulo; por
+# convocatoria solo se llenan los valores. Las secciones vacías no aparecen
+class Datos:
+    tipo = 'datos'
+
+    def __init__(self, titulo, filas):
+        self.titulo = titulo
+        self.filas = filas
+
+    def elementos(self, convocatoria):
+        pares = ((etiqueta, obtener(convocatoria)) for etiqueta, obtener in self.filas)
+        return [(etiqueta, valor) for etiqueta, valor in pares if valor]
+
+    def armar(self, convocatoria):
+        elementos = self.elementos(convocatoria)
+        return Seccion(self.titulo, self.tipo, elementos) if elementos else None
+
+
+class Lista(Datos):
+    tipo = 'lista'
+
+
+class Texto:
+    def __init__(self, titulo, campo):
+        self.titulo = titulo
+        self.campo = campo
+
+    def armar(self, convocatoria):
+        valor = getattr(convocatoria, self.campo)
+        if not valor:
+            return None
+        return Seccion(self.titulo, 'texto', [parrafo for parrafo in valor.splitlines() if parrafo.strip()])
+
+
+DISENO = (
+    Datos(None, (
+        ('Deporte', _valor('deporte')),
+        ('Categoría', _valor('categoria')),
+        ('Rama', _valor('rama')),
+        ('Estado', _valor('estado')),
+        ('Fecha de inicio', _fecha('fecha_inicio_torneo')),
+        ('Fecha límite de inscripción', _fecha('fecha_limite_inscripcion')),
+        ('Fecha de término', _fecha('fecha_fin_torneo')),
+        ('Reunión previa', _reunion_previa),
+    )),
+    Texto("Descripción", 'descripcion'),
+    Texto("Reunión previa", 'junta_previa_descripcion'),
+    Texto("Comité organizador", 'comite_organizador'),
+    Texto("Sistema de competencia", 'sistema_competencia'),
+    Texto("Fase final", 'fase_final'),
+    Datos("Inscripciones", (
+        ('Costo', _dinero('costo_inscripcion')),
+        ('Lugar', _valor('lugar_inscripcion')),
+        ('Forma de pago', _valor('forma_pago')),
+    )),
+    Texto("Requisitos", 'requisitos'),
+    Texto("Documentos requeridos", 'documentos_requeridos'),
+    Texto("Normatividad", 'normatividad_aplicable'),
+    Lista("Premiación", (
+        ('1er lugar', _valor('premiacion_primero')),
+        ('2do lugar', _valor('premiacion_segundo')),
+        ('3er lugar', _valor('premiacion_tercero')),
+        ('Premios adicionales', _valor('premiacion_adicional')),
+    )),
+    Lista("Arbitraje", (
+        ('Árbitros', _valor('arbitraje')),
+        ('Costo de arbitraje', _dinero('costo_arbitraje')),
+    )),
+    Texto("Transitorios", 'transitorios'),
+    Lista("Información de contacto", (
+        ('Dirección', _valor('direccion')),
+        ('Teléfono', _valor('telefono')),
+        ('Correo', _valor('correo')),
+    )),
+)
+
+DESTACADOS = Datos(None, (
+    ('Inicio', _fecha('fecha_inicio_torneo')),
+    ('Inscripciones hasta', _fecha('fecha_limite_inscripcion')),
+    ('Costo', _dinero('costo_inscripcion')),
+))
+
+
+# ==================== DOCUMENTO ====================
+def armar(convocatoria):
+    """Documento de `convocatoria` (guardada o no), sin memorizar"""
+    secciones = (seccion.armar(convocatoria) for seccion in DISENO)
+    return Documento(
+        nombre=convocatoria.nombre,
+        institucion=convocatoria.institucion_responsable,
+        logo=convocatoria.logo_ayuntamiento or None,
+        fondo=convocatoria.imagen_fondo or None,
+        destacados=DESTACADOS.elementos(convocatoria),
+        secciones=[seccion for seccion in secciones if seccion],
+    )
+
+
+def huella_rendiciones(objeto):
+    """
+    Hash corto de `rendiciones`, o '' si no tiene o no se cargó (only()).
+    Las rendiciones se registran sin cambiar updated_at (imagenes.py), así
+    que las llaves que dependen de las imágenes la incluyen
+    """
+    diferidos = getattr(objeto, 'get_deferred_fields', None)
+    if diferidos is not None and 'rendiciones' in diferidos():
+        return ''
+    rendiciones = getattr(objeto, 'rendiciones', None)
+    if not rendiciones:
+        return ''
+    return hashlib.sha256(json.dumps(rendiciones, sort_keys=True).encode()).hexdigest()[:16]
+
+
+_memo = OrderedDict()
+_lock = threading.Lock()
+
+
+def documento(convocatoria):
+    """
+    Documento de la convocatoria, memorizado por (id, updated_at) y sus
+    rendiciones: al editarla o al terminar sus rendiciones cambia la llave.
+    Un borrador (sin id) se arma cada vez
+    """
+    if convocatoria.pk is None or convocatoria.updated_at is None:
+        return armar(convocatoria)
+
+    llave = (convocatoria.pk, convocatoria.updated_at, huella_rendiciones(convocatoria))
+    with _lock:
+        if llave in _memo:
+            _memo.move_to_end(llave)
+            return _memo[llave]
+
+    resultado = armar(convocatoria)
+    with _lock:
+        _memo[llave] = resultado
+        while len(_memo) > MEMO_MAXIMO:
+            _memo.popitem(last=False)
+    return resultado
@@ -0,0 +1,146 @@
+#eliminacion.py
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import cache, cartel, facetas
+from .imagenes import CAMPOS_IMAGEN, RENDICIONES
+from .models import Convocatoria
+
+
+# ==================== BAJA LÓGICA ====================
+def dar_de_baja(ids):
+    """
+    Marca como inactivas las convocatorias `ids` (por llave primaria): dejan
+    de aparecer en los listados, pero la fila y sus imágenes se conservan
+    hasta la purga. Sus PDF en caché y sus carteles se descartan, como al
+    borrarlas. Devuelve cuántas se dieron de baja
+    """
+    convocatorias = list(Convocatoria.objects.activas().filter(pk__in=ids))
+    if not convocatorias:
+        return 0
+    # Las rutas se calculan antes del update, con los datos que se ven en el
+    # cartel. Un cartel idéntico de otra convocatoria se vuelve a componer
+    # en su siguiente descarga
+    carteles = set().union(*(cartel.rutas_vigentes(convocatoria) for convocatoria in convocatorias))
+
+    ahora = timezone.now()
+    pks = [convocatoria.pk for convocatoria in convocatorias]
+    filas = Convocatoria.objects.activas().filter(pk__in=pks).update(
+        activa=False,
+        eliminada_en=ahora,
+        updated_at=ahora
+    )
+    if filas:
+        facetas.invalidar()
+
+        def descartar():
+            backend = cache.obtener_backend()
+            for pk in pks:
+                backend.invalidar(pk)
+            for ruta in carteles:
+                default_storage.delete(ruta)
+        transaction.on_commit(descartar)
+    return filas
+
+
+# ==================== PURGA ====================
+def _dias_retencion():
+    return getattr(settings, 'CONVOCATORIAS_PURGA_DIAS', 30)
+
+
+def por_purgar(limite):
+    """
+    Convocatorias dadas de baja antes de `limite`. Las inactivas de antes de
+    eliminada_en se juzgan por updated_at
+    """
+    return Convocatoria.objects.filter(activa=False).filter(
+        Q(eliminada_en__lt=limite) | Q(eliminada_en__isnull=True, updated_at__lt=limite)
+    )
+
+
+def _archivos(filas):
+    """
+    {ruta: hash de la rendición o None} de las imágenes originales y sus
+    rendiciones. Las rendiciones se comparten entre convocatorias con la
+    misma imagen, por eso se guarda su hash
+    """
+    archivos = {}
+    for fila in filas:
+        for campo in CAMPOS_IMAGEN:
+            if fila[campo]:
+                archivos[fila[campo]] = None
+        for datos in (fila['rendiciones'] or {}).values():
+            for nombre, ruta in datos.items():
+                if nombre in RENDICIONES:
+                    archivos[ruta] = datos.get('hash')
+    return archivos
+
+
+def _en_uso(archivos, excluir=()):
+    """Rutas de `archivos` que alguna otra convocatoria sigue usando"""
+    originales = [ruta for ruta, contenido_hash in archivos.items() if contenido_hash is None]
+    hashes = {contenido_hash for contenido_hash in archivos.values() if contenido_hash}
+
+    referencias = Q()
+    for campo in CAMPOS_IMAGEN:
+        referencias |= Q(**{f'{campo}__in': originales})
+        referencias |= Q(**{f'rendiciones__{campo}__hash__in': hashes})
+    restantes = Convocatoria.objects.filter(referencias).exclude(pk__in=excluir)
+
+    en_uso = set()
+    for fila in restantes.values(*CAMPOS_IMAGEN, 'rendiciones').iterator():
+        en_uso.update(fila[campo] for campo in CAMPOS_IMAGEN if fila[campo])
+        hashes_usados = {datos.get('hash') for datos in (fila['rendiciones'] or {}).values()}
+        en_uso.update(ruta for ruta, contenido_hash in archivos.items() if contenido_hash in hashes_usados)
+    return en_uso
+
+
+def _tamano(ruta):
+    try:
+        return default_storage.size(ruta)
+    except (OSError, NotImplementedError):
+        return 0
+
+
+def purgar(dias=None, lote=200, simular=False):
+    """
+    Borra por lotes las convocatorias dadas de baja hace más de `dias` y
+    después las imágenes y rendiciones que ya nadie usa. Cada lote es una
+    transacción corta; los archivos se borran ya confirmada. Genera por lote
+    (convocatorias, archivos, bytes liberados). Con `simular` solo cuenta
+    """
+    limite = timezone.now() - timedelta(days=_dias_retencion() if dias is None else dias)
+    ultimo = 0
+    simuladas = []
+    while True:
+        filas = list(
+            por_purgar(limite).filter(pk__gt=ultimo).order_by('pk')
+            .values('pk', 'rendiciones', *CAMPOS_IMAGEN)[:lote]
+        )
+        if not filas:
+            return
+        ultimo = filas[-1]['pk']
+        ids = [fila['pk'] for fila in filas]
+
+        if simular:
+            # Las filas "borradas" en lotes anteriores tampoco cuentan como uso
+            simuladas += ids
+        else:
+            with transaction.atomic():
+                # Solo si siguen inactivas (pudieron restaurarse mientras tanto)
+                Convocatoria.objects.filter(pk__in=ids, activa=False).delete()
+
+        archivos = _archivos(filas)
+        en_uso = _en_uso(archivos, excluir=simuladas) if archivos else set()
+        borrables = [ruta for ruta in archivos if ruta not in en_uso]
+        liberados = 0
+        for ruta in borrables:
+            liberados += _tamano(ruta)
+            if not simular:
+                default_storage.delete(ruta)
+        yield len(ids), len(borrables), liberados
@@ -0,0 +1,40 @@
+#estados.py
+from django.db import transaction
+from django.utils import timezone
+
+from . import facetas
+from .models import Convocatoria
+
+# (estado actual, estado nuevo, condición sobre las fechas respecto a `hoy`).
+# Se aplican en este orden, así una convocatoria atrasada avanza varios
+# pasos en una sola ejecución
+TRANSICIONES = (
+    ('Abierta', 'Cerrada', lambda hoy: {'fecha_limite_inscripcion__lt': hoy}),
+    ('Cerrada', 'En curso', lambda hoy: {'fecha_inicio_torneo__lte': hoy}),
+    ('En curso', 'Finalizada', lambda hoy: {'fecha_fin_torneo__lt': hoy}),
+)
+
+
+# ==================== TRANSICIONES DE ESTADO ====================
+def actualizar_estados(hoy=None):
+    """
+    Avanza el estado de las convocatorias según sus fechas con un UPDATE por
+    transición. También cambia updated_at para que se regeneren sus PDF.
+    Devuelve [(origen, destino, filas_actualizadas), ...]
+    """
+    hoy = hoy or timezone.localdate()
+    ahora = timezone.now()
+    resultado = []
+
+    with transaction.atomic():
+        for origen, destino, condicion in TRANSICIONES:
+            filas = Convocatoria.objects.filter(estado=origen, **condicion(hoy)).update(
+                estado=destino,
+                updated_at=ahora
+            )
+            resultado.append((origen, destino, filas))
+
+    # update() no envía señales: los conteos del filtro se descartan aquí
+    if any(filas for _origen, _destino, filas in resultado):
+        facetas.invalidar()
+    return resultado
@@ -0,0 +1,96 @@
+#exportacion.py
+import csv
+import tempfile
+from datetime import date, datetime, time
+from decimal import Decimal
+
+from django.utils import timezone
+
+from .api import CAMPOS, campos_solicitados
+from .filtros import filtrar_convocatorias
+from .imagenes import CAMPOS_IMAGEN
+
+FORMATOS = ('csv', 'xlsx')
+
+# Por defecto se exporta todo menos las imágenes
+CAMPOS_EXPORTACION = tuple(campo for campo in CAMPOS if campo not in CAMPOS_IMAGEN)
+
+# Filas por viaje a la base; la memoria no depende del total exportado
+TAMANO_BLOQUE = 2000
+
+
+class ExportacionNoDisponible(Exception):
+    pass
+
+
+# ==================== FILAS ====================
+def filas(convocatorias, params):
+    """
+    (campos, iterador de tuplas) de las convocatorias que cumplen los
+    filtros del filtro (kword, deporte, categoria, estado, desde, hasta,
+    abiertas).
+    Las columnas se eligen con `?campos=` como en la API
+    """
+    campos = campos_solicitados(params, CAMPOS_EXPORTACION)
+    convocatorias = filtrar_convocatorias(convocatorias, params).order_by('-fecha_inicio_torneo', '-id')
+    return campos, convocatorias.values_list(*campos).iterator(chunk_size=TAMANO_BLOQUE)
+
+
+def _texto(valor):
+    if valor is None:
+        return ''
+    if isinstance(valor, (date, datetime, time)):
+        return valor.isoformat()
+    if isinstance(valor, Decimal):
+        return str(valor)
+    return valor
+
+
+# ==================== CSV ====================
+class _Eco:
+    """Destino de csv.writer que devuelve la línea en lugar de guardarla"""
+
+    def write(self, valor):
+        return valor
+
+
+def generar_csv(campos, filas):
+    """
+    Genera el CSV línea por línea para un StreamingHttpResponse. Empieza con
+    BOM para que Excel reconozca el UTF-8 (acentos)
+    """
+    escritor = csv.writer(_Eco())
+    yield '\ufeff' + escritor.writerow(campos)
+    for fila in filas:
+        yield escritor.writerow([_texto(valor) for valor in fila])
+
+
+# ==================== XLSX ====================
+def _celda(valor):
+    # Excel no maneja zonas horarias: created_at/updated_at van en hora local
+    if isinstance(valor, datetime) and timezone.is_aware(valor):
+        return timezone.localtime(valor).replace(tzinfo=None)
+    return valor
+
+
+def generar_xlsx(campos, filas):
+    """
+    Escribe el XLSX con un libro write-only de openpyxl (las filas van a un
+    archivo temporal, no a memoria) y devuelve el archivo listo para leer
+    """
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise ExportacionNoDisponible("Para exportar XLSX se necesita openpyxl (pip install openpyxl)")
+
+    libro = Workbook(write_only=True)
+    hoja = libro.create_sheet('Convocatorias')
+    hoja.append(campos)
+    for fila in filas:
+        # Fechas y montos se guardan como tales para que Excel pueda operar con ellos
+        hoja.append([_celda(valor) for valor in fila])
+
+    archivo = tempfile.TemporaryFile()
+    libro.save(archivo)
+    archivo.seek(0)
+    return archivo
@@ -0,0 +1,153 @@
+#facetas.py
+import hashlib
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count
+
+from .busqueda import normalizar
+from .filtros import filtrar_convocatorias
+
+# Campos que se muestran como listas desplegables en el filtro
+CAMPOS_FACETA = ('deporte', 'categoria', 'estado')
+
+VERSION = 'convocatorias:facetas:version'
+
+
+# ==================== CACHÉ ====================
+def _cache():
+    """
+    Caché de las facetas: el alias CONVOCATORIAS_FACETAS_CACHE ('default' si
+    no está). invalidar() sube VERSION en ella, así que con más de un proceso
+    tiene que ser una caché compartida (Redis, Memcached, base de datos): con
+    LocMemCache los demás procesos seguirían sirviendo conteos viejos
+    """
+    return caches[getattr(settings, 'CONVOCATORIAS_FACETAS_CACHE', 'default')]
+
+
+def _version():
+    cache = _cache()
+    version = cache.get(VERSION)
+    if version is None:
+        cache.add(VERSION, 1, None)
+        version = cache.get(VERSION, 1)
+    return version
+
+
+async def _aversion():
+    cache = _cache()
+    version = await cache.aget(VERSION)
+    if version is None:
+        await cache.aadd(VERSION, 1, None)
+        version = await cache.aget(VERSION, 1)
+    return version
+
+
+def invalidar():
+    """Descarta todas las facetas en caché (se llama al escribir convocatorias)"""
+    cache = _cache()
+    try:
+        cache.incr(VERSION)
+    except ValueError:
+        cache.add(VERSION, 1, None)
+
+
+def _llave(params, version):
+    # Las selecciones de las facetas no forman parte de la llave: el conteo
+    # de cada una se calcula en Python sobre las mismas combinaciones
+    contenido = '|'.join([
+        ' '.join(normalizar(params.get('kword', ''))),
+        params.get('desde', '') or '',
+        params.get('hasta', '') or '',
+        params.get('abiertas', '') or '',
+    ])
+    return f"convocatorias:facetas:{version}:{hashlib.sha256(contenido.encode()).hexdigest()[:32]}"
+
+
+# ==================== CONTEO ====================
+def _agrupadas(convocatorias, params):
+    base = filtrar_convocatorias(convocatorias, {
+        'kword': params.get('kword', ''),
+        'desde': params.get('desde'),
+        'hasta': params.get('hasta'),
+        'abiertas': params.get('abiertas'),
+    })
+    return base.order_by().values(*CAMPOS_FACETA).annotate(total=Count('id'))
+
+
+def _fila(fila):
+    return tuple(fila[campo] for campo in CAMPOS_FACETA) + (fila['total'],)
+
+
+def _timeout():
+    return getattr(settings, 'CONVOCATORIAS_FACETAS_TIMEOUT', 300)
+
+
+def combinaciones(convocatorias, params):
+    """
+    Lista de (deporte, categoria, estado, total) de las convocatorias que
+    cumplen kword, desde y hasta. Es una sola consulta agrupada y se guarda
+    en caché hasta la siguiente escritura
+    """
+    cache = _cache()
+    llave = _llave(params, _version())
+    resultado = cache.get(llave)
+    if resultado is None:
+        resultado = [_fila(fila) for fila in _agrupadas(convocatorias, params)]
+        cache.set(llave, resultado, _timeout())
+    return resultado
+
+
+async def acombinaciones(convocatorias, params):
+    """combinaciones() con el ORM asíncrono, para las vistas async"""
+    cache = _cache()
+    llave = _llave(params, await _aversion())
+    resultado = await cache.aget(llave)
+    if resultado is None:
+        resultado = [_fila(fila) async for fila in _agrupadas(convocatorias, params)]
+        await cache.aset(llave, resultado, _timeout())
+    return resultado
+
+
+def contar_facetas(convocatorias, params):
+    """
+    Valores de cada faceta con su número de convocatorias. El conteo de una
+    faceta respeta lo seleccionado en las demás, así que cada opción indica
+    cuántos resultados habrá al elegirla. Devuelve un dict:
+
+        {'deporte': [{'valor': 'Fútbol', 'total': 12, 'seleccionado': True}, ...], ...}
+    """
+    return _contar(combinaciones(convocatorias, params), params)
+
+
+async def acontar_facetas(convocatorias, params):
+    """contar_facetas() con el ORM asíncrono, para las vistas async"""
+    return _contar(await acombinaciones(convocatorias, params), params)
+
+
+def _contar(filas, params):
+    # Los filtros usan iexact, así que las selecciones se comparan sin mayúsculas
+    seleccion = {campo: (params.get(campo) or '').casefold() for campo in CAMPOS_FACETA}
+    conteos = {campo: {} for campo in CAMPOS_FACETA}
+
+    for *valores, total in filas:
+        fila = dict(zip(CAMPOS_FACETA, valores))
+        for campo in CAMPOS_FACETA:
+            if all(
+                not seleccion[otro] or (fila[otro] or '').casefold() == seleccion[otro]
+                for otro in CAMPOS_FACETA if otro != campo
+            ):
+                conteos[campo][fila[campo]] = conteos[campo].get(fila[campo], 0) + total
+
+    facetas = {}
+    for campo in CAMPOS_FACETA:
+        opciones = [
+            {'valor': valor, 'total': total, 'seleccionado': (valor or '').casefold() == seleccion[campo]}
+            for valor, total in sorted(conteos[campo].items(), key=lambda item: (item[0] or '').casefold())
+            if valor
+        ]
+        # La opción elegida se conserva aunque ya no tenga resultados
+        if seleccion[campo] and not any(opcion['seleccionado'] for opcion in opciones):
+            opciones.insert(0, {'valor': params.get(campo), 'total': 0, 'seleccionado': True})
+        facetas[campo] = opciones
+    return facetas
@@ -0,0 +1,93 @@
+#filtros.py
+from django.db.models import F, Value
+from django.db.models.functions import Lower
+from django.db.models.lookups import Exact
+from django.utils.dateparse import parse_date
+
+from .busqueda import apaginar_busqueda, buscar, paginar_busqueda
+from .paginacion import apaginar, paginar
+
+# Orden de los resultados sin kword
+ORDEN_FECHA = ['-fecha_inicio_torneo', '-id']
+
+
+# ==================== FILTROS DE BÚSQUEDA ====================
+def filtrar_convocatorias(convocatorias, params, texto=True):
+    """
+    Aplica a `convocatorias` los filtros de búsqueda recibidos en `params`
+    (request.GET o un dict): kword, deporte, categoria, estado, el rango
+    de fechas de inicio del torneo `desde` / `hasta` (AAAA-MM-DD) y
+    `abiertas` (solo las que están en periodo de inscripción).
+    Con `texto=False` se omite la búsqueda por kword
+    """
+    query = params.get('kword', '').strip()
+    deporte = params.get('deporte', '')
+    categoria = params.get('categoria', '')
+    estado = params.get('estado', '')
+
+    # La búsqueda por palabra usa el índice de términos
+    if query and texto:
+        convocatorias = buscar(convocatorias, query)
+
+    if deporte:
+        convocatorias = convocatorias.filter(igual_sin_mayusculas('deporte', deporte))
+
+    if categoria:
+        convocatorias = convocatorias.filter(igual_sin_mayusculas('categoria', categoria))
+
+    if estado:
+        convocatorias = convocatorias.filter(igual_sin_mayusculas('estado', estado))
+
+    desde = _fecha(params.get('desde'))
+    if desde:
+        convocatorias = convocatorias.filter(fecha_inicio_torneo__gte=desde)
+
+    hasta = _fecha(params.get('hasta'))
+    if hasta:
+        convocatorias = convocatorias.filter(fecha_inicio_torneo__lte=hasta)
+
+    if params.get('abiertas'):
+        convocatorias = convocatorias.abiertas()
+
+    return convocatorias
+
+
+def igual_sin_mayusculas(campo, valor):
+    """
+    Comparación sin mayúsculas como LOWER(campo) = LOWER(valor). A diferencia
+    de `iexact` (LIKE en SQLite, UPPER en Postgres) usa los índices
+    funcionales sobre Lower() del modelo
+    """
+    return Exact(Lower(F(campo)), Lower(Value(valor)))
+
+
+def pagina_de_resultados(convocatorias, params, tamano=20):
+    """
+    Filtra y pagina por cursor (`params['cursor']`): por relevancia si hay
+    kword, si no por fecha de inicio. Devuelve (elementos, siguiente_cursor)
+    """
+    query = params.get('kword', '').strip()
+    cursor = params.get('cursor')
+    convocatorias = filtrar_convocatorias(convocatorias, params, texto=False)
+
+    if query:
+        return paginar_busqueda(convocatorias, query, cursor, tamano)
+    return paginar(convocatorias, ORDEN_FECHA, cursor, tamano)
+
+
+async def apagina_de_resultados(convocatorias, params, tamano=20):
+    """pagina_de_resultados() con el ORM asíncrono, para las vistas async"""
+    query = params.get('kword', '').strip()
+    cursor = params.get('cursor')
+    convocatorias = filtrar_convocatorias(convocatorias, params, texto=False)
+
+    if query:
+        return await apaginar_busqueda(convocatorias, query, cursor, tamano)
+    return await apaginar(convocatorias, ORDEN_FECHA, cursor, tamano)
+
+
+def _fecha(valor):
+    try:
+        return parse_date(valor) if valor else None
+    except ValueError:
+        return None
@@ -1,13 +1,62 @@
 from django import forms
+from django.urls import reverse
+
+from . import subidas
 from .models import Convocatoria
 
-class ConvocatoriaForm(forms.ModelForm):
+
+class SubidasMixin:
+    """
+    Agrega un campo oculto `<campo>_subida` por cada imagen. Si trae el id
+    de una subida por partes ya completa, ese archivo se usa como la imagen
+    y el POST del formulario no lleva el archivo
+    """
+
+    CAMPOS_SUBIDA = ('logo_ayuntamiento', 'imagen_fondo')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        for campo in self.CAMPOS_SUBIDA:
+            self.fields[f'{campo}_subida'] = forms.CharField(required=False, widget=forms.HiddenInput)
+            # subidas.js toma la URL de aquí
+            self.fields[campo].widget.attrs['data-subida'] = reverse('convocatorias:subidas')
+
+    def clean(self):
+        cleaned_data = super().clean()
+        for campo in self.CAMPOS_SUBIDA:
+            subida_id = cleaned_data.get(f'{campo}_subida')
+            if not subida_id:
+                continue
+            try:
+                archivo = subidas.abrir(subida_id)
+            except ValueError:
+                archivo = None
+            if archivo is None:
+                self.add_error(campo, "La subida de la imagen no terminó o ya expiró; vuelve a seleccionarla")
+            else:
+                cleaned_data[campo] = archivo
+        return cleaned_data
+
+    def save(self, commit=True):
+        instancia = super().save(commit=commit)
+        if commit:
+            # El archivo ya se copió al almacenamiento
+            for campo in self.CAMPOS_SUBIDA:
+                subida_id = self.cleaned_data.get(f'{campo}_subida')
+                if subida_id:
+                    self.cleaned_data[campo].close()
+                    subidas.eliminar(subida_id)
+        return instancia
+
+
+class ConvocatoriaForm(SubidasMixin, forms.ModelForm):
     class Meta:
         model = Convocatoria
         fields = '__all__'  # O selecciona los campos específicos
         widgets = {
             'fecha_inicio_torneo': forms.DateInput(attrs={'type': 'date'}),
             'fecha_limite_inscripcion': forms.DateInput(attrs={'type': 'date'}),
+            'fecha_fin_torneo': forms.DateInput(attrs={'type': 'date'}),
             'fecha_reunion_previa': forms.DateInput(attrs={'type': 'date'}),
             'junta_previa_fecha': forms.DateInput(attrs={'type': 'date'}),
             'hora_reunion_previa': forms.TimeInput(attrs={'type': 'time'}),
@@ -28,12 +77,24 @@ class ConvocatoriaForm(forms.ModelForm):
             # Agrega más labels personalizados si necesitas
         }
 
-class ConvocatoriaEditForm(forms.ModelForm):
+class ConvocatoriaEditForm(SubidasMixin, forms.ModelForm):
     class Meta:
         model = Convocatoria
         exclude = ['created_at', 'updated_at']  # Excluir campos automáticos
         widgets = {
             'fecha_inicio_torneo': forms.DateInput(attrs={'type': 'date'}),
             'fecha_limite_inscripcion': forms.DateInput(attrs={'type': 'date'}),
+            'fecha_fin_torneo': forms.DateInput(attrs={'type': 'date'}),
             'descripcion': forms.Textarea(attrs={'rows': 4}),
-        }
\ No newline at end of file
+        }
+
+
+class ImportacionForm(forms.ModelForm):
+    """
+    Reglas de validación de una fila importada (importacion.py): las mismas
+    del modelo, sin imágenes ni campos automáticos
+    """
+
+    class Meta:
+        model = Convocatoria
+        exclude = ['logo_ayuntamiento', 'imagen_fondo', 'created_at', 'updated_at', 'activa']
@@ -0,0 +1,219 @@
+#fragmentos.py
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.base import DEFAULT_TIMEOUT, BaseCache
+from django.utils.safestring import mark_safe
+
+from .documento import huella_rendiciones
+
+
+# ==================== BACKEND ====================
+class CacheFragmentos(BaseCache):
+    """
+    Caché en memoria local con desalojo LRU por número de entradas
+    (MAX_ENTRIES) y por tamaño (OPTIONS['MAX_BYTES']), que cuenta aciertos
+    y fallos. También se puede usar en CACHES:
+
+        'fragmentos': {
+            'BACKEND': 'applications.convocatorias.fragmentos.CacheFragmentos',
+            'OPTIONS': {'MAX_ENTRIES': 5000, 'MAX_BYTES': 32 * 1024 * 1024},
+        }
+    """
+
+    def __init__(self, location='', params=None):
+        params = dict(params or {})
+        opciones = dict(params.get('OPTIONS') or {})
+        self.max_bytes = opciones.pop('MAX_BYTES', 16 * 1024 * 1024)
+        params['OPTIONS'] = opciones
+        super().__init__(params)
+        self._datos = OrderedDict()  # llave -> (expira, bytes pickled)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.aciertos = 0
+        self.fallos = 0
+        self.desalojos = 0
+
+    def _expira(self, timeout):
+        timeout = self.get_backend_timeout(timeout)
+        return None if timeout is None else time.monotonic() + timeout
+
+    def _quitar(self, llave):
+        _expira, datos = self._datos.pop(llave)
+        self._bytes -= len(datos)
+
+    def _vigente(self, llave):
+        entrada = self._datos.get(llave)
+        if entrada is None:
+            return None
+        if entrada[0] is not None and entrada[0] <= time.monotonic():
+            self._quitar(llave)
+            return None
+        return entrada
+
+    def get(self, key, default=None, version=None):
+        llave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entrada = self._vigente(llave)
+            if entrada is None:
+                self.fallos += 1
+                return default
+            self.aciertos += 1
+            self._datos.move_to_end(llave)
+            datos = entrada[1]
+        return pickle.loads(datos)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        llave = self.make_and_validate_key(key, version=version)
+        datos = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if llave in self._datos:
+                self._quitar(llave)
+            self._datos[llave] = (self._expira(timeout), datos)
+            self._bytes += len(datos)
+            # Se desaloja lo menos usado hasta respetar ambos límites
+            while len(self._datos) > 1 and (len(self._datos) > self._max_entries or self._bytes > self.max_bytes):
+                self._quitar(next(iter(self._datos)))
+                self.desalojos += 1
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        llave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if self._vigente(llave) is not None:
+                return False
+        self.set(key, value, timeout, version)
+        return True
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        llave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            entrada = self._vigente(llave)
+            if entrada is None:
+                return False
+            self._datos[llave] = (self._expira(timeout), entrada[1])
+            return True
+
+    def delete(self, key, version=None):
+        llave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            if llave not in self._datos:
+                return False
+            self._quitar(llave)
+            return True
+
+    def has_key(self, key, version=None):
+        llave = self.make_and_validate_key(key, version=version)
+        with self._lock:
+            return self._vigente(llave) is not None
+
+    def clear(self):
+        with self._lock:
+            self._datos.clear()
+            self._bytes = 0
+
+    def estadisticas(self):
+        with self._lock:
+            return {
+                'aciertos': self.aciertos,
+                'fallos': self.fallos,
+                'desalojos': self.desalojos,
+                'entradas': len(self._datos),
+                'bytes': self._bytes,
+            }
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def obtener_cache():
+    """
+    Caché de los fragmentos: el alias CONVOCATORIAS_FRAGMENTOS_CACHE si está
+    configurado, si no una CacheFragmentos propia del proceso
+    """
+    global _cache
+    alias = getattr(settings, 'CONVOCATORIAS_FRAGMENTOS_CACHE', None)
+    if alias:
+        return caches[alias]
+    with _cache_lock:
+        if _cache is None:
+            _cache = CacheFragmentos(params={'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': 5000}})
+        return _cache
+
+
+# ==================== FRAGMENTOS ====================
+# CONVOCATORIAS_FRAGMENTOS_VERSION forma parte de todas las llaves: se sube
+# cuando cambia lo que se guarda (o cómo se arma la llave) para no servir
+# fragmentos de la versión anterior desde una caché compartida.
+# 2: la llave incluye la huella de las rendiciones
+VERSION = 2
+
+# Tiempo de renderizado por nombre de fragmento, para estimar el ahorro
+_tiempos = {}
+_tiempos_lock = threading.Lock()
+
+
+def llave(nombre, objeto):
+    """
+    Llave versionada del fragmento `nombre` de `objeto`: cambia con
+    updated_at y con las rendiciones de sus imágenes, así que editar la
+    convocatoria invalida sus fragmentos. None si el objeto no está guardado
+    """
+    actualizado = getattr(objeto, 'updated_at', None)
+    if getattr(objeto, 'pk', None) is None or actualizado is None:
+        return None
+    version = getattr(settings, 'CONVOCATORIAS_FRAGMENTOS_VERSION', VERSION)
+    return (
+        f"convocatorias:fragmento:{version}:{nombre}:{objeto.pk}:{actualizado.timestamp()}:"
+        f"{huella_rendiciones(objeto)}"
+    )
+
+
+def renderizar(nombre, objeto, render):
+    """HTML del fragmento desde la caché, o `render()` si no está"""
+    clave = llave(nombre, objeto)
+    if clave is None:
+        return render()
+
+    cache = obtener_cache()
+    html = cache.get(clave)
+    if html is not None:
+        with _tiempos_lock:
+            _tiempos.setdefault(nombre, [0, 0, 0.0])[0] += 1
+        return mark_safe(html)
+
+    inicio = time.perf_counter()
+    html = render()
+    segundos = time.perf_counter() - inicio
+    cache.set(clave, str(html), None)
+    with _tiempos_lock:
+        registro = _tiempos.setdefault(nombre, [0, 0, 0.0])
+        registro[1] += 1
+        registro[2] += segundos
+    return html
+
+
+def estadisticas():
+    """
+    Contadores por fragmento y estimación del tiempo de plantilla ahorrado
+    (aciertos × tiempo medio de renderizado), más los del backend si los tiene
+    """
+    with _tiempos_lock:
+        por_fragmento = {
+            nombre: {
+                'aciertos': aciertos,
+                'fallos': fallos,
+                'ms_renderizado_medio': round(segundos / fallos * 1000, 3) if fallos else None,
+                'ms_ahorrados': round(aciertos * segundos / fallos * 1000, 1) if fallos else 0,
+            }
+            for nombre, (aciertos, fallos, segundos) in _tiempos.items()
+        }
+    cache = obtener_cache()
+    return {
+        'fragmentos': por_fragmento,
+        'cache': cache.estadisticas() if hasattr(cache, 'estadisticas') else None,
+    }
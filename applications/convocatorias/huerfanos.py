@@ -0,0 +1,115 @@
+#huerfanos.py
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from itertools import islice
+
+from django.core.files.storage import default_storage
+from django.utils import timezone
+
+from . import cartel
+from .imagenes import CAMPOS_IMAGEN, DIRECTORIO, RENDICIONES
+from .models import Convocatoria
+
+# Un archivo más nuevo que esto puede ser de un guardado o una rendición en
+# curso cuya fila todavía no lo referencia
+EDAD_MINIMA = timedelta(hours=24)
+
+
+# ==================== ARCHIVOS EN USO ====================
+def directorios():
+    """
+    Carpetas de upload_to de las imágenes, la de rendiciones y la de
+    carteles
+    """
+    carpetas = [Convocatoria._meta.get_field(campo).upload_to.rstrip('/') for campo in CAMPOS_IMAGEN]
+    return carpetas + [DIRECTORIO, cartel.DIRECTORIO]
+
+
+def referenciados():
+    """
+    Conjunto de rutas que usa alguna convocatoria (activa o no: las dadas de
+    baja las borra la purga). Se leen solo esas columnas, por bloques
+    """
+    rutas = set()
+    filas = Convocatoria.objects.values_list('rendiciones', *CAMPOS_IMAGEN).iterator(chunk_size=2000)
+    for rendiciones, *imagenes in filas:
+        rutas.update(nombre for nombre in imagenes if nombre)
+        for datos in (rendiciones or {}).values():
+            rutas.update(ruta for nombre, ruta in datos.items() if nombre in RENDICIONES)
+    return rutas | carteles_vigentes()
+
+
+def carteles_vigentes():
+    """
+    Rutas de los carteles que corresponden al contenido actual de las
+    convocatorias activas. Los de contenido anterior (o de convocatorias
+    dadas de baja) quedan como huérfanos
+    """
+    rutas = set()
+    for convocatoria in Convocatoria.objects.activas().iterator(chunk_size=500):
+        rutas |= cartel.rutas_vigentes(convocatoria)
+    return rutas
+
+
+# ==================== RECORRIDO ====================
+def recorrer(directorio, storage=default_storage):
+    """Genera las rutas de los archivos bajo `directorio`, sin abrirlos"""
+    if not storage.exists(directorio):
+        return
+    carpetas, archivos = storage.listdir(directorio)
+    for archivo in archivos:
+        yield f"{directorio}/{archivo}"
+    for carpeta in carpetas:
+        yield from recorrer(f"{directorio}/{carpeta}", storage)
+
+
+def huerfanos(edad_minima=EDAD_MINIMA, storage=default_storage):
+    """
+    Genera (ruta, bytes) de los archivos de las carpetas de imágenes que
+    ninguna convocatoria referencia. Solo se consulta el tamaño y la fecha
+    de los candidatos, no de todos los archivos
+    """
+    en_uso = referenciados()
+    limite = timezone.now() - edad_minima
+    for directorio in directorios():
+        for ruta in recorrer(directorio, storage):
+            if ruta in en_uso:
+                continue
+            try:
+                if storage.get_modified_time(ruta) > limite:
+                    continue
+                yield ruta, storage.size(ruta)
+            except (OSError, NotImplementedError):
+                continue
+
+
+# ==================== BORRADO ====================
+def eliminar(candidatos, hilos=1, storage=default_storage):
+    """
+    Borra los (ruta, bytes) de `candidatos`, en paralelo con `hilos` > 1
+    (útil en almacenamientos remotos, donde cada borrado es una petición).
+    Devuelve (archivos, bytes) borrados
+    """
+    def borrar(candidato):
+        ruta, tamano = candidato
+        try:
+            storage.delete(ruta)
+        except OSError:
+            return 0, 0
+        return 1, tamano
+
+    archivos = liberados = 0
+    if hilos > 1:
+        candidatos = iter(candidatos)
+        with ThreadPoolExecutor(max_workers=hilos) as pool:
+            # Por tandas: map() encolaría de una vez todos los candidatos
+            while tanda := list(islice(candidatos, hilos * 100)):
+                for borrado, tamano in pool.map(borrar, tanda):
+                    archivos += borrado
+                    liberados += tamano
+    else:
+        for candidato in candidatos:
+            borrado, tamano = borrar(candidato)
+            archivos += borrado
+            liberados += tamano
+    return archivos, liberados
@@ -0,0 +1,169 @@
+#imagenes.py
+import hashlib
+from collections import namedtuple
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db.models import Q
+from PIL import Image as PILImage, ImageOps, features
+
+from .models import Convocatoria
+
+# Campos de imagen que reciben versiones reducidas
+CAMPOS_IMAGEN = ('logo_ayuntamiento', 'imagen_fondo')
+
+# `formato` 'web' es WebP (o JPEG/PNG optimizado si Pillow no trae WebP);
+# 'pdf' es JPEG, o PNG si hay transparencia, que es lo que acepta ReportLab
+Rendicion = namedtuple('Rendicion', 'tamano formato')
+
+RENDICIONES = {
+    'miniatura': Rendicion((320, 320), 'web'),
+    'web': Rendicion((1600, 1600), 'web'),
+    'pdf': Rendicion((300, 150), 'pdf'),
+}
+
+DIRECTORIO = 'convocatorias/rendiciones'
+
+WEBP = features.check('webp')
+
+
+# ==================== CODIFICACIÓN ====================
+def _tiene_transparencia(imagen):
+    return imagen.mode in ('RGBA', 'LA') or (imagen.mode == 'P' and 'transparency' in imagen.info)
+
+
+def codificar(imagen, formato):
+    """Bytes de `imagen` codificada para el `formato` de rendición, y su extensión"""
+    salida = BytesIO()
+    transparente = _tiene_transparencia(imagen)
+
+    if formato == 'web' and WEBP:
+        imagen.convert('RGBA' if transparente else 'RGB').save(salida, format='WEBP', quality=80, method=4)
+        return salida.getvalue(), 'webp'
+    if transparente:
+        imagen.convert('RGBA').save(salida, format='PNG', optimize=True)
+        return salida.getvalue(), 'png'
+    calidad = 82 if formato == 'web' else 90
+    imagen.convert('RGB').save(salida, format='JPEG', quality=calidad, optimize=True, progressive=formato == 'web')
+    return salida.getvalue(), 'jpg'
+
+
+def reducir(archivo, tamano):
+    """
+    Imagen de `archivo` orientada según su EXIF y reducida a `tamano`. En
+    JPEG se decodifica directamente a una escala cercana (mucha menos
+    memoria que decodificar la foto completa)
+    """
+    with PILImage.open(archivo) as original:
+        original.draft('RGB', tamano)
+        imagen = ImageOps.exif_transpose(original)
+        imagen.thumbnail(tamano)
+        imagen.load()
+    return imagen
+
+
+# ==================== RENDICIONES ====================
+def hash_contenido(archivo):
+    digest = hashlib.sha256()
+    for bloque in iter(lambda: archivo.read(64 * 1024), b''):
+        digest.update(bloque)
+    archivo.seek(0)
+    return digest.hexdigest()
+
+
+def generar_rendiciones(archivo, contenido_hash):
+    """
+    Crea las rendiciones de `archivo` en el almacenamiento. La carpeta solo
+    depende del hash del contenido: si la misma imagen ya se subió antes se
+    reutilizan sus archivos sin procesarla. Devuelve {nombre: ruta}
+    """
+    carpeta = f"{DIRECTORIO}/{contenido_hash[:2]}/{contenido_hash}"
+    existentes = default_storage.listdir(carpeta)[1] if default_storage.exists(carpeta) else []
+    rutas = {}
+    for nombre_archivo in existentes:
+        nombre = nombre_archivo.rsplit('.', 1)[0]
+        if nombre in RENDICIONES:
+            rutas[nombre] = f"{carpeta}/{nombre_archivo}"
+
+    faltantes = [nombre for nombre in RENDICIONES if nombre not in rutas]
+    if not faltantes:
+        return rutas
+
+    # Se decodifica una vez al tamaño mayor y cada rendición sale de la anterior
+    faltantes.sort(key=lambda nombre: RENDICIONES[nombre].tamano, reverse=True)
+    imagen = reducir(archivo, RENDICIONES[faltantes[0]].tamano)
+    for nombre in faltantes:
+        rendicion = RENDICIONES[nombre]
+        imagen.thumbnail(rendicion.tamano)
+        datos, extension = codificar(imagen, rendicion.formato)
+        rutas[nombre] = default_storage.save(f"{carpeta}/{nombre}.{extension}", ContentFile(datos))
+    return rutas
+
+
+def procesar_imagenes(convocatoria_id):
+    """
+    Genera las rendiciones que falten de las imágenes de la convocatoria y
+    las registra en `rendiciones`. Pensado para correr fuera de la petición.
+    Devuelve False si la convocatoria ya no existe
+    """
+    try:
+        convocatoria = Convocatoria.objects.only('rendiciones', *CAMPOS_IMAGEN).get(pk=convocatoria_id)
+    except Convocatoria.DoesNotExist:
+        return False
+
+    rendiciones = dict(convocatoria.rendiciones or {})
+    cambio = False
+    for campo in CAMPOS_IMAGEN:
+        archivo = getattr(convocatoria, campo)
+        if not archivo:
+            cambio |= rendiciones.pop(campo, None) is not None
+            continue
+        if rendiciones.get(campo, {}).get('original') == archivo.name:
+            continue
+        with archivo.open('rb'):
+            contenido_hash = hash_contenido(archivo)
+            rendiciones[campo] = {
+                'original': archivo.name,
+                'hash': contenido_hash,
+                **generar_rendiciones(archivo, contenido_hash),
+            }
+        cambio = True
+
+    if cambio:
+        # update() para no disparar de nuevo las señales de post_save;
+        # solo si la imagen sigue siendo la misma que se procesó. updated_at
+        # no cambia: forma parte de clave_pdf() y el PDF es el mismo con la
+        # rendición 'pdf' que sin ella (pdf.logo_para_pdf reduce igual)
+        mismas = Q()
+        for campo in CAMPOS_IMAGEN:
+            nombre = getattr(convocatoria, campo).name
+            mismas &= Q(**{campo: nombre}) if nombre else Q(**{f'{campo}__isnull': True}) | Q(**{campo: ''})
+        Convocatoria.objects.filter(mismas, pk=convocatoria_id).update(rendiciones=rendiciones)
+    return True
+
+
+# ==================== URLS ====================
+def ruta_rendicion(archivo, nombre):
+    """
+    Ruta en el almacenamiento de la rendición `nombre` de un FieldFile, o
+    None si todavía no existe (o corresponde a una imagen anterior)
+    """
+    instancia = getattr(archivo, 'instance', None)
+    if not archivo or instancia is None:
+        return None
+    datos = (getattr(instancia, 'rendiciones', None) or {}).get(archivo.field.name)
+    if not datos or datos.get('original') != archivo.name:
+        return None
+    return datos.get(nombre)
+
+
+def url_rendicion(archivo, nombre):
+    """URL de la rendición `nombre`, o la del original mientras no esté lista"""
+    ruta = ruta_rendicion(archivo, nombre)
+    if ruta:
+        return default_storage.url(ruta)
+    try:
+        return archivo.url
+    except (AttributeError, ValueError):
+        return ''
@@ -0,0 +1,175 @@
+#importacion.py
+import csv
+import io
+import os
+from datetime import date, datetime, time
+
+from django.db import transaction
+
+from . import busqueda, facetas, tareas
+from .forms import ImportacionForm
+from .models import Convocatoria
+from .presupuesto import por_lotes
+
+EXTENSIONES = ('csv', 'xlsx')
+
+TAMANO_LOTE = 500
+
+
+class ImportacionInvalida(Exception):
+    """El archivo no se puede importar (formato o encabezados)"""
+
+
+# ==================== LECTURA ====================
+def _columnas(encabezados):
+    """Nombres de campo de los encabezados; error si alguno no existe"""
+    campos = set(ImportacionForm.base_fields)
+    columnas = [str(encabezado or '').strip().lower() for encabezado in encabezados]
+    desconocidas = [columna for columna in columnas if columna and columna not in campos]
+    if desconocidas:
+        raise ImportacionInvalida(f"Columnas desconocidas: {', '.join(desconocidas)}")
+    if 'nombre' not in columnas:
+        raise ImportacionInvalida("Falta la columna 'nombre'")
+    return columnas
+
+
+def _valor(valor):
+    # Las fechas y horas de Excel llegan como objetos y el formulario las acepta tal cual
+    if valor is None:
+        return ''
+    if isinstance(valor, (date, datetime, time)):
+        return valor
+    if isinstance(valor, float) and valor.is_integer():
+        valor = int(valor)
+    return str(valor).strip()
+
+
+def _filas_csv(archivo):
+    texto = io.TextIOWrapper(archivo, encoding='utf-8-sig', newline='')
+    try:
+        lector = csv.reader(texto)
+        try:
+            columnas = _columnas(next(lector))
+        except StopIteration:
+            raise ImportacionInvalida("El archivo está vacío")
+        for numero, fila in enumerate(lector, start=2):
+            if any(celda.strip() for celda in fila):
+                yield numero, {columna: _valor(celda) for columna, celda in zip(columnas, fila) if columna}
+    finally:
+        # Sin cerrar el archivo original, que es de quien lo abrió
+        texto.detach()
+
+
+def _filas_xlsx(archivo):
+    try:
+        from openpyxl import load_workbook
+    except ImportError:
+        raise ImportacionInvalida("Para importar XLSX se necesita openpyxl (pip install openpyxl)")
+
+    try:
+        libro = load_workbook(archivo, read_only=True, data_only=True)
+    except Exception:
+        raise ImportacionInvalida("El archivo no es un XLSX válido")
+    try:
+        filas = libro.active.iter_rows(values_only=True)
+        try:
+            columnas = _columnas(next(filas))
+        except StopIteration:
+            raise ImportacionInvalida("El archivo está vacío")
+        for numero, fila in enumerate(filas, start=2):
+            if any(celda not in (None, '') for celda in fila):
+                yield numero, {columna: _valor(celda) for columna, celda in zip(columnas, fila) if columna}
+    finally:
+        libro.close()
+
+
+def leer_filas(archivo, nombre):
+    """
+    Itera (número de fila, {campo: valor}) de un CSV o XLSX abierto en modo
+    binario, sin cargar el archivo completo en memoria
+    """
+    extension = os.path.splitext(nombre)[1][1:].lower()
+    if extension == 'csv':
+        return _filas_csv(archivo)
+    if extension == 'xlsx':
+        return _filas_xlsx(archivo)
+    raise ImportacionInvalida(f"Solo se aceptan archivos {', '.join(EXTENSIONES)}")
+
+
+# ==================== IMPORTACIÓN ====================
+def _datos_formulario(fila):
+    """Las columnas que no vienen en el archivo toman el valor por defecto del modelo"""
+    datos = dict(fila)
+    for nombre in ImportacionForm.base_fields:
+        if nombre not in datos:
+            campo = Convocatoria._meta.get_field(nombre)
+            if campo.has_default():
+                datos[nombre] = campo.get_default()
+    return datos
+
+
+def _validar(fila):
+    """
+    Valida una fila con ImportacionForm. Devuelve (convocatoria sin
+    guardar, None) o (None, {campo: [mensajes]})
+    """
+    form = ImportacionForm(data=_datos_formulario(fila))
+    if form.is_valid():
+        return form.instance, None
+    return None, {campo: list(mensajes) for campo, mensajes in form.errors.items()}
+
+
+def _guardar(lote):
+    """
+    Un INSERT por lote. bulk_create no envía post_save, así que el índice de
+    búsqueda se actualiza aquí (las facetas y los PDF, en importar()).
+    Sus consultas crecen con el archivo y no cuentan contra el presupuesto
+    de la vista
+    """
+    with por_lotes():
+        creadas = Convocatoria.objects.bulk_create(lote)
+        busqueda.indexar(creadas)
+    return [convocatoria.pk for convocatoria in creadas]
+
+
+def _al_confirmar(ids):
+    facetas.invalidar()
+    for pk in ids:
+        tareas.encolar_pdf(pk)
+
+
+def importar(filas, tamano_lote=TAMANO_LOTE, omitir_errores=False, simular=False):
+    """
+    Valida cada fila con las reglas del formulario y guarda las válidas por
+    lotes con bulk_create, todo en una transacción. Si hay errores no se
+    guarda nada, salvo con `omitir_errores`; con `simular` solo se valida.
+    Devuelve {'filas', 'creadas', 'errores': [(fila, {campo: [mensajes]})]}
+    """
+    resultado = {'filas': 0, 'creadas': 0, 'errores': []}
+    ids = []
+    escribir = True
+    with transaction.atomic():
+        lote = []
+        for numero, fila in filas:
+            resultado['filas'] += 1
+            convocatoria, errores = _validar(fila)
+            if errores:
+                resultado['errores'].append((numero, errores))
+                # Ya no se guardará nada: el resto del archivo solo se valida
+                escribir = omitir_errores
+                continue
+            if not escribir:
+                continue
+            lote.append(convocatoria)
+            if len(lote) >= tamano_lote:
+                ids += _guardar(lote)
+                lote = []
+        if lote and escribir:
+            ids += _guardar(lote)
+
+        if simular or not escribir:
+            transaction.set_rollback(True)
+        else:
+            resultado['creadas'] = len(ids)
+            transaction.on_commit(lambda: _al_confirmar(ids))
+    return resultado
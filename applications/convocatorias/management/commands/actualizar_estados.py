@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date
+
+from applications.convocatorias.estados import actualizar_estados
+
+
+class Command(BaseCommand):
+    help = (
+        "Pasa las convocatorias de Abierta a Cerrada, En curso y Finalizada "
+        "según sus fechas. Pensado para ejecutarse una vez al día (cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--fecha', help="Fecha de referencia AAAA-MM-DD (por defecto hoy)")
+
+    def handle(self, *args, **options):
+        hoy = None
+        if options['fecha']:
+            hoy = parse_date(options['fecha'])
+            if hoy is None:
+                raise CommandError("La fecha debe tener el formato AAAA-MM-DD")
+
+        for origen, destino, filas in actualizar_estados(hoy):
+            self.stdout.write(f"{origen} → {destino}: {filas}")
@@ -0,0 +1,97 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from applications.convocatorias.busqueda import terminos_de
+from applications.convocatorias.filtros import pagina_de_resultados
+from applications.convocatorias.models import Convocatoria, TerminoBusqueda
+
+DEPORTES = ['Fútbol', 'Básquetbol', 'Voleibol', 'Béisbol', 'Atletismo', 'Natación', 'Frontón', 'Ajedrez']
+PALABRAS = (
+    "liga torneo copa municipal infantil juvenil veteranos femenil varonil mixta "
+    "temporada invierno verano primavera otoño relámpago estatal regional barrio "
+    "unidad deportiva cancha parque colonia centro norte sur oriente poniente "
+    "inscripción equipos jugadores árbitros reglamento premiación trofeo medallas "
+    "categoría rama sede jornada partido final semifinal cuartos grupos puntos"
+).split()
+
+CONSULTAS = ['futbol', 'liga juvenil', 'basquet', 'copa municipal fem', 'torneo relampago', 'zzz']
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara la búsqueda con icontains contra el índice de términos sobre "
+        "datos sintéticos. Todo se hace en una transacción que se revierte"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=100000)
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._generar(options['filas'], random.Random(options['semilla']))
+            for consulta in CONSULTAS:
+                self._medir(consulta, options['repeticiones'])
+            transaction.set_rollback(True)
+
+    def _generar(self, filas, azar):
+        inicio = time.perf_counter()
+        # Vocabulario común + palabras poco frecuentes, como en textos reales
+        raras = [''.join(azar.choices('abcdefghijklmnopqrstuvwxyz', k=azar.randint(5, 10))) for _ in range(5000)]
+        for base in range(0, filas, 5000):
+            lote = Convocatoria.objects.bulk_create([
+                Convocatoria(
+                    nombre=f"{azar.choice(['Liga', 'Torneo', 'Copa'])} {' '.join(azar.sample(PALABRAS, 3))}",
+                    deporte=azar.choice(DEPORTES),
+                    categoria=azar.choice(['Libre', 'Juvenil', 'Veteranos']),
+                    rama=azar.choice(['Femenil', 'Varonil', 'Mixta']),
+                    descripcion=' '.join(
+                        azar.choices(PALABRAS, k=azar.randint(5, 30)) + azar.choices(raras, k=azar.randint(15, 90))
+                    ),
+                )
+                for _ in range(min(5000, filas - base))
+            ])
+            TerminoBusqueda.objects.bulk_create([
+                TerminoBusqueda(convocatoria_id=convocatoria.pk, termino=termino, peso=peso)
+                for convocatoria in lote
+                for termino, peso in terminos_de({
+                    'nombre': convocatoria.nombre,
+                    'deporte': convocatoria.deporte,
+                    'descripcion': convocatoria.descripcion,
+                }).items()
+            ], batch_size=5000)
+        self.stdout.write(f"{filas} convocatorias generadas en {time.perf_counter() - inicio:.1f} s")
+
+    def _tiempo(self, funcion, repeticiones):
+        tiempos = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            resultado = funcion()
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        return statistics.median(tiempos), resultado
+
+    def _medir(self, consulta, repeticiones):
+        activas = Convocatoria.objects.filter(activa=True)
+        anterior = activas.filter(
+            Q(nombre__icontains=consulta) |
+            Q(deporte__icontains=consulta) |
+            Q(descripcion__icontains=consulta)
+        )
+        params = {'kword': consulta}
+
+        ms_todo, filas = self._tiempo(lambda: len(list(anterior.all())), repeticiones)
+        ms_pagina, _ = self._tiempo(lambda: len(list(anterior[:20])), repeticiones)
+        ms_indice, pagina = self._tiempo(
+            lambda: pagina_de_resultados(activas, params)[0],
+            repeticiones
+        )
+        self.stdout.write(
+            f"{consulta!r:22} icontains todo {ms_todo:8.1f} ms ({filas} filas) | "
+            f"icontains 20 {ms_pagina:8.1f} ms | índice 20 {ms_indice:8.1f} ms ({len(pagina)} filas)"
+        )
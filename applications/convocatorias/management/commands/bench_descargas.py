@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from applications.convocatorias import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Lanza N descargas simultáneas de PDF contra las vistas async y reporta "
+        "cuántas se sirven, cuántas se rechazan con 503 (pool saturado) y cuánto "
+        "se alenta el filtro durante el pico. Todo se revierte al terminar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000)
+        parser.add_argument('--descargas', type=int, default=200)
+        parser.add_argument('--distintas', type=int, default=20, help="Convocatorias distintas entre las descargas")
+        parser.add_argument('--repeticiones', type=int, default=20, help="Peticiones al filtro en reposo y durante el pico")
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--sin-imagenes', action='store_true')
+
+    def handle(self, *args, **options):
+        benchmarks.ejecutar_descargas(
+            filas=options['filas'],
+            descargas=options['descargas'],
+            distintas=options['distintas'],
+            repeticiones=options['repeticiones'],
+            semilla=options['semilla'],
+            con_imagenes=not options['sin_imagenes'],
+            avisar=self.stdout.write,
+        )
@@ -0,0 +1,91 @@
+import csv
+import io
+import random
+import time
+from datetime import date, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from applications.convocatorias.forms import ConvocatoriaForm
+from applications.convocatorias.importacion import importar, leer_filas
+
+DEPORTES = ['Fútbol', 'Básquetbol', 'Voleibol', 'Béisbol', 'Atletismo', 'Natación']
+COLUMNAS = [
+    'nombre', 'deporte', 'categoria', 'rama', 'estado', 'descripcion', 'fecha_inicio_torneo',
+    'fecha_limite_inscripcion', 'costo_inscripcion', 'lugar_inscripcion', 'requisitos',
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara importar N convocatorias con importacion.importar() contra N "
+        "guardados de ConvocatoriaForm. Todo se revierte al terminar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=500)
+        parser.add_argument('--semilla', type=int, default=42)
+
+    def handle(self, *args, **options):
+        filas = self._filas(options['filas'], random.Random(options['semilla']))
+        csv_bytes = self._csv(filas)
+
+        ms_formularios, consultas_formularios = self._medir(lambda: self._formularios(filas))
+        ms_importar, consultas_importar = self._medir(
+            lambda: importar(leer_filas(io.BytesIO(csv_bytes), 'bench.csv'))
+        )
+        self.stdout.write(
+            f"{len(filas)} filas | formularios {ms_formularios:9.1f} ms ({consultas_formularios} consultas) | "
+            f"importar {ms_importar:9.1f} ms ({consultas_importar} consultas) | "
+            f"{ms_formularios / ms_importar:.1f}x"
+        )
+
+    def _filas(self, cantidad, azar):
+        hoy = date.today()
+        return [
+            {
+                'nombre': f"Liga {azar.choice(DEPORTES)} {numero}",
+                'deporte': azar.choice(DEPORTES),
+                'categoria': azar.choice(['Libre', 'Juvenil', 'Veteranos']),
+                'rama': azar.choice(['Femenil', 'Varonil', 'Mixta']),
+                'estado': 'Abierta',
+                'descripcion': "Torneo municipal de la temporada " * azar.randint(1, 5),
+                'fecha_inicio_torneo': (hoy + timedelta(days=azar.randint(10, 90))).isoformat(),
+                'fecha_limite_inscripcion': (hoy + timedelta(days=azar.randint(1, 9))).isoformat(),
+                'costo_inscripcion': str(azar.choice([0, 150, 300, 500])),
+                'lugar_inscripcion': "Unidad deportiva",
+                'requisitos': "Credencial vigente",
+            }
+            for numero in range(cantidad)
+        ]
+
+    def _csv(self, filas):
+        salida = io.StringIO()
+        escritor = csv.DictWriter(salida, fieldnames=COLUMNAS)
+        escritor.writeheader()
+        escritor.writerows(filas)
+        return salida.getvalue().encode()
+
+    def _formularios(self, filas):
+        # Lo que se hace hoy: un POST del formulario por convocatoria
+        for fila in filas:
+            form = ConvocatoriaForm({
+                **fila,
+                'institucion_responsable': "Instituto Municipal de Cultura Física y Deporte",
+                'created_at': timezone.now(),
+                'activa': True,
+            })
+            if not form.is_valid():
+                raise ValueError(form.errors)
+            form.save()
+
+    def _medir(self, funcion):
+        with transaction.atomic(), CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            funcion()
+            ms = (time.perf_counter() - inicio) * 1000
+            transaction.set_rollback(True)
+        return ms, len(consultas)
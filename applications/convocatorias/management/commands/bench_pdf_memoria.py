@@ -0,0 +1,116 @@
+import multiprocessing
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from django.http import FileResponse, HttpResponse
+
+from applications.convocatorias.models import Convocatoria
+from applications.convocatorias.pdf import construir_pdf, construir_pdf_temporal
+from applications.convocatorias.procesos import inicializar_worker
+
+
+def _convocatoria_larga(parrafos, logo=None):
+    texto = "Lorem ipsum dolor sit amet, consectetur adipiscing elit. " * 40
+    return Convocatoria(
+        logo_ayuntamiento=logo,
+        nombre="Liga de prueba",
+        deporte="Futbol",
+        categoria='Libre',
+        rama='Mixta',
+        fecha_inicio_torneo=date.today(),
+        fecha_limite_inscripcion=date.today(),
+        descripcion="<br/><br/>".join([texto] * parrafos),
+        requisitos="<br/>".join([texto] * (parrafos // 2 or 1)),
+        sistema_competencia=texto,
+    )
+
+
+def _descarga_antes(convocatoria):
+    # Camino anterior: BytesIO + getvalue() + copia dentro de HttpResponse
+    buffer = BytesIO()
+    construir_pdf(convocatoria, buffer)
+    pdf = buffer.getvalue()
+    buffer.close()
+    response = HttpResponse(content_type='application/pdf')
+    response.write(pdf)
+    return sum(len(bloque) for bloque in response)
+
+
+def _descarga_despues(convocatoria):
+    # Camino actual: SpooledTemporaryFile entregado por bloques con FileResponse
+    response = FileResponse(construir_pdf_temporal(convocatoria), content_type='application/pdf')
+    try:
+        return sum(len(bloque) for bloque in response.streaming_content)
+    finally:
+        response.close()
+
+
+def _imagen_de_prueba(ancho, alto):
+    """JPEG con ruido (no comprime), del tamaño de una foto de teléfono"""
+    from PIL import Image as PILImage
+
+    imagen = PILImage.frombytes('RGB', (ancho, alto), os.urandom(ancho * alto * 3))
+    salida = BytesIO()
+    imagen.save(salida, format='JPEG', quality=90)
+    return default_storage.save('convocatorias/logos/bench_pdf_memoria.jpg', ContentFile(salida.getvalue()))
+
+
+def _medir(variante, parrafos, repeticiones, logo):
+    """Se ejecuta en un proceso nuevo para que ru_maxrss parta de cero"""
+    descargar = {'antes': _descarga_antes, 'despues': _descarga_despues}[variante]
+
+    # Calentamiento: fuentes y módulos de ReportLab ya cargados
+    construir_pdf(_convocatoria_larga(1), BytesIO())
+    convocatoria = _convocatoria_larga(parrafos, logo)
+
+    rss_inicial = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        tamano = descargar(convocatoria)
+    segundos = (time.perf_counter() - inicio) / repeticiones
+    rss_final = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    # ru_maxrss está en KB en Linux
+    return {
+        'tamano': tamano,
+        'segundos': segundos,
+        'rss_extra_kb': rss_final - rss_inicial,
+    }
+
+
+class Command(BaseCommand):
+    help = "Compara el pico de memoria por descarga de PDF entre el camino anterior (BytesIO) y el actual (streaming)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parrafos', type=int, default=5, help="Párrafos largos en la descripción")
+        parser.add_argument('--repeticiones', type=int, default=1)
+        parser.add_argument('--imagen', default='3000x2000', help="Logo JPEG ANCHOxALTO a incrustar, o 'no'")
+
+    def handle(self, *args, **options):
+        logo = None
+        if options['imagen'] != 'no':
+            ancho, alto = (int(valor) for valor in options['imagen'].split('x'))
+            logo = _imagen_de_prueba(ancho, alto)
+
+        contexto = multiprocessing.get_context('spawn')
+        try:
+            for variante in ('antes', 'despues'):
+                with ProcessPoolExecutor(max_workers=1, mp_context=contexto, initializer=inicializar_worker) as pool:
+                    resultado = pool.submit(
+                        _medir, variante, options['parrafos'], options['repeticiones'], logo
+                    ).result()
+                self.stdout.write(
+                    f"{variante:8} PDF {resultado['tamano'] // 1024} KB | "
+                    f"{resultado['segundos']:.2f} s | "
+                    f"RSS máximo extra {resultado['rss_extra_kb']} KB"
+                )
+        finally:
+            if logo:
+                default_storage.delete(logo)
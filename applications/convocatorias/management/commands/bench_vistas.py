@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.convocatorias import benchmarks
+
+
+class Command(BaseCommand):
+    help = (
+        "Genera N convocatorias sintéticas y mide cada vista (p50/p95, consultas, "
+        "memoria pico) con el cliente de pruebas. Falla si hay regresiones contra "
+        "la línea base guardada. Todo se revierte al terminar"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=1000, help="1000, 10000, 100000...")
+        parser.add_argument('--repeticiones', type=int, default=20)
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--sin-imagenes', action='store_true')
+        parser.add_argument('--base', default=benchmarks.BASE, help="JSON de la línea base")
+        parser.add_argument('--tolerancia', type=float, default=benchmarks.TOLERANCIA)
+        parser.add_argument(
+            '--guardar-base', action='store_true',
+            help="Guarda los resultados como línea base de este número de filas (en la misma máquina que compara)"
+        )
+
+    def handle(self, *args, **options):
+        filas = options['filas']
+        resultados = benchmarks.ejecutar(
+            filas,
+            repeticiones=options['repeticiones'],
+            semilla=options['semilla'],
+            con_imagenes=not options['sin_imagenes'],
+            avisar=self.stdout.write,
+        )
+
+        if options['guardar_base']:
+            benchmarks.guardar_base(filas, resultados, options['base'])
+            self.stdout.write(self.style.SUCCESS(f"Línea base de {filas} filas guardada en {options['base']}"))
+            return
+
+        base = benchmarks.cargar_base(options['base']).get(str(filas))
+        if base is None:
+            self.stdout.write(self.style.WARNING(f"No hay línea base de {filas} filas; usa --guardar-base"))
+            return
+
+        regresiones = benchmarks.comparar(resultados, base, options['tolerancia'])
+        if regresiones:
+            raise CommandError("Regresiones contra la línea base:\n" + '\n'.join(regresiones))
+        self.stdout.write(self.style.SUCCESS("Sin regresiones contra la línea base"))
@@ -0,0 +1,48 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from applications.convocatorias.filtros import filtrar_convocatorias
+from applications.convocatorias.models import Convocatoria
+from applications.convocatorias.procesos import inicializar_worker
+from applications.convocatorias.tareas import ConstruccionesPDF
+from applications.convocatorias.zip_pdf import generar_zip
+
+
+class Command(BaseCommand):
+    help = "Escribe en un ZIP los PDF de las convocatorias activas que cumplan los filtros"
+
+    def add_arguments(self, parser):
+        parser.add_argument('salida', help="Ruta del archivo ZIP")
+        parser.add_argument('--deporte')
+        parser.add_argument('--categoria')
+        parser.add_argument('--estado')
+        parser.add_argument('--desde', help="Fecha de inicio mínima (AAAA-MM-DD)")
+        parser.add_argument('--hasta', help="Fecha de inicio máxima (AAAA-MM-DD)")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Número de procesos")
+
+    def handle(self, *args, **options):
+        params = {
+            campo: options[campo] or ''
+            for campo in ('deporte', 'categoria', 'estado', 'desde', 'hasta')
+        }
+        convocatorias = filtrar_convocatorias(Convocatoria.objects.activas(), params)
+        lista = list(convocatorias.order_by('-created_at').values_list('id', 'nombre'))
+
+        # Los procesos hijos no deben heredar la conexión abierta
+        connections.close_all()
+
+        total = 0
+        ventana = 2 * options['workers']
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=inicializar_worker) as pool:
+            construcciones = ConstruccionesPDF(ventana, pool)
+            with open(options['salida'], 'wb') as salida:
+                for bloque in generar_zip(lista, Convocatoria.objects.activas(), ventana, construcciones):
+                    salida.write(bloque)
+                    total += len(bloque)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{len(lista)} convocatorias exportadas a {options['salida']} ({total} bytes)"
+        ))
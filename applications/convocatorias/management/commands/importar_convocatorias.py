@@ -0,0 +1,36 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.convocatorias.importacion import TAMANO_LOTE, ImportacionInvalida, importar, leer_filas
+
+
+class Command(BaseCommand):
+    help = (
+        "Importa convocatorias desde un CSV o XLSX cuyos encabezados son los "
+        "nombres de los campos. Si alguna fila tiene errores no se guarda nada"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help="Filas por INSERT")
+        parser.add_argument('--omitir-errores', action='store_true', help="Guarda las filas válidas aunque otras fallen")
+        parser.add_argument('--simular', action='store_true', help="Solo valida, no guarda")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                resultado = importar(
+                    leer_filas(archivo, options['archivo']),
+                    tamano_lote=options['lote'],
+                    omitir_errores=options['omitir_errores'],
+                    simular=options['simular']
+                )
+        except (OSError, ImportacionInvalida) as exc:
+            raise CommandError(exc)
+
+        for fila, errores in resultado['errores']:
+            for campo, mensajes in errores.items():
+                self.stderr.write(f"Fila {fila}, {campo}: {' '.join(mensajes)}")
+        self.stdout.write(
+            f"{resultado['filas']} filas, {len(resultado['errores'])} con errores, "
+            f"{resultado['creadas']} convocatorias creadas"
+        )
@@ -0,0 +1,43 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from applications.convocatorias import subidas
+from applications.convocatorias.huerfanos import directorios, eliminar, huerfanos
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra los logos, fondos y rendiciones que ya no referencia ninguna "
+        "convocatoria (p. ej. imágenes reemplazadas al editar), los carteles "
+        "que ya no corresponden a una convocatoria activa y las subidas por partes abandonadas"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--simular', action='store_true', help="Solo informa lo que se borraría")
+        parser.add_argument('--hilos', type=int, default=1, help="Borrados en paralelo")
+        parser.add_argument(
+            '--edad-minima', type=float, default=24,
+            help="Horas: los archivos más nuevos no se tocan (guardados en curso)"
+        )
+
+    def handle(self, *args, **options):
+        candidatos = huerfanos(timedelta(hours=options['edad_minima']))
+        self.stdout.write(f"Revisando {', '.join(directorios())}")
+
+        if options['simular']:
+            archivos = liberados = 0
+            for ruta, tamano in candidatos:
+                self.stdout.write(f"  {ruta} ({tamano / 1024:.0f} KB)")
+                archivos += 1
+                liberados += tamano
+        else:
+            archivos, liberados = eliminar(candidatos, options['hilos'])
+
+        subidas_archivos, subidas_bytes = subidas.limpiar(simular=options['simular'])
+
+        accion = "se borrarían" if options['simular'] else "borradas"
+        self.stdout.write(self.style.SUCCESS(
+            f"Imágenes huérfanas {accion}: {archivos} ({liberados / 1024 / 1024:.1f} MB); "
+            f"subidas abandonadas: {subidas_archivos} ({subidas_bytes / 1024 / 1024:.1f} MB)"
+        ))
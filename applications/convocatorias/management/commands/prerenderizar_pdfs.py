@@ -0,0 +1,49 @@
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from applications.convocatorias.models import Convocatoria
+from applications.convocatorias.procesos import inicializar_worker
+from applications.convocatorias.tareas import renderizar_pdf
+
+
+def _renderizar(convocatoria_id, forzar):
+    try:
+        return convocatoria_id, renderizar_pdf(convocatoria_id, forzar=forzar), None
+    except Exception as exc:
+        return convocatoria_id, False, str(exc)
+    finally:
+        connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Genera en paralelo los PDF pendientes (o todos con --forzar) y los deja en la caché"
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Convocatorias a renderizar (por defecto todas las activas)")
+        parser.add_argument('--forzar', action='store_true', help="Vuelve a renderizar aunque el PDF ya esté en caché")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1, help="Número de procesos")
+
+    def handle(self, *args, **options):
+        convocatorias = Convocatoria.objects.activas()
+        if options['ids']:
+            convocatorias = convocatorias.filter(pk__in=options['ids'])
+        ids = list(convocatorias.values_list('pk', flat=True))
+
+        # Los procesos hijos no deben heredar la conexión abierta
+        connections.close_all()
+
+        errores = 0
+        with ProcessPoolExecutor(max_workers=options['workers'], initializer=inicializar_worker) as pool:
+            futuros = [pool.submit(_renderizar, pk, options['forzar']) for pk in ids]
+            for futuro in as_completed(futuros):
+                pk, ok, error = futuro.result()
+                if error:
+                    errores += 1
+                    self.stderr.write(f"Convocatoria {pk}: {error}")
+                elif ok:
+                    self.stdout.write(f"Convocatoria {pk}: PDF listo")
+
+        self.stdout.write(self.style.SUCCESS(f"{len(ids) - errores} de {len(ids)} PDF generados"))
@@ -0,0 +1,28 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from applications.convocatorias.imagenes import CAMPOS_IMAGEN, procesar_imagenes
+from applications.convocatorias.models import Convocatoria
+
+
+class Command(BaseCommand):
+    help = "Genera las rendiciones que falten de las imágenes (p. ej. de convocatorias anteriores a las rendiciones)"
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help="Convocatorias a procesar (por defecto todas con imagen)")
+
+    def handle(self, *args, **options):
+        con_imagen = Q()
+        for campo in CAMPOS_IMAGEN:
+            con_imagen |= Q(**{f'{campo}__gt': ''})
+        convocatorias = Convocatoria.objects.filter(con_imagen)
+        if options['ids']:
+            convocatorias = convocatorias.filter(pk__in=options['ids'])
+
+        ids = list(convocatorias.values_list('pk', flat=True))
+        for pk in ids:
+            try:
+                procesar_imagenes(pk)
+            except Exception as exc:
+                self.stderr.write(f"Convocatoria {pk}: {exc}")
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} convocatorias revisadas"))
@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from applications.convocatorias.eliminacion import purgar
+
+
+class Command(BaseCommand):
+    help = (
+        "Borra las convocatorias dadas de baja hace más de --dias (por defecto "
+        "CONVOCATORIAS_PURGA_DIAS, 30) junto con sus imágenes y rendiciones "
+        "que ya no use otra convocatoria. Pensado para ejecutarse con cron"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, help="Días desde la baja")
+        parser.add_argument('--lote', type=int, default=200, help="Convocatorias por transacción")
+        parser.add_argument('--simular', action='store_true', help="Solo informa lo que se borraría")
+
+    def handle(self, *args, **options):
+        convocatorias = archivos = liberados = 0
+        for filas, borrados, tamano in purgar(options['dias'], options['lote'], options['simular']):
+            convocatorias += filas
+            archivos += borrados
+            liberados += tamano
+            self.stdout.write(f"Lote: {filas} convocatorias, {borrados} archivos, {tamano / 1024 / 1024:.1f} MB")
+
+        accion = "se borrarían" if options['simular'] else "borradas"
+        self.stdout.write(self.style.SUCCESS(
+            f"{convocatorias} convocatorias {accion}, {archivos} archivos, "
+            f"{liberados / 1024 / 1024:.1f} MB liberados"
+        ))
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from applications.convocatorias.busqueda import CAMPOS_INDEXADOS, indexar
+from applications.convocatorias.models import Convocatoria
+
+
+class Command(BaseCommand):
+    help = "Reconstruye el índice de términos de búsqueda de todas las convocatorias"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lote', type=int, default=500, help="Convocatorias por transacción")
+
+    def handle(self, *args, **options):
+        campos = ['pk'] + [campo for campo, _peso in CAMPOS_INDEXADOS]
+        ids = list(Convocatoria.objects.order_by('pk').values_list('pk', flat=True))
+
+        for inicio in range(0, len(ids), options['lote']):
+            lote = ids[inicio:inicio + options['lote']]
+            with transaction.atomic():
+                indexar(Convocatoria.objects.filter(pk__in=lote).only(*campos))
+
+        self.stdout.write(self.style.SUCCESS(f"{len(ids)} convocatorias indexadas"))
@@ -0,0 +1,185 @@
+#metricas.py
+# Métricas por petición de las vistas de convocatorias: número y tiempo de
+# consultas SQL, tiempo de plantillas, tiempo de construcción de PDF y bytes
+# de la respuesta. Se activan por entorno con:
+#
+#     CONVOCATORIAS_METRICAS = True
+#     MIDDLEWARE += ['applications.convocatorias.middleware.MetricasMiddleware']
+#     # Opcional, para medir las plantillas:
+#     TEMPLATES[0]['BACKEND'] = 'applications.convocatorias.metricas.PlantillasMedidas'
+#
+# Cada respuesta lleva un encabezado Server-Timing y los histogramas se
+# publican en formato Prometheus en metricas/. Son por proceso: con varios
+# workers cada uno expone los suyos
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.template.backends.django import DjangoTemplates
+
+from . import fragmentos
+
+_medicion = ContextVar('convocatorias_medicion', default=None)
+
+
+def habilitadas():
+    return getattr(settings, 'CONVOCATORIAS_METRICAS', False)
+
+
+# ==================== MEDICIÓN DE LA PETICIÓN ====================
+class Medicion:
+    """Lo acumulado durante una petición"""
+
+    __slots__ = ('consultas', 'segundos')
+
+    def __init__(self):
+        self.consultas = 0
+        self.segundos = {}  # 'sql', 'plantilla', 'pdf', 'cartel'
+
+    def sumar(self, nombre, segundos):
+        self.segundos[nombre] = self.segundos.get(nombre, 0.0) + segundos
+
+    def server_timing(self, total):
+        partes = []
+        for nombre, segundos in self.segundos.items():
+            descripcion = f';desc="{self.consultas} consultas"' if nombre == 'sql' else ''
+            partes.append(f"{nombre};dur={segundos * 1000:.1f}{descripcion}")
+        partes.append(f"total;dur={total * 1000:.1f}")
+        return ', '.join(partes)
+
+
+def iniciar():
+    """Empieza a medir la petición actual; devuelve (medición, token para terminar())"""
+    medicion = Medicion()
+    return medicion, _medicion.set(medicion)
+
+
+def terminar(token):
+    _medicion.reset(token)
+
+
+@contextmanager
+def medir(nombre):
+    """Suma a `nombre` el tiempo del bloque si hay una petición midiéndose"""
+    medicion = _medicion.get()
+    if medicion is None:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        medicion.sumar(nombre, time.perf_counter() - inicio)
+
+
+def registrar_sql(execute, sql, params, many, context):
+    """execute_wrapper de la conexión: cuenta y cronometra cada consulta"""
+    medicion = _medicion.get()
+    if medicion is None:
+        return execute(sql, params, many, context)
+    inicio = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        medicion.consultas += 1
+        medicion.sumar('sql', time.perf_counter() - inicio)
+
+
+# ==================== PLANTILLAS ====================
+class _PlantillaMedida:
+    def __init__(self, plantilla):
+        self.plantilla = plantilla
+        self.origin = plantilla.origin
+        self.template = plantilla.template
+
+    def render(self, context=None, request=None):
+        with medir('plantilla'):
+            return self.plantilla.render(context, request)
+
+
+class PlantillasMedidas(DjangoTemplates):
+    """
+    Backend de plantillas de Django que mide el renderizado de cada plantilla
+    principal (los include y extends quedan dentro de su tiempo)
+    """
+
+    def from_string(self, template_code):
+        return _PlantillaMedida(super().from_string(template_code))
+
+    def get_template(self, template_name):
+        return _PlantillaMedida(super().get_template(template_name))
+
+
+# ==================== HISTOGRAMAS ====================
+SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+CONSULTAS = (1, 2, 5, 10, 20, 50, 100)
+BYTES = (1024, 10 * 1024, 100 * 1024, 1024 ** 2, 10 * 1024 ** 2, 100 * 1024 ** 2)
+
+
+class Histograma:
+    """Histograma con la etiqueta `vista`, en formato de exposición de Prometheus"""
+
+    def __init__(self, nombre, ayuda, limites):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.limites = limites
+        self._series = {}  # vista -> [conteo por cubeta..., +Inf], suma
+        self._lock = threading.Lock()
+
+    def observar(self, vista, valor):
+        cubeta = bisect_left(self.limites, valor)
+        with self._lock:
+            conteos, suma = self._series.get(vista) or ([0] * (len(self.limites) + 1), 0)
+            conteos[cubeta] += 1
+            self._series[vista] = conteos, suma + valor
+
+    def exponer(self):
+        lineas = [f"# HELP {self.nombre} {self.ayuda}", f"# TYPE {self.nombre} histogram"]
+        with self._lock:
+            series = {vista: (list(conteos), suma) for vista, (conteos, suma) in self._series.items()}
+        for vista, (conteos, suma) in sorted(series.items()):
+            acumulado = 0
+            for limite, conteo in zip(self.limites + ('+Inf',), conteos):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{{vista="{vista}",le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{{vista="{vista}"}} {suma:g}')
+            lineas.append(f'{self.nombre}_count{{vista="{vista}"}} {acumulado}')
+        return lineas
+
+
+PETICION = Histograma('convocatorias_peticion_segundos', "Duración de la petición", SEGUNDOS)
+SQL = Histograma('convocatorias_sql_segundos', "Tiempo en consultas SQL por petición", SEGUNDOS)
+SQL_CONSULTAS = Histograma('convocatorias_sql_consultas', "Consultas SQL por petición", CONSULTAS)
+PLANTILLA = Histograma('convocatorias_plantilla_segundos', "Tiempo de renderizado de plantillas", SEGUNDOS)
+PDF = Histograma('convocatorias_pdf_segundos', "Tiempo de construcción de PDF (ReportLab)", SEGUNDOS)
+CARTEL = Histograma('convocatorias_cartel_segundos', "Tiempo de composición de carteles", SEGUNDOS)
+RESPUESTA = Histograma('convocatorias_respuesta_bytes', "Bytes de la respuesta", BYTES)
+
+
+def observar(vista, medicion, total):
+    PETICION.observar(vista, total)
+    SQL.observar(vista, medicion.segundos.get('sql', 0.0))
+    SQL_CONSULTAS.observar(vista, medicion.consultas)
+    if 'plantilla' in medicion.segundos:
+        PLANTILLA.observar(vista, medicion.segundos['plantilla'])
+    if 'pdf' in medicion.segundos:
+        PDF.observar(vista, medicion.segundos['pdf'])
+    if 'cartel' in medicion.segundos:
+        CARTEL.observar(vista, medicion.segundos['cartel'])
+
+
+def exponer():
+    """Texto para el endpoint de Prometheus"""
+    lineas = []
+    for histograma in (PETICION, SQL, SQL_CONSULTAS, PLANTILLA, PDF, CARTEL, RESPUESTA):
+        lineas += histograma.exponer()
+
+    cache = fragmentos.estadisticas()['cache']
+    if cache:
+        for nombre in ('aciertos', 'fallos', 'desalojos'):
+            lineas.append(f"# TYPE convocatorias_fragmentos_{nombre}_total counter")
+            lineas.append(f"convocatorias_fragmentos_{nombre}_total {cache[nombre]}")
+    return '\n'.join(lineas) + '\n'
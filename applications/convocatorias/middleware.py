@@ -0,0 +1,85 @@
+#middleware.py
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.core.exceptions import MiddlewareNotUsed
+
+from . import metricas
+
+
+class MetricasMiddleware:
+    """
+    Mide las peticiones a las vistas de convocatorias (ver metricas.py). Si
+    CONVOCATORIAS_METRICAS está apagado Django lo descarta al arrancar y no
+    agrega ningún costo. Funciona igual bajo WSGI y ASGI. Las consultas las
+    cuenta registrar_sql, que signals.py deja puesto en cada conexión
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not metricas.habilitadas():
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        medicion, token = metricas.iniciar()
+        inicio = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metricas.terminar(token)
+        return self._observar(request, response, medicion, time.perf_counter() - inicio)
+
+    async def __acall__(self, request):
+        medicion, token = metricas.iniciar()
+        inicio = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metricas.terminar(token)
+        return self._observar(request, response, medicion, time.perf_counter() - inicio)
+
+    def _observar(self, request, response, medicion, total):
+        vista = getattr(request.resolver_match, 'view_name', '') or ''
+        if not vista.startswith('convocatorias:') or vista == 'convocatorias:metricas':
+            return response
+
+        response['Server-Timing'] = medicion.server_timing(total)
+        metricas.observar(vista, medicion, total)
+        if not response.streaming:
+            metricas.RESPUESTA.observar(vista, len(response.content))
+        elif response.has_header('Content-Length'):
+            # FileResponse: se conserva el envío directo del archivo
+            metricas.RESPUESTA.observar(vista, int(response['Content-Length']))
+        elif response.is_async:
+            response.streaming_content = self._acontar(vista, response.streaming_content)
+        else:
+            response.streaming_content = self._contar(vista, response.streaming_content)
+        return response
+
+    @staticmethod
+    def _contar(vista, contenido):
+        # Los bytes de un StreamingHttpResponse se conocen al terminar de enviarlo
+        enviados = 0
+        try:
+            for bloque in contenido:
+                enviados += len(bloque)
+                yield bloque
+        finally:
+            metricas.RESPUESTA.observar(vista, enviados)
+
+    @staticmethod
+    async def _acontar(vista, contenido):
+        enviados = 0
+        try:
+            async for bloque in contenido:
+                enviados += len(bloque)
+                yield bloque
+        finally:
+            metricas.RESPUESTA.observar(vista, enviados)
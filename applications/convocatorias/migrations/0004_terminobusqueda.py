@@ -0,0 +1,43 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:26
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from applications.convocatorias.busqueda import CAMPOS_INDEXADOS, terminos_de
+
+
+def indexar_existentes(apps, schema_editor):
+    Convocatoria = apps.get_model('convocatorias', 'Convocatoria')
+    TerminoBusqueda = apps.get_model('convocatorias', 'TerminoBusqueda')
+    campos = [campo for campo, _peso in CAMPOS_INDEXADOS]
+    TerminoBusqueda.objects.bulk_create([
+        TerminoBusqueda(convocatoria_id=valores['pk'], termino=termino, peso=peso)
+        for valores in Convocatoria.objects.values('pk', *campos).iterator()
+        for termino, peso in terminos_de(valores).items()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('convocatorias', '0003_alter_convocatoria_options_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TerminoBusqueda',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('termino', models.CharField(max_length=64)),
+                ('peso', models.PositiveSmallIntegerField(default=1)),
+                ('convocatoria', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='terminos', to='convocatorias.convocatoria')),
+            ],
+            options={
+                'verbose_name': 'Término de búsqueda',
+                'verbose_name_plural': 'Términos de búsqueda',
+                'indexes': [models.Index(fields=['termino', 'convocatoria', 'peso'], name='termino_busqueda_idx')],
+                'constraints': [models.UniqueConstraint(fields=('convocatoria', 'termino'), name='convocatoria_termino_unico')],
+            },
+        ),
+        migrations.RunPython(indexar_existentes, migrations.RunPython.noop),
+    ]
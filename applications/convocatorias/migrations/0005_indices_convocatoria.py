@@ -0,0 +1,42 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:55
+
+import django.db.models.functions.text
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('convocatorias', '0004_terminobusqueda'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['-fecha_inicio_torneo', '-id'], name='convocatoria_activa_inicio_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['-created_at'], name='convocatoria_activa_creada_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(django.db.models.functions.text.Lower('deporte'), models.F('fecha_inicio_torneo'), condition=models.Q(('activa', True)), name='convocatoria_deporte_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(django.db.models.functions.text.Lower('categoria'), models.F('fecha_inicio_torneo'), condition=models.Q(('activa', True)), name='convocatoria_categoria_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(django.db.models.functions.text.Lower('estado'), models.F('fecha_inicio_torneo'), condition=models.Q(('activa', True)), name='convocatoria_estado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(django.db.models.functions.text.Lower('nombre'), name='convocatoria_nombre_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(condition=models.Q(('activa', True)), fields=['deporte', 'categoria', 'estado'], name='convocatoria_facetas_idx'),
+        ),
+    ]
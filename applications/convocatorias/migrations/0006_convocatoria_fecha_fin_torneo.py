@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('convocatorias', '0005_indices_convocatoria'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='convocatoria',
+            name='fecha_fin_torneo',
+            field=models.DateField(blank=True, help_text='Fecha de término del torneo; después de ella la convocatoria pasa a Finalizada', null=True),
+        ),
+    ]
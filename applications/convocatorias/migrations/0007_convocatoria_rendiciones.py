@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 13:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('convocatorias', '0006_convocatoria_fecha_fin_torneo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='convocatoria',
+            name='rendiciones',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 5.2.18 on 2026-10-18 15:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('convocatorias', '0007_convocatoria_rendiciones'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='convocatoria',
+            name='eliminada_en',
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='convocatoria',
+            index=models.Index(condition=models.Q(('activa', False)), fields=['eliminada_en'], name='convocatoria_eliminada_idx'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-18 18:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('convocatorias', '0008_convocatoria_eliminada_en'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='convocatoria',
+            name='convocatoria_nombre_idx',
+        ),
+    ]
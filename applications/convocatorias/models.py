@@ -1,9 +1,45 @@
 from django.db import models
+from django.db.models import Q
+from django.db.models.functions import Lower
 from django.utils import timezone
 from django.core.validators import FileExtensionValidator
 from datetime import date
 
 
+class ConvocatoriaQuerySet(models.QuerySet):
+    """
+    Consultas de uso común. Los listados usan una proyección con nombre:
+    solo se leen las columnas que muestra su plantilla, sin los TextField
+    """
+
+    # updated_at forma parte de la llave de los fragmentos en caché (fragmentos.py)
+    PROYECCIONES = {
+        # edit.html
+        'edicion': ('id', 'nombre', 'updated_at'),
+        # seleccionar_pdf.html
+        'pdf': ('id', 'nombre', 'deporte', 'categoria', 'updated_at'),
+        # filtro.html (+ fecha_inicio_torneo para el cursor de la paginación)
+        'filtro': ('id', 'nombre', 'deporte', 'estado', 'fecha_inicio_torneo', 'updated_at'),
+    }
+
+    def activas(self):
+        return self.filter(activa=True)
+
+    def abiertas(self, hoy=None):
+        """
+        Convocatorias en periodo de inscripción (lo mismo que esta_abierta(),
+        pero resuelto en la base de datos)
+        """
+        return self.filter(
+            estado='Abierta',
+            fecha_limite_inscripcion__gte=hoy or timezone.localdate()
+        )
+
+    def proyeccion(self, nombre):
+        """Limita las columnas a las de la proyección `nombre` (ver PROYECCIONES)"""
+        return self.only(*self.PROYECCIONES[nombre])
+
+
 class Convocatoria(models.Model):
     # Imágenes
     logo_ayuntamiento = models.ImageField(
@@ -21,6 +57,10 @@ class Convocatoria(models.Model):
         validators=[FileExtensionValidator(['png', 'jpg', 'jpeg'])],
         help_text="Imagen de fondo de la convocatoria"
     )
+
+    # Versiones reducidas de las imágenes (ver imagenes.py), por campo:
+    # {'logo_ayuntamiento': {'original': ..., 'hash': ..., 'miniatura': ruta, ...}}
+    rendiciones = models.JSONField(default=dict, blank=True, editable=False)
     
     # Información básica
     nombre = models.CharField(max_length=200, help_text="Nombre de la liga/torneo")
@@ -37,6 +77,11 @@ class Convocatoria(models.Model):
     help_text="Fecha límite para inscripciones",
     default=date.today  # <-- valor por defecto
     )
+    fecha_fin_torneo = models.DateField(
+        blank=True,
+        null=True,
+        help_text="Fecha de término del torneo; después de ella la convocatoria pasa a Finalizada"
+    )
     fecha_reunion_previa = models.DateField(blank=True, null=True, help_text="Fecha de reunión previa")
     hora_reunion_previa = models.TimeField(blank=True, null=True)
     
@@ -111,17 +156,75 @@ class Convocatoria(models.Model):
     created_at = models.DateTimeField(default=timezone.now)
     updated_at = models.DateTimeField(auto_now=True)
     activa = models.BooleanField(default=True)
+    # Fecha de la baja lógica (activa=False); purgar_convocatorias borra las antiguas
+    eliminada_en = models.DateTimeField(blank=True, null=True, editable=False)
+
+    objects = ConvocatoriaQuerySet.as_manager()
     
     class Meta:
         verbose_name = "Convocatoria"
         verbose_name_plural = "Convocatorias"
         ordering = ['-fecha_inicio_torneo']
+        # Rutas de acceso de los listados: siempre activa=True, ordenadas por
+        # fecha de inicio (o de creación en PDF), y los filtros sin mayúsculas.
+        # Son índices parciales porque Django escribe activa=True como
+        # WHERE "activa", que no puede buscarse en un índice compuesto
+        indexes = [
+            models.Index(
+                fields=['-fecha_inicio_torneo', '-id'], condition=Q(activa=True),
+                name='convocatoria_activa_inicio_idx'
+            ),
+            models.Index(fields=['-created_at'], condition=Q(activa=True), name='convocatoria_activa_creada_idx'),
+            models.Index(
+                Lower('deporte'), 'fecha_inicio_torneo', condition=Q(activa=True),
+                name='convocatoria_deporte_idx'
+            ),
+            models.Index(
+                Lower('categoria'), 'fecha_inicio_torneo', condition=Q(activa=True),
+                name='convocatoria_categoria_idx'
+            ),
+            models.Index(
+                Lower('estado'), 'fecha_inicio_torneo', condition=Q(activa=True),
+                name='convocatoria_estado_idx'
+            ),
+            # Cubre el conteo de facetas del filtro sin leer la tabla
+            models.Index(
+                fields=['deporte', 'categoria', 'estado'], condition=Q(activa=True),
+                name='convocatoria_facetas_idx'
+            ),
+            # Solo las dadas de baja: las que revisa la purga
+            models.Index(fields=['eliminada_en'], condition=Q(activa=False), name='convocatoria_eliminada_idx'),
+        ]
     
     def __str__(self):
         return f"{self.nombre} - {self.deporte} ({self.categoria} - {self.rama})"
     
     def esta_abierta(self):
         """Verifica si la convocatoria está en periodo de inscripción"""
-        from django.utils import timezone
-        hoy = timezone.now().date()
-        return self.estado == 'Abierta' and hoy <= self.fecha_limite_inscripcion
\ No newline at end of file
+        hoy = timezone.localdate()
+        return self.estado == 'Abierta' and hoy <= self.fecha_limite_inscripcion
+
+
+class TerminoBusqueda(models.Model):
+    """
+    Índice invertido para la búsqueda de convocatorias: un renglón por cada
+    término normalizado (minúsculas, sin acentos) que aparece en nombre,
+    deporte o descripción. Se mantiene al guardar la convocatoria
+    """
+    convocatoria = models.ForeignKey(Convocatoria, on_delete=models.CASCADE, related_name='terminos')
+    termino = models.CharField(max_length=64)
+    peso = models.PositiveSmallIntegerField(default=1)
+
+    class Meta:
+        verbose_name = "Término de búsqueda"
+        verbose_name_plural = "Términos de búsqueda"
+        constraints = [
+            models.UniqueConstraint(fields=['convocatoria', 'termino'], name='convocatoria_termino_unico'),
+        ]
+        # Índice que cubre la consulta de búsqueda: se resuelve sin leer la tabla
+        indexes = [
+            models.Index(fields=['termino', 'convocatoria', 'peso'], name='termino_busqueda_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.termino} ({self.convocatoria_id})"
@@ -0,0 +1,103 @@
+#paginacion.py
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+
+
+# ==================== PAGINACIÓN POR CURSOR ====================
+def codificar_cursor(valores):
+    texto = json.dumps(valores, default=str, separators=(',', ':'))
+    return base64.urlsafe_b64encode(texto.encode()).decode().rstrip('=')
+
+
+def decodificar_cursor(cursor):
+    """Lista de valores del cursor, o None si el cursor no es válido"""
+    try:
+        relleno = '=' * (-len(cursor) % 4)
+        valores = json.loads(base64.urlsafe_b64decode(cursor + relleno))
+    except (ValueError, TypeError):
+        return None
+    return valores if isinstance(valores, list) else None
+
+
+def _campo(queryset, nombre):
+    anotacion = queryset.query.annotations.get(nombre)
+    if anotacion is not None:
+        return anotacion.output_field
+    return queryset.model._meta.get_field(nombre)
+
+
+def _valores_validos(queryset, orden, valores):
+    """
+    Valores del cursor convertidos al tipo de cada campo de `orden`, o None
+    si no corresponden (cursor alterado o de otro orden): un cursor así se
+    trata como si no hubiera cursor
+    """
+    if not isinstance(valores, list) or len(valores) != len(orden):
+        return None
+    convertidos = []
+    for campo, valor in zip(orden, valores):
+        if valor is None or isinstance(valor, (list, dict)):
+            return None
+        try:
+            convertidos.append(_campo(queryset, campo.lstrip('-')).to_python(valor))
+        except (ValidationError, TypeError, ValueError):
+            return None
+    return convertidos
+
+
+def _despues_de(orden, valores):
+    """
+    Condición "viene después de `valores`" para el orden dado, p. ej. para
+    ['-fecha', '-id']: fecha < f OR (fecha = f AND id < i)
+    """
+    condicion = Q()
+    for i, campo in enumerate(orden):
+        nombre = campo.lstrip('-')
+        operador = 'lt' if campo.startswith('-') else 'gt'
+        rama = Q(**{f'{nombre}__{operador}': valores[i]})
+        for anterior, valor in zip(orden[:i], valores[:i]):
+            rama &= Q(**{anterior.lstrip('-'): valor})
+        condicion |= rama
+    return condicion
+
+
+def _valor(fila, campo):
+    nombre = campo.lstrip('-')
+    return fila[nombre] if isinstance(fila, dict) else getattr(fila, nombre)
+
+
+def _ordenar(queryset, orden, cursor):
+    queryset = queryset.order_by(*orden)
+    valores = _valores_validos(queryset, orden, decodificar_cursor(cursor)) if cursor else None
+    if valores:
+        queryset = queryset.filter(_despues_de(orden, valores))
+    return queryset
+
+
+def _pagina(elementos, orden, tamano):
+    # Se leyó un elemento de más solo para saber si hay página siguiente
+    siguiente = None
+    if len(elementos) > tamano:
+        elementos = elementos[:tamano]
+        siguiente = codificar_cursor([_valor(elementos[-1], campo) for campo in orden])
+    return elementos, siguiente
+
+
+def paginar(queryset, orden, cursor=None, tamano=20):
+    """
+    Paginación por llave (keyset): en lugar de OFFSET se filtra por los
+    valores de `orden` del último elemento de la página anterior, así el
+    costo no crece con el número de página. El último campo de `orden`
+    debe ser único (normalmente el id). Devuelve (elementos, siguiente_cursor)
+    """
+    queryset = _ordenar(queryset, orden, cursor)
+    return _pagina(list(queryset[:tamano + 1]), orden, tamano)
+
+
+async def apaginar(queryset, orden, cursor=None, tamano=20):
+    """paginar() con el ORM asíncrono, para las vistas async"""
+    queryset = _ordenar(queryset, orden, cursor)
+    return _pagina([elemento async for elemento in queryset[:tamano + 1]], orden, tamano)
@@ -0,0 +1,218 @@
+#pdf.py
+from reportlab.lib.pagesizes import letter
+from reportlab.lib import colors
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import inch
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
+from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
+from functools import lru_cache
+from io import BytesIO
+from xml.sax.saxutils import escape
+import os
+import tempfile
+
+from django.core.files.storage import default_storage
+
+from .cache import clave_pdf, obtener_backend
+from .documento import documento
+from .imagenes import RENDICIONES, codificar, reducir, ruta_rendicion
+from .metricas import medir
+
+# Tamaño a partir del cual el PDF en construcción se escribe a disco
+PDF_MEMORIA_MAXIMA = 1024 * 1024
+
+
+# ==================== ESTILOS ====================
+# Se construyen una sola vez por proceso y se reutilizan en cada PDF
+def _crear_estilos():
+    styles = getSampleStyleSheet()
+    return {
+        'titulo': ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            textColor=colors.HexColor('#1a5490'),
+            alignment=TA_CENTER,
+            spaceAfter=12
+        ),
+        'subtitulo': ParagraphStyle(
+            'CustomSubtitle',
+            parent=styles['Heading2'],
+            fontSize=12,
+            textColor=colors.HexColor('#2c5aa0'),
+            spaceAfter=10
+        ),
+        'normal': ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=10,
+            alignment=TA_JUSTIFY,
+            spaceAfter=6
+        ),
+    }
+
+
+ESTILOS = _crear_estilos()
+
+ESTILO_TABLA_INFO = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e6f2ff')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+    ('TOPPADDING', (0, 0), (-1, -1), 4),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
+])
+
+ESTILO_TABLA_INSCRIPCION = TableStyle([
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+    ('LEFTPADDING', (0, 0), (-1, -1), 6),
+])
+
+
+# ==================== LOGO ====================
+# Tamaño del logo embebido: el de la rendición 'pdf'
+LOGO_MAXIMO = RENDICIONES['pdf'].tamano
+
+
+@lru_cache(maxsize=32)
+def _logo_reducido(ruta, mtime):
+    """
+    Logo reducido a LOGO_MAXIMO, ya codificado para el PDF. Se usa mientras
+    no existe la rendición 'pdf'. `mtime` forma parte de la llave para
+    detectar cambios en el archivo
+    """
+    datos, _extension = codificar(reducir(ruta, LOGO_MAXIMO), 'pdf')
+    return datos
+
+
+def logo_para_pdf(campo):
+    """Archivo en memoria con el logo reducido, o None si no se puede leer"""
+    try:
+        rendicion = ruta_rendicion(campo, 'pdf')
+        if rendicion:
+            with default_storage.open(rendicion, 'rb') as archivo:
+                return BytesIO(archivo.read())
+        ruta = campo.path
+        datos = _logo_reducido(ruta, os.stat(ruta).st_mtime_ns)
+    except Exception:
+        return None
+    return BytesIO(datos)
+
+
+# ==================== DIBUJO DEL PDF ====================
+# El contenido sale del documento compartido (documento.py); aquí solo se
+# decide cómo se ve cada tipo de sección
+def _parrafo(texto):
+    # Paragraph interpreta marcado: el texto del usuario se escapa
+    return escape(str(texto))
+
+
+def _logo(documento):
+    if not documento.logo:
+        return []
+    logo = logo_para_pdf(documento.logo)
+    if logo is None:
+        return []
+    img = Image(logo, width=2*inch, height=1*inch)
+    img.hAlign = 'CENTER'
+    return [img, Spacer(1, 0.2*inch)]
+
+
+def _encabezado(documento):
+    institucion = Paragraph(f"<b>{_parrafo(documento.institucion)}</b>", ESTILOS['normal'])
+    institucion.hAlign = 'CENTER'
+    return [
+        Paragraph(f"<b>CONVOCATORIA</b><br/>{_parrafo(documento.nombre.upper())}", ESTILOS['titulo']),
+        Spacer(1, 0.2*inch),
+        institucion,
+        Spacer(1, 0.3*inch),
+    ]
+
+
+def _datos(seccion):
+    # La tabla sin título es la de información general
+    if seccion.titulo is None:
+        anchos, estilo, espacio = [2.5*inch, 4*inch], ESTILO_TABLA_INFO, 0.2
+    else:
+        anchos, estilo, espacio = [2*inch, 4.5*inch], ESTILO_TABLA_INSCRIPCION, 0.15
+    tabla = Table([[f"{etiqueta}:", valor] for etiqueta, valor in seccion.elementos], colWidths=anchos)
+    tabla.setStyle(estilo)
+    return [tabla, Spacer(1, espacio*inch)]
+
+
+def _texto(seccion):
+    return [Paragraph(_parrafo(parrafo), ESTILOS['normal']) for parrafo in seccion.elementos]
+
+
+def _lista(seccion):
+    return [
+        Paragraph(f"<b>{_parrafo(etiqueta)}:</b> {_parrafo(valor)}", ESTILOS['normal'])
+        for etiqueta, valor in seccion.elementos
+    ]
+
+
+DIBUJAR = {'datos': _datos, 'texto': _texto, 'lista': _lista}
+
+
+def flowables(documento):
+    elementos = _logo(documento) + _encabezado(documento)
+    for seccion in documento.secciones:
+        if seccion.titulo:
+            elementos.append(Paragraph(f"<b>{_parrafo(seccion.titulo.upper())}</b>", ESTILOS['subtitulo']))
+        elementos += DIBUJAR[seccion.tipo](seccion)
+        if seccion.tipo != 'datos':
+            elementos.append(Spacer(1, 0.15*inch))
+    return elementos
+
+
+# ==================== CONSTRUIR PDF ====================
+def construir_pdf(convocatoria, destino):
+    """
+    Escribe en `destino` (archivo binario) el PDF con el formato oficial
+    de la convocatoria
+    """
+    doc = SimpleDocTemplate(destino, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
+
+    with medir('pdf'):
+        doc.build(flowables(documento(convocatoria)))
+
+
+# ==================== PDF EN CACHÉ ====================
+def construir_pdf_temporal(convocatoria):
+    """
+    Construye el PDF en un SpooledTemporaryFile: se queda en memoria
+    mientras es pequeño y pasa a disco al superar PDF_MEMORIA_MAXIMA.
+    Se devuelve posicionado al inicio
+    """
+    temporal = tempfile.SpooledTemporaryFile(max_size=PDF_MEMORIA_MAXIMA)
+    construir_pdf(convocatoria, temporal)
+    temporal.seek(0)
+    return temporal
+
+
+def obtener_pdf(convocatoria, forzar=False):
+    """
+    Devuelve un archivo binario abierto con el PDF de la convocatoria.
+    Si no está en la caché (o `forzar`), lo construye y lo guarda
+    """
+    backend = obtener_backend()
+    clave = clave_pdf(convocatoria)
+
+    if not forzar:
+        pdf = backend.abrir(clave)
+        if pdf is not None:
+            return pdf
+
+    pdf = construir_pdf_temporal(convocatoria)
+    backend.guardar(clave, pdf)
+    pdf.seek(0)
+    return pdf
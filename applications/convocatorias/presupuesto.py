@@ -0,0 +1,224 @@
+#presupuesto.py
+# Presupuesto de consultas por vista. Cada vista de views.py declara el
+# máximo de consultas que puede hacer, sin importar cuántas filas muestre:
+#
+#     @presupuesto(2)
+#     def filtro(request): ...
+#
+# Un ciclo (en la vista o en la plantilla) que consulta una vez por fila,
+# el clásico N+1, lo rebasa en cuanto hay más filas que presupuesto. El
+# modo se elige con CONVOCATORIAS_PRESUPUESTO:
+#
+#     'apagado'    no se cuenta nada (por defecto sin DEBUG)
+#     'registrar'  aviso en el log con la vista y el número de consultas
+#     'depurar'    además, las consultas repetidas y la pila (código y
+#                  plantilla) de cada consulta de más (por defecto con DEBUG)
+#     'estricto'   como 'depurar', pero lanza PresupuestoExcedido
+#
+# Las respuestas en streaming consultan después de que la vista regresa;
+# esas consultas no cuentan
+import logging
+import sys
+import sysconfig
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction
+from django.conf import settings
+from django.template.base import Node
+
+logger = logging.getLogger(__name__)
+
+MODOS = ('apagado', 'registrar', 'depurar', 'estricto')
+
+# Líneas de pila por consulta de más en el reporte
+PILA_MAXIMA = 8
+
+_consumo = ContextVar('convocatorias_presupuesto', default=None)
+
+# Código de Python y de paquetes instalados: no se muestra en la pila
+_AJENOS = ('<frozen',) + tuple({sysconfig.get_path(nombre) for nombre in ('stdlib', 'platstdlib', 'purelib', 'platlib')})
+
+
+class PresupuestoExcedido(Exception):
+    pass
+
+
+def modo():
+    valor = getattr(settings, 'CONVOCATORIAS_PRESUPUESTO', None)
+    if valor is None:
+        return 'depurar' if settings.DEBUG else 'apagado'
+    if valor not in MODOS:
+        raise ValueError(f"CONVOCATORIAS_PRESUPUESTO debe ser uno de {MODOS}, no {valor!r}")
+    return valor
+
+
+# ==================== CONTEO ====================
+class Consumo:
+    """Consultas de una petición contra el presupuesto de su vista"""
+
+    __slots__ = ('vista', 'maximo', 'consultas', 'depurar', 'sql', 'pilas', 'en_lotes')
+
+    def __init__(self, vista, maximo, depurar=False):
+        self.vista = vista
+        self.maximo = maximo
+        self.consultas = 0
+        self.depurar = depurar
+        self.sql = []  # en modo depurar: el SQL de cada consulta, en orden
+        self.pilas = {}  # SQL -> pila de su primera consulta de más
+        self.en_lotes = 0
+
+    @property
+    def excedido(self):
+        return self.consultas > self.maximo
+
+    def contar(self, sql):
+        self.consultas += 1
+        if not self.depurar:
+            return
+        self.sql.append(sql)
+        if self.excedido and sql not in self.pilas:
+            self.pilas[sql] = _pila()
+
+    def reporte(self):
+        lineas = [f"{self.vista}: {self.consultas} consultas, presupuesto {self.maximo}"]
+        if self.en_lotes:
+            lineas[0] += f" (más {self.en_lotes} en lotes)"
+        # Lo repetido es casi siempre el N+1: una consulta por fila
+        for sql, veces in Counter(self.sql).most_common():
+            if sql not in self.pilas:
+                continue
+            lineas.append(f"  {veces} x {sql[:300]}")
+            lineas += [f"      {linea}" for linea in self.pilas[sql]]
+        return '\n'.join(lineas)
+
+
+def _pila():
+    """
+    De dónde salió la consulta: las líneas de código propio y los nodos de
+    plantilla ({{ variable }} o {% etiqueta %}) que llevan a ella, del más
+    externo al más interno
+    """
+    lineas = []
+    marco = sys._getframe(2)
+    while marco is not None:
+        nodo = marco.f_locals.get('self')
+        if isinstance(nodo, Node) and nodo.origin is not None and getattr(nodo, 'token', None) is not None:
+            linea = f"{nodo.origin.template_name or nodo.origin.name}:{nodo.token.lineno} {nodo.token.contents[:80]}"
+        elif marco.f_code.co_filename != __file__ and not marco.f_code.co_filename.startswith(_AJENOS):
+            linea = f"{marco.f_code.co_filename}:{marco.f_lineno} en {marco.f_code.co_name}"
+        else:
+            linea = None
+        if linea and (not lineas or lineas[-1] != linea):
+            lineas.append(linea)
+        marco = marco.f_back
+    return lineas[:PILA_MAXIMA][::-1]
+
+
+def contar_sql(execute, sql, params, many, context):
+    """
+    execute_wrapper de la conexión (signals.py lo deja puesto en cada una):
+    cuenta la consulta si hay una vista con presupuesto en curso
+    """
+    consumo = _consumo.get()
+    if consumo is not None:
+        consumo.contar(sql)
+    return execute(sql, params, many, context)
+
+
+@contextmanager
+def por_lotes():
+    """
+    Las consultas del bloque no cuentan contra el presupuesto: trabajo por
+    lotes (bulk_create) que crece con el archivo, no con un ciclo por fila
+    """
+    consumo = _consumo.get()
+    if consumo is None:
+        yield
+        return
+    antes = consumo.consultas
+    try:
+        yield
+    finally:
+        excluidas = consumo.consultas - antes
+        consumo.consultas = antes
+        consumo.en_lotes += excluidas
+
+
+# ==================== DECORADOR ====================
+def _iniciar(vista, maximo, actual):
+    consumo = Consumo(vista.__name__, maximo, depurar=actual in ('depurar', 'estricto'))
+    return consumo, _consumo.set(consumo)
+
+
+def _terminar(consumo, actual, response):
+    if consumo.excedido:
+        if actual == 'estricto':
+            raise PresupuestoExcedido(consumo.reporte())
+        logger.warning("Presupuesto de consultas excedido en %s", consumo.reporte())
+    # Para assertPresupuesto()
+    response.consumo_consultas = consumo
+    return response
+
+
+def presupuesto(maximo):
+    """
+    Declara el máximo de consultas de la vista (sync o async), incluidas
+    las de su plantilla
+    """
+    def decorador(vista):
+        if iscoroutinefunction(vista):
+            @wraps(vista)
+            async def envuelta(request, *args, **kwargs):
+                actual = modo()
+                if actual == 'apagado':
+                    return await vista(request, *args, **kwargs)
+                consumo, token = _iniciar(vista, maximo, actual)
+                try:
+                    response = await vista(request, *args, **kwargs)
+                finally:
+                    _consumo.reset(token)
+                return _terminar(consumo, actual, response)
+        else:
+            @wraps(vista)
+            def envuelta(request, *args, **kwargs):
+                actual = modo()
+                if actual == 'apagado':
+                    return vista(request, *args, **kwargs)
+                consumo, token = _iniciar(vista, maximo, actual)
+                try:
+                    response = vista(request, *args, **kwargs)
+                finally:
+                    _consumo.reset(token)
+                return _terminar(consumo, actual, response)
+
+        envuelta.presupuesto_consultas = maximo
+        return envuelta
+    return decorador
+
+
+# ==================== PRUEBAS ====================
+class PresupuestoMixin:
+    """
+    Para los TestCase: mide las vistas en modo 'depurar' y
+    assertPresupuesto(response) falla con el reporte (consultas repetidas
+    y su pila) si la vista rebasó su presupuesto
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        from django.test.utils import override_settings
+
+        super().setUpClass()
+        ajuste = override_settings(CONVOCATORIAS_PRESUPUESTO='depurar')
+        ajuste.enable()
+        cls.addClassCleanup(ajuste.disable)
+
+    def assertPresupuesto(self, response):
+        consumo = getattr(response, 'consumo_consultas', None)
+        if consumo is None:
+            self.fail("La respuesta no viene de una vista con @presupuesto")
+        if consumo.excedido:
+            self.fail(consumo.reporte())
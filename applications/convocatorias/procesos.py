@@ -0,0 +1,26 @@
+#procesos.py
+# Sin importar modelos a nivel de módulo: con el método "spawn" este
+# módulo se carga en el proceso hijo antes de configurar Django
+import django
+
+# Conexiones heredadas del proceso padre con "fork"
+_heredadas = []
+
+
+def inicializar_worker():
+    """
+    Inicializador para ProcessPoolExecutor: configura Django en el proceso
+    hijo y descarta las conexiones a la base heredadas del padre
+    """
+    django.setup()
+
+    from django.db import connections
+
+    # Comparten el socket del padre: no se deben usar, y cerrarlas también
+    # le cerraría la sesión al padre (PostgreSQL y MySQL envían el cierre
+    # por el socket). Se guardan sin cerrar para que el recolector no las
+    # finalice; si el hijo llega a consultar, Django abre una conexión nueva
+    for conexion in connections.all(initialized_only=True):
+        if conexion.connection is not None:
+            _heredadas.append(conexion.connection)
+            conexion.connection = None
@@ -0,0 +1,88 @@
+#signals.py
+from django.core.signals import request_started, setting_changed
+from django.db import connections, transaction
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from . import busqueda, cache, facetas, imagenes, metricas, presupuesto, tareas
+from .models import Convocatoria
+
+
+# ==================== CACHÉ DE PDF ====================
+@receiver(post_save, sender=Convocatoria)
+@receiver(post_delete, sender=Convocatoria)
+def invalidar_pdf(sender, instance, **kwargs):
+    """Descarta los PDF en caché de la convocatoria guardada o eliminada"""
+    cache.obtener_backend().invalidar(instance.pk)
+
+
+@receiver(post_save, sender=Convocatoria)
+def prerenderizar_pdf(sender, instance, raw=False, **kwargs):
+    """Encola el PDF nuevo para que la primera descarga ya lo encuentre hecho"""
+    if raw:
+        return
+    pk = instance.pk
+    transaction.on_commit(lambda: tareas.encolar_pdf(pk))
+
+
+@receiver(setting_changed)
+def reiniciar_backend_pdf(setting, **kwargs):
+    if setting == 'CONVOCATORIAS_PDF_CACHE':
+        cache._backend = None
+
+
+# ==================== ÍNDICE DE BÚSQUEDA ====================
+@receiver(post_save, sender=Convocatoria)
+def indexar_busqueda(sender, instance, raw=False, **kwargs):
+    """Mantiene los términos de búsqueda al día con el registro guardado"""
+    if raw:
+        return
+    busqueda.indexar([instance])
+
+
+# ==================== FACETAS DEL FILTRO ====================
+@receiver(post_save, sender=Convocatoria)
+@receiver(post_delete, sender=Convocatoria)
+def invalidar_facetas(sender, instance, **kwargs):
+    """Los conteos del filtro cambian con cualquier escritura"""
+    facetas.invalidar()
+
+
+# ==================== RENDICIONES DE IMÁGENES ====================
+@receiver(post_save, sender=Convocatoria)
+def procesar_imagenes(sender, instance, raw=False, **kwargs):
+    """Genera fuera de la petición las versiones reducidas de las imágenes nuevas"""
+    if raw:
+        return
+    actuales = {campo: getattr(instance, campo).name or None for campo in imagenes.CAMPOS_IMAGEN}
+    procesadas = {campo: datos.get('original') for campo, datos in (instance.rendiciones or {}).items()}
+    if any(actuales[campo] != procesadas.get(campo) for campo in imagenes.CAMPOS_IMAGEN):
+        pk = instance.pk
+        transaction.on_commit(lambda: tareas.encolar_imagenes(pk))
+
+
+# ==================== CONSULTAS ====================
+# execute_wrappers del presupuesto de consultas y de las métricas. No hacen
+# nada fuera de una vista medida, así que se quedan puestos en cada conexión
+ENVOLTURAS = (presupuesto.contar_sql, metricas.registrar_sql)
+
+
+def envolver(conexion):
+    for envoltura in ENVOLTURAS:
+        if envoltura not in conexion.execute_wrappers:
+            conexion.execute_wrappers.append(envoltura)
+
+
+# Las vistas async consultan desde el hilo de sync_to_async, con sus propias
+# conexiones. request_started se envía desde ese hilo y connection_created
+# cubre las que se abren después
+@receiver(request_started)
+def envolver_conexiones(sender, **kwargs):
+    for conexion in connections.all(initialized_only=True):
+        envolver(conexion)
+
+
+@receiver(connection_created)
+def envolver_conexion(sender, connection, **kwargs):
+    envolver(connection)
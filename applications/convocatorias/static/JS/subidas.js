@@ -0,0 +1,113 @@
+// subidas.js
+// Sube por partes las imágenes de los <input type="file" data-subida="...">.
+// Al terminar, el id de la subida va en el campo oculto <nombre>_subida y el
+// archivo ya no se envía con el formulario. Si la conexión falla se reanuda
+// desde el último byte recibido, incluso después de recargar la página.
+(function () {
+    const REINTENTOS = 5;
+
+    function csrf(formulario) {
+        const campo = formulario.querySelector('input[name="csrfmiddlewaretoken"]');
+        return campo ? campo.value : '';
+    }
+
+    function esperar(ms) {
+        return new Promise(resolve => setTimeout(resolve, ms));
+    }
+
+    async function pedir(url, opciones) {
+        const respuesta = await fetch(url, opciones);
+        const datos = await respuesta.json().catch(() => ({}));
+        return { respuesta, datos };
+    }
+
+    async function estadoPrevio(url, clave) {
+        const id = localStorage.getItem(clave);
+        if (!id) return null;
+        const { respuesta, datos } = await pedir(`${url}${id}/`);
+        if (respuesta.ok) return datos;
+        localStorage.removeItem(clave);
+        return null;
+    }
+
+    async function subir(input, avisar) {
+        const archivo = input.files[0];
+        const formulario = input.form;
+        const url = input.dataset.subida;
+        const token = csrf(formulario);
+        const clave = `subida:${input.name}:${archivo.name}:${archivo.size}:${archivo.lastModified}`;
+
+        let estado = await estadoPrevio(url, clave);
+        let bloque = 1024 * 1024;
+        if (!estado) {
+            const cuerpo = new FormData();
+            cuerpo.append('nombre', archivo.name);
+            cuerpo.append('tamano', archivo.size);
+            const { respuesta, datos } = await pedir(url, {
+                method: 'POST', body: cuerpo, headers: { 'X-CSRFToken': token }
+            });
+            if (!respuesta.ok) throw new Error(datos.error || 'No se pudo iniciar la subida');
+            estado = datos;
+            bloque = datos.bloque;
+            localStorage.setItem(clave, estado.id);
+        }
+
+        let fallos = 0;
+        while (!estado.completa) {
+            const inicio = estado.recibido;
+            const fin = Math.min(inicio + bloque, archivo.size) - 1;
+            avisar(`Subiendo ${Math.floor(inicio * 100 / archivo.size)}%`);
+            try {
+                const { respuesta, datos } = await pedir(`${url}${estado.id}/`, {
+                    method: 'PUT',
+                    body: archivo.slice(inicio, fin + 1),
+                    headers: {
+                        'Content-Range': `bytes ${inicio}-${fin}/${archivo.size}`,
+                        'X-CSRFToken': token
+                    }
+                });
+                if (respuesta.status === 409) {
+                    estado.recibido = datos.recibido;
+                    continue;
+                }
+                if (!respuesta.ok) throw new Error(datos.error || 'Error en la subida');
+                estado = datos;
+                fallos = 0;
+            } catch (error) {
+                if (++fallos > REINTENTOS) throw error;
+                await esperar(500 * 2 ** fallos);
+                // Lo que el servidor alcanzó a guardar no se vuelve a enviar
+                const { respuesta, datos } = await pedir(`${url}${estado.id}/`).catch(() => ({}));
+                if (respuesta && respuesta.ok) estado = datos;
+            }
+        }
+
+        localStorage.removeItem(clave);
+        return estado.id;
+    }
+
+    document.querySelectorAll('input[type="file"][data-subida]').forEach(input => {
+        const oculto = input.form.querySelector(`input[name="${input.name}_subida"]`);
+        const aviso = document.createElement('small');
+        input.after(aviso);
+        const nombre = input.name;
+
+        input.addEventListener('change', async () => {
+            if (!input.files.length || !oculto) return;
+            oculto.value = '';
+            input.name = nombre;
+            const botones = input.form.querySelectorAll('button[type="submit"]');
+            botones.forEach(boton => boton.disabled = true);
+            try {
+                oculto.value = await subir(input, texto => aviso.textContent = texto);
+                // El archivo ya está en el servidor: el formulario solo manda el id
+                input.removeAttribute('name');
+                aviso.textContent = 'Imagen lista';
+            } catch (error) {
+                aviso.textContent = `${error.message}. Se enviará junto con el formulario`;
+            } finally {
+                botones.forEach(boton => boton.disabled = false);
+            }
+        });
+    });
+})();
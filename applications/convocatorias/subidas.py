@@ -0,0 +1,237 @@
+#subidas.py
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows: los bloques solo se serializan dentro del proceso
+    fcntl = None
+
+from django.conf import settings
+from django.core.files import File
+from PIL import Image as PILImage
+
+# Tamaño de bloque que se sugiere al cliente (menor que
+# DATA_UPLOAD_MAX_MEMORY_SIZE aunque el bloque nunca se lee completo)
+TAMANO_BLOQUE = 1024 * 1024
+
+EXTENSIONES = ('png', 'jpg', 'jpeg')
+
+
+class SubidaInvalida(Exception):
+    pass
+
+
+class DesfaseSubida(Exception):
+    """El bloque no empieza donde termina lo ya recibido"""
+
+    def __init__(self, recibido):
+        super().__init__(f"Se esperaba el byte {recibido}")
+        self.recibido = recibido
+
+
+# ==================== ALMACENAMIENTO TEMPORAL ====================
+def _directorio():
+    directorio = getattr(
+        settings, 'CONVOCATORIAS_SUBIDAS_DIR',
+        os.path.join(tempfile.gettempdir(), 'convocatorias_subidas')
+    )
+    os.makedirs(directorio, exist_ok=True)
+    return directorio
+
+
+def _tamano_maximo():
+    return getattr(settings, 'CONVOCATORIAS_SUBIDA_MAXIMA', 25 * 1024 * 1024)
+
+
+def _rutas(subida_id):
+    # El id siempre es un uuid: no puede salir del directorio
+    subida_id = uuid.UUID(str(subida_id)).hex
+    base = os.path.join(_directorio(), subida_id)
+    return base + '.json', base + '.part'
+
+
+def _leer(subida_id):
+    try:
+        ruta_meta, ruta_datos = _rutas(subida_id)
+        with open(ruta_meta) as archivo:
+            meta = json.load(archivo)
+        meta['recibido'] = os.path.getsize(ruta_datos)
+    except (ValueError, OSError):
+        return None
+    return meta
+
+
+def _escribir(subida_id, meta):
+    ruta_meta, _ruta_datos = _rutas(subida_id)
+    temporal = f"{ruta_meta}.tmp"
+    with open(temporal, 'w') as archivo:
+        json.dump({clave: valor for clave, valor in meta.items() if clave != 'recibido'}, archivo)
+    os.replace(temporal, ruta_meta)
+
+
+_lock_local = threading.Lock()
+
+
+@contextmanager
+def _abrir_bloqueado(subida_id):
+    """
+    Archivo de datos de la subida abierto para agregar, con un candado
+    exclusivo (flock) que también serializa a los otros procesos del
+    servidor. SubidaInvalida si la subida ya no existe
+    """
+    _ruta_meta, ruta_datos = _rutas(subida_id)
+    try:
+        # Sin O_CREAT: una subida expirada no se vuelve a crear
+        descriptor = os.open(ruta_datos, os.O_WRONLY | os.O_APPEND)
+    except FileNotFoundError:
+        raise SubidaInvalida("La subida no existe o ya expiró")
+    with open(descriptor, 'ab') as destino:
+        if fcntl is None:
+            with _lock_local:
+                yield destino
+        else:
+            fcntl.flock(destino, fcntl.LOCK_EX)
+            yield destino
+
+
+def _limpiar_a_veces():
+    # limpiar() recorre todo el directorio: se corre en una fracción de las
+    # subidas nuevas (y siempre en limpiar_media)
+    if random.random() < getattr(settings, 'CONVOCATORIAS_SUBIDAS_LIMPIEZA', 0.01):
+        limpiar()
+
+
+# ==================== SUBIDAS ====================
+def iniciar(nombre, tamano):
+    """Registra una subida nueva y devuelve su estado"""
+    nombre = os.path.basename(nombre or '')
+    if os.path.splitext(nombre)[1][1:].lower() not in EXTENSIONES:
+        raise SubidaInvalida(f"Solo se aceptan imágenes {', '.join(EXTENSIONES)}")
+    if tamano <= 0 or tamano > _tamano_maximo():
+        raise SubidaInvalida(f"El archivo debe pesar entre 1 byte y {_tamano_maximo() // (1024 * 1024)} MB")
+
+    _limpiar_a_veces()
+    subida_id = str(uuid.uuid4())
+    _ruta_meta, ruta_datos = _rutas(subida_id)
+    open(ruta_datos, 'wb').close()
+    meta = {'id': subida_id, 'nombre': nombre, 'tamano': tamano, 'completa': False, 'creada': time.time()}
+    _escribir(subida_id, meta)
+    return estado(subida_id)
+
+
+def estado(subida_id):
+    """{'id', 'nombre', 'tamano', 'recibido', 'completa'} o None si no existe"""
+    meta = _leer(subida_id)
+    if meta is None:
+        return None
+    return {clave: meta[clave] for clave in ('id', 'nombre', 'tamano', 'recibido', 'completa')}
+
+
+def agregar(subida_id, inicio, origen, longitud):
+    """
+    Agrega al archivo `longitud` bytes leídos de `origen` (el request) a
+    partir del byte `inicio`. Se escribe conforme llegan: si la conexión se
+    corta, lo recibido se conserva y el cliente continúa desde ahí
+    """
+    with _abrir_bloqueado(subida_id) as destino:
+        meta = _leer(subida_id)
+        if meta is None:
+            raise SubidaInvalida("La subida no existe o ya expiró")
+        if meta['completa']:
+            return estado(subida_id)
+        if inicio != meta['recibido']:
+            raise DesfaseSubida(meta['recibido'])
+        if longitud <= 0 or inicio + longitud > meta['tamano']:
+            raise SubidaInvalida("El bloque excede el tamaño declarado")
+
+        pendiente = longitud
+        while pendiente:
+            bloque = origen.read(min(64 * 1024, pendiente))
+            if not bloque:
+                break
+            destino.write(bloque)
+            pendiente -= len(bloque)
+        destino.flush()
+
+        _ruta_meta, ruta_datos = _rutas(subida_id)
+        if os.path.getsize(ruta_datos) == meta['tamano']:
+            _completar(subida_id, meta, ruta_datos)
+    return estado(subida_id)
+
+
+def _completar(subida_id, meta, ruta_datos):
+    try:
+        with PILImage.open(ruta_datos) as imagen:
+            imagen.verify()
+    except Exception:
+        eliminar(subida_id)
+        raise SubidaInvalida("El archivo no es una imagen válida")
+    meta['completa'] = True
+    _escribir(subida_id, meta)
+
+
+def guardar(archivo):
+    """
+    Registra como subida completa un archivo ya validado (p. ej. la imagen
+    de un formulario) y devuelve su id
+    """
+    _limpiar_a_veces()
+    subida_id = str(uuid.uuid4())
+    _ruta_meta, ruta_datos = _rutas(subida_id)
+    with open(ruta_datos, 'wb') as destino:
+        for bloque in archivo.chunks():
+            destino.write(bloque)
+    tamano = os.path.getsize(ruta_datos)
+    nombre = os.path.basename(archivo.name)
+    _escribir(subida_id, {'id': subida_id, 'nombre': nombre, 'tamano': tamano, 'completa': True, 'creada': time.time()})
+    return subida_id
+
+
+def abrir(subida_id):
+    """
+    File de Django con el archivo ya armado, listo para asignarse a un
+    ImageField, o None si la subida no existe o no está completa
+    """
+    meta = _leer(subida_id)
+    if meta is None or not meta['completa']:
+        return None
+    _ruta_meta, ruta_datos = _rutas(subida_id)
+    return File(open(ruta_datos, 'rb'), name=meta['nombre'])
+
+
+def eliminar(subida_id):
+    for ruta in _rutas(subida_id):
+        try:
+            os.remove(ruta)
+        except FileNotFoundError:
+            pass
+
+
+def limpiar(edad_maxima=None, simular=False):
+    """
+    Borra las subidas abandonadas (por defecto, de más de un día). Devuelve
+    (archivos, bytes) borrados, o que se borrarían con `simular`
+    """
+    if edad_maxima is None:
+        edad_maxima = getattr(settings, 'CONVOCATORIAS_SUBIDA_EXPIRACION', 24 * 60 * 60)
+    limite = time.time() - edad_maxima
+    archivos = liberados = 0
+    with os.scandir(_directorio()) as entradas:
+        for entrada in entradas:
+            try:
+                stat = entrada.stat()
+                if stat.st_mtime < limite:
+                    if not simular:
+                        os.remove(entrada.path)
+                    archivos += 1
+                    liberados += stat.st_size
+            except FileNotFoundError:
+                pass
+    return archivos, liberados
@@ -0,0 +1,313 @@
+#tareas.py
+import asyncio
+import logging
+import os
+import threading
+import time
+import tempfile
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+from .imagenes import procesar_imagenes
+from .models import Convocatoria
+from .cache import obtener_backend
+from .pdf import construir_pdf, obtener_pdf
+from .procesos import inicializar_worker
+
+logger = logging.getLogger(__name__)
+
+# Estados de una tarea de renderizado
+PENDIENTE = 'pendiente'
+PROCESANDO = 'procesando'
+LISTO = 'listo'
+ERROR = 'error'
+
+
+# ==================== RENDERIZADO ====================
+def renderizar_pdf(convocatoria_id, forzar=False, reintentos=None, espera=None):
+    """
+    Deja en la caché el PDF de la convocatoria, reintentando con espera
+    exponencial si falla. Devuelve False si la convocatoria ya no existe
+    """
+    if reintentos is None:
+        reintentos = getattr(settings, 'CONVOCATORIAS_PDF_REINTENTOS', 3)
+    if espera is None:
+        espera = getattr(settings, 'CONVOCATORIAS_PDF_ESPERA_REINTENTO', 0.5)
+
+    intento = 0
+    while True:
+        try:
+            convocatoria = Convocatoria.objects.get(pk=convocatoria_id)
+        except Convocatoria.DoesNotExist:
+            return False
+        try:
+            obtener_pdf(convocatoria, forzar=forzar).close()
+            return True
+        except Exception:
+            intento += 1
+            if intento > reintentos:
+                raise
+            logger.warning("Reintentando PDF de la convocatoria %s (intento %s)", convocatoria_id, intento, exc_info=True)
+            time.sleep(espera * 2 ** (intento - 1))
+
+
+# ==================== POOL DE PROCESOS ====================
+# Los procesos del pool no consultan la base: reciben la convocatoria ya
+# leída (ver pdf_de)
+_pool_procesos = None
+_pool_lock = threading.Lock()
+
+
+def procesos_pdf():
+    return getattr(settings, 'CONVOCATORIAS_PDF_PROCESOS', os.cpu_count() or 1)
+
+
+def obtener_pool_procesos():
+    """Pool de procesos compartido para construir PDF"""
+    global _pool_procesos
+    with _pool_lock:
+        if _pool_procesos is None:
+            _pool_procesos = ProcessPoolExecutor(max_workers=procesos_pdf(), initializer=inicializar_worker)
+        return _pool_procesos
+
+
+# ==================== PDF SIN BLOQUEAR ====================
+class PoolSaturado(Exception):
+    pass
+
+
+def pdf_de(convocatoria):
+    """
+    Construye el PDF de una convocatoria ya leída en un archivo temporal y
+    devuelve su ruta: entre procesos solo viaja la ruta, no el contenido.
+    El proceso hijo no consulta la base ni escribe en la caché (su
+    configuración puede no ser la del proceso que atiende; ver
+    ConstruccionesPDF._terminar)
+    """
+    fd, ruta = tempfile.mkstemp(prefix='convocatoria_', suffix='.pdf')
+    try:
+        with os.fdopen(fd, 'wb') as destino:
+            construir_pdf(convocatoria, destino)
+    except BaseException:
+        os.remove(ruta)
+        raise
+    return ruta
+
+
+class ConstruccionesPDF:
+    """
+    Construcciones de PDF en el pool de procesos con un máximo de trabajos
+    en vuelo. Las peticiones simultáneas del mismo PDF (`clave`) esperan la
+    misma construcción; si no hay lugar para una nueva se rechaza (o se
+    espera, con `esperar`) en vez de encolarla sin límite.
+
+    enviar() devuelve un Future con la ruta del archivo temporal; quien lo
+    recibe abre el archivo y después llama a soltar(). El temporal se
+    borra cuando ya nadie lo usa. Sin `pool` se usa el pool compartido
+    """
+
+    def __init__(self, maximo, pool=None):
+        self.maximo = maximo
+        self.pool = pool
+        self._lock = threading.Condition()
+        self._en_vuelo = {}  # clave -> Future
+        self._usuarios = {}  # Future -> cuántos no han llamado a soltar()
+
+    def enviar(self, clave, convocatoria, esperar=False):
+        """Future con la ruta del PDF; PoolSaturado si no hay lugar y no se espera"""
+        with self._lock:
+            futuro = self._en_vuelo.get(clave)
+            while futuro is None and len(self._en_vuelo) >= self.maximo:
+                if not esperar:
+                    raise PoolSaturado
+                self._lock.wait()
+                futuro = self._en_vuelo.get(clave)
+            nuevo = futuro is None
+            if nuevo:
+                futuro = (self.pool or obtener_pool_procesos()).submit(pdf_de, convocatoria)
+                self._en_vuelo[clave] = futuro
+            self._usuarios[futuro] = self._usuarios.get(futuro, 0) + 1
+        if nuevo:
+            futuro.add_done_callback(lambda terminado: self._terminar(clave, terminado))
+        return futuro
+
+    def soltar(self, futuro):
+        """Quien recibió `futuro` ya abrió el archivo (o ya no lo quiere)"""
+        with self._lock:
+            self._usuarios[futuro] -= 1
+            # Mientras siga en vuelo _terminar() aún va a copiarlo a la caché
+            borrar = self._usuarios[futuro] == 0 and futuro not in self._en_vuelo.values()
+            if borrar:
+                del self._usuarios[futuro]
+        if borrar:
+            self._borrar(futuro)
+
+    def _terminar(self, clave, futuro):
+        # Se guarda en la caché antes de dejar de estar en vuelo: la
+        # siguiente petición lo encuentra en uno de los dos lados
+        try:
+            if not futuro.cancelled() and futuro.exception() is None:
+                with open(futuro.result(), 'rb') as origen:
+                    obtener_backend().guardar(clave, origen)
+        except Exception:
+            logger.exception("No se pudo guardar en la caché el PDF %s", clave)
+        finally:
+            with self._lock:
+                self._en_vuelo.pop(clave, None)
+                borrar = self._usuarios.get(futuro) == 0
+                if borrar:
+                    del self._usuarios[futuro]
+                self._lock.notify_all()
+        if borrar:
+            self._borrar(futuro)
+
+    @staticmethod
+    def _borrar(futuro):
+        if futuro.cancelled() or futuro.exception() is not None:
+            return
+        try:
+            os.remove(futuro.result())
+        except FileNotFoundError:
+            pass
+
+    def en_vuelo(self):
+        with self._lock:
+            return len(self._en_vuelo)
+
+
+_construcciones = None
+
+
+def obtener_construcciones():
+    global _construcciones
+    with _pool_lock:
+        if _construcciones is None:
+            _construcciones = ConstruccionesPDF(getattr(settings, 'CONVOCATORIAS_PDF_EN_VUELO', procesos_pdf() * 2))
+        return _construcciones
+
+
+async def apdf_construido(convocatoria, clave):
+    """
+    Archivo abierto con el PDF construido en el pool de procesos, sin
+    ocupar el event loop mientras trabaja ReportLab. PoolSaturado si ya hay
+    CONVOCATORIAS_PDF_EN_VUELO construcciones pendientes
+    """
+    construcciones = obtener_construcciones()
+    futuro = construcciones.enviar(clave, convocatoria)
+    try:
+        # shield: si el cliente se va, la construcción sigue para los demás
+        ruta = await asyncio.shield(asyncio.wrap_future(futuro))
+        return await sync_to_async(open, thread_sensitive=False)(ruta, 'rb')
+    finally:
+        construcciones.soltar(futuro)
+
+
+def reintentar_en():
+    """Segundos para el encabezado Retry-After cuando el pool está saturado"""
+    return getattr(settings, 'CONVOCATORIAS_PDF_REINTENTAR_EN', 2)
+
+
+# ==================== COLA EN SEGUNDO PLANO ====================
+class ColaTareas:
+    """
+    Pool de hilos local que ejecuta `tarea(convocatoria_id)` después de
+    guardar una convocatoria (pre-renderizar el PDF, procesar imágenes).
+    Lleva el estado de la última tarea de cada convocatoria
+    """
+
+    def __init__(self, tarea, max_workers=2, nombre='convocatorias'):
+        self._tarea = tarea
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=nombre)
+        self._lock = threading.Lock()
+        self._estados = {}
+
+    def encolar(self, convocatoria_id):
+        with self._lock:
+            actual = self._estados.get(convocatoria_id)
+            # Una tarea que no ha empezado ya leerá los datos más recientes
+            if actual and actual['estado'] == PENDIENTE:
+                return
+            self._estados[convocatoria_id] = {'estado': PENDIENTE, 'error': None, 'actualizado': time.time()}
+        self._executor.submit(self._ejecutar, convocatoria_id)
+
+    def estado(self, convocatoria_id):
+        with self._lock:
+            actual = self._estados.get(convocatoria_id)
+            return dict(actual) if actual else None
+
+    def _marcar(self, convocatoria_id, estado, error=None):
+        with self._lock:
+            self._estados[convocatoria_id] = {'estado': estado, 'error': error, 'actualizado': time.time()}
+
+    def _ejecutar(self, convocatoria_id):
+        self._marcar(convocatoria_id, PROCESANDO)
+        close_old_connections()
+        try:
+            self._tarea(convocatoria_id)
+        except Exception as exc:
+            logger.exception("Falló %s de la convocatoria %s", self._tarea.__name__, convocatoria_id)
+            self._marcar(convocatoria_id, ERROR, str(exc))
+        else:
+            self._marcar(convocatoria_id, LISTO)
+        finally:
+            close_old_connections()
+
+    def cerrar(self, esperar=True):
+        self._executor.shutdown(wait=esperar)
+
+
+_cola = None
+_cola_lock = threading.Lock()
+
+
+def obtener_cola():
+    global _cola
+    with _cola_lock:
+        if _cola is None:
+            _cola = ColaTareas(
+                renderizar_pdf,
+                max_workers=getattr(settings, 'CONVOCATORIAS_PDF_WORKERS', 2),
+                nombre='convocatorias-pdf'
+            )
+        return _cola
+
+
+def encolar_pdf(convocatoria_id):
+    """Programa el pre-renderizado del PDF si está habilitado en settings"""
+    if getattr(settings, 'CONVOCATORIAS_PDF_PRERENDER', True):
+        obtener_cola().encolar(convocatoria_id)
+
+
+def estado_pdf(convocatoria_id):
+    """Estado de la última tarea de la convocatoria, o None si no hay"""
+    return obtener_cola().estado(convocatoria_id)
+
+
+# ==================== IMÁGENES ====================
+_cola_imagenes = None
+
+
+def obtener_cola_imagenes():
+    global _cola_imagenes
+    with _cola_lock:
+        if _cola_imagenes is None:
+            _cola_imagenes = ColaTareas(
+                procesar_imagenes,
+                max_workers=getattr(settings, 'CONVOCATORIAS_IMAGENES_WORKERS', 1),
+                nombre='convocatorias-imagenes'
+            )
+        return _cola_imagenes
+
+
+def encolar_imagenes(convocatoria_id):
+    """
+    Programa la generación de rendiciones. Con
+    CONVOCATORIAS_IMAGENES_EN_SEGUNDO_PLANO = False se hace en el momento
+    """
+    if getattr(settings, 'CONVOCATORIAS_IMAGENES_EN_SEGUNDO_PLANO', True):
+        obtener_cola_imagenes().encolar(convocatoria_id)
+    else:
+        procesar_imagenes(convocatoria_id)
@@ -0,0 +1,14 @@
+from django import template
+
+from .. import documento as modelo_documento
+
+register = template.Library()
+
+
+@register.filter
+def documento(convocatoria):
+    """
+    Documento compartido con el PDF y el cartel (ver documento.py), p. ej.
+    {% with doc=convocatoria|documento %}...{% endwith %}
+    """
+    return modelo_documento.documento(convocatoria)
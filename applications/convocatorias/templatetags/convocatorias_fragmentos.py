@@ -0,0 +1,35 @@
+from django import template
+
+from .. import fragmentos
+
+register = template.Library()
+
+
+class FragmentoNode(template.Node):
+    def __init__(self, nodelist, nombre, objeto):
+        self.nodelist = nodelist
+        self.nombre = nombre
+        self.objeto = objeto
+
+    def render(self, context):
+        return fragmentos.renderizar(
+            self.nombre.resolve(context),
+            self.objeto.resolve(context),
+            lambda: self.nodelist.render(context)
+        )
+
+
+@register.tag
+def fragmento(parser, token):
+    """
+    Guarda en caché el HTML del bloque por convocatoria, p. ej.
+    {% fragmento 'fila_filtro' c %}...{% endfragmento %}.
+    La llave incluye id y updated_at: al editar la convocatoria se renderiza
+    de nuevo. El bloque solo debe depender del objeto
+    """
+    partes = token.split_contents()
+    if len(partes) != 3:
+        raise template.TemplateSyntaxError(f"'{partes[0]}' recibe un nombre y un objeto")
+    nodelist = parser.parse(('endfragmento',))
+    parser.delete_first_token()
+    return FragmentoNode(nodelist, parser.compile_filter(partes[1]), parser.compile_filter(partes[2]))
@@ -0,0 +1,15 @@
+from django import template
+
+from ..imagenes import url_rendicion
+
+register = template.Library()
+
+
+@register.filter
+def rendicion(archivo, nombre):
+    """
+    URL de una versión reducida de la imagen, p. ej.
+    {{ convocatoria.logo_ayuntamiento|rendicion:'miniatura' }}.
+    Mientras no está lista se usa la imagen original
+    """
+    return url_rendicion(archivo, nombre)
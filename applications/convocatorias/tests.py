@@ -1,3 +1,1237 @@
-from django.test import TestCase
+import asyncio
+import csv
+import os
+import random
+import re
+import sys
+import threading
+import time
+import zipfile
+from datetime import date, timedelta
+from io import BytesIO, StringIO
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.exceptions import ValidationError
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.http import HttpResponse
+from django.shortcuts import render
+from django.template import Context, Template
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import include, path, reverse
+from PIL import Image as PILImage
+
+from . import (
+    benchmarks, cartel, eliminacion, estados, facetas, fragmentos, huerfanos, imagenes, importacion, metricas, pdf, subidas,
+    tareas, urls, views
+)
+from .cache import CacheDisco, clave_pdf, obtener_backend
+from .documento import armar, documento
+from .filtros import pagina_de_resultados
+from .forms import ImportacionForm
+from .models import Convocatoria, ConvocatoriaQuerySet
+from .paginacion import codificar_cursor
+from .presupuesto import PresupuestoExcedido, PresupuestoMixin, presupuesto
+from .zip_pdf import generar_zip, nombre_en_zip
+
+
+@presupuesto(1)
+def listado_con_n_mas_1(request):
+    """Lee la proyección de edición y la plantilla usa un campo diferido: una consulta por fila"""
+    plantilla = Template("{% for convocatoria in convocatorias %}{{ convocatoria.requisitos }}{% endfor %}")
+    return HttpResponse(plantilla.render(Context({'convocatorias': Convocatoria.objects.proyeccion('edicion')})))
+
+
+# URLs propias para las pruebas, con el mismo namespace que usa el proyecto
+urlpatterns = [
+    path('', include('applications.convocatorias.urls')),
+    path('pruebas/n-mas-1/', listado_con_n_mas_1),
+]
+
+
+class AisladoMixin:
+    """
+    Almacenamiento, caché de PDF y subidas en un directorio temporal, sin
+    pre-renderizado (ver benchmarks.entorno_aislado)
+    """
+
+    def setUp(self):
+        super().setUp()
+        entorno = benchmarks.entorno_aislado()
+        entorno.__enter__()
+        self.addCleanup(entorno.__exit__, None, None, None)
+
+    def crear(self, **campos):
+        campos.setdefault('nombre', "Liga municipal")
+        campos.setdefault('deporte', 'Fútbol')
+        return Convocatoria.objects.create(**campos)
+
+
+# ==================== PLANES DE CONSULTA ====================
+# "SCAN tabla" (o "SCAN TABLE tabla" en SQLite < 3.36) sin "USING ... INDEX"
+# es un recorrido completo de la tabla. Recorrer en orden un índice parcial
+# ("SCAN tabla USING INDEX") sí es válido: así se sirven los listados
+RECORRIDO_COMPLETO = re.compile(r'\bSCAN (TABLE )?convocatorias_\w+\b(?! USING)')
+
+
+@override_settings(ROOT_URLCONF=__name__, CONVOCATORIAS_PDF_PRERENDER=False)
+class PlanesDeConsultaTests(TestCase):
+    """
+    Ejecuta cada vista, corre EXPLAIN QUERY PLAN sobre las consultas que hizo
+    y falla si alguna recorre completa una tabla de convocatorias
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        hoy = date.today()
+        for i in range(30):
+            Convocatoria.objects.create(
+                nombre=f"Liga {i}",
+                deporte='Fútbol' if i % 2 else 'Voleibol',
+                categoria=['Libre', 'Juvenil', 'Veteranos'][i % 3],
+                rama='Mixta',
+                estado='Abierta' if i % 4 else 'Cerrada',
+                fecha_inicio_torneo=hoy + timedelta(days=i),
+                activa=i % 10 != 0,
+            )
+        cls.convocatoria = Convocatoria.objects.filter(activa=True).first()
+
+    def setUp(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest("Los planes se comparan con el formato de SQLite")
+        # Sin facetas en caché para que su consulta también se revise
+        cache.clear()
+
+    def assertUsaIndices(self, metodo, url, datos=None, orden_por_indice=False):
+        """
+        Con `orden_por_indice` además falla si algún ORDER BY necesita
+        ordenar en memoria en vez de leer el índice en orden
+        """
+        with CaptureQueriesContext(connection) as consultas:
+            response = getattr(self.client, metodo)(url, datos or {})
+        self.assertLess(response.status_code, 400)
+
+        revisadas = 0
+        for consulta in consultas.captured_queries:
+            sql = consulta['sql']
+            if not sql.startswith('SELECT') or 'convocatorias_' not in sql:
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+                plan = [fila[-1] for fila in cursor.fetchall()]
+            recorridos = [linea for linea in plan if RECORRIDO_COMPLETO.search(linea)]
+            self.assertEqual(recorridos, [], f"{url} recorre la tabla completa:\n{sql}\n" + "\n".join(plan))
+            if orden_por_indice:
+                self.assertNotIn('USE TEMP B-TREE FOR ORDER BY', plan, f"{url} ordena sin índice:\n{sql}")
+            revisadas += 1
+        self.assertGreater(revisadas, 0, f"{url} no consultó convocatorias")
+        return response
+
+    def test_seleccionar_convocatoria(self):
+        self.assertUsaIndices('get', reverse('convocatorias:edit'), orden_por_indice=True)
+
+    def test_editar_convocatoria(self):
+        self.assertUsaIndices('get', reverse('convocatorias:editar_convocatoria', args=[self.convocatoria.id]))
+
+    def test_eliminar_convocatoria(self):
+        convocatoria = Convocatoria.objects.get(nombre='Liga 3')
+        self.assertUsaIndices('post', reverse('convocatorias:delete'), {'ids': [convocatoria.id]})
+        # Baja lógica: la fila sigue hasta la purga
+        convocatoria.refresh_from_db()
+        self.assertFalse(convocatoria.activa)
+        self.assertIsNotNone(convocatoria.eliminada_en)
+
+    def test_filtro_sin_filtros(self):
+        response = self.assertUsaIndices('get', reverse('convocatorias:filtro'), orden_por_indice=True)
+        # Segunda página con el cursor de la primera
+        self.assertUsaIndices(
+            'get', reverse('convocatorias:filtro'), {'cursor': response.context['siguiente']}, orden_por_indice=True
+        )
+
+    def test_filtro_por_deporte(self):
+        response = self.assertUsaIndices(
+            'get', reverse('convocatorias:filtro'), {'deporte': 'fútbol'}, orden_por_indice=True
+        )
+        self.assertTrue(response.context['convocatorias'])
+        self.assertTrue(all(c.deporte == 'Fútbol' for c in response.context['convocatorias']))
+
+    def test_filtro_por_categoria(self):
+        self.assertUsaIndices('get', reverse('convocatorias:filtro'), {'categoria': 'JUVENIL'})
+
+    def test_filtro_por_estado(self):
+        self.assertUsaIndices('get', reverse('convocatorias:filtro'), {'estado': 'cerrada'})
+
+    def test_filtro_combinado(self):
+        self.assertUsaIndices('get', reverse('convocatorias:filtro'), {
+            'deporte': 'Voleibol', 'categoria': 'Libre', 'estado': 'Abierta',
+            'desde': date.today().isoformat(),
+        })
+
+    def test_filtro_por_palabra(self):
+        self.assertUsaIndices('get', reverse('convocatorias:filtro'), {'kword': 'liga', 'deporte': 'Fútbol'})
+
+    def test_seleccionar_pdf(self):
+        self.assertUsaIndices('get', reverse('convocatorias:seleccionar_pdf'), orden_por_indice=True)
+
+    def test_zip_pdf(self):
+        # Solo se revisa la consulta del listado; el ZIP no se consume
+        response = self.assertUsaIndices('get', reverse('convocatorias:zip_pdf'), {'estado': 'Abierta'})
+        response.close()
+
+
+# ==================== PROYECCIONES DE LOS LISTADOS ====================
+COLUMNA = re.compile(r'"convocatorias_convocatoria"\."(\w+)"')
+
+
+@override_settings(ROOT_URLCONF=__name__, CONVOCATORIAS_PDF_PRERENDER=False)
+class ProyeccionesTests(TestCase):
+    """
+    Los listados leen solo las columnas de su proyección y sus plantillas no
+    tocan campos diferidos (cada acceso sería una consulta más por fila)
+    """
+
+    LISTADOS = (
+        ('convocatorias:edit', {}, 'edicion'),
+        ('convocatorias:seleccionar_pdf', {}, 'pdf'),
+        ('convocatorias:filtro', {}, 'filtro'),
+        ('convocatorias:filtro', {'deporte': 'Fútbol'}, 'filtro'),
+        ('convocatorias:filtro', {'kword': 'liga'}, 'filtro'),
+    )
+
+    @classmethod
+    def setUpTestData(cls):
+        texto = "Texto largo de la convocatoria. " * 60
+        for i in range(12):
+            Convocatoria.objects.create(
+                nombre=f"Liga {i}",
+                deporte='Fútbol' if i % 2 else 'Voleibol',
+                categoria='Libre',
+                rama='Mixta',
+                descripcion=texto,
+                requisitos=texto,
+                normatividad_aplicable=texto,
+                transitorios=texto,
+                arbitraje=texto,
+                fase_final=texto,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def _listar(self, url, datos):
+        with CaptureQueriesContext(connection) as consultas:
+            response = self.client.get(reverse(url), datos)
+        self.assertEqual(response.status_code, 200)
+        # Consultas que leen filas de convocatorias (no los conteos de facetas)
+        return response, [
+            consulta['sql'] for consulta in consultas.captured_queries
+            if consulta['sql'].startswith('SELECT "convocatorias_convocatoria".')
+            and 'COUNT(' not in consulta['sql']
+        ]
+
+    def _bytes(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            return sum(
+                len(valor if isinstance(valor, bytes) else str(valor).encode())
+                for fila in cursor.fetchall() for valor in fila if valor is not None
+            )
+
+    def _espiar_recargas(self):
+        # Los campos diferidos se cargan con refresh_from_db(fields=[...])
+        return mock.patch.object(
+            Convocatoria, 'refresh_from_db', autospec=True, side_effect=Convocatoria.refresh_from_db
+        )
+
+    def test_columnas_y_bytes(self):
+        for url, datos, proyeccion in self.LISTADOS:
+            with self.subTest(url=url, datos=datos):
+                _response, consultas = self._listar(url, datos)
+                self.assertEqual(len(consultas), 1, consultas)
+                sql = consultas[0]
+
+                columnas = COLUMNA.findall(sql[:sql.index(' FROM ')])
+                self.assertCountEqual(columnas, ConvocatoriaQuerySet.PROYECCIONES[proyeccion])
+
+                # La misma consulta con todas las columnas, para comparar
+                completa = 'SELECT "convocatorias_convocatoria".*' + sql[sql.index(' FROM '):]
+                leidos, todos = self._bytes(sql), self._bytes(completa)
+                self.assertLess(leidos * 20, todos, f"{leidos} bytes con proyección, {todos} sin ella")
+
+    def test_plantillas_no_cargan_campos_diferidos(self):
+        for url, datos, _proyeccion in self.LISTADOS:
+            with self.subTest(url=url, datos=datos):
+                with self._espiar_recargas() as recarga:
+                    response, _consultas = self._listar(url, datos)
+                self.assertTrue(response.context['convocatorias'])
+                self.assertEqual(
+                    [llamada.kwargs.get('fields') for llamada in recarga.call_args_list], [],
+                    "La plantilla usa campos que no están en la proyección"
+                )
+
+    def test_detecta_acceso_a_campo_diferido(self):
+        convocatoria = Convocatoria.objects.proyeccion('edicion').first()
+        with self._espiar_recargas() as recarga:
+            self.assertTrue(convocatoria.requisitos)
+        self.assertEqual(recarga.call_count, 1)
+
+
+# ==================== BENCHMARK DE VISTAS ====================
+@override_settings(ROOT_URLCONF=__name__)
+class BenchmarkVistasTests(TestCase):
+    """La suite de bench_vistas corre completa y detecta regresiones"""
+
+    def test_mide_todos_los_escenarios(self):
+        resultados = benchmarks.ejecutar(20, repeticiones=2)
+
+        self.assertEqual(list(resultados), [escenario.nombre for escenario in benchmarks.ESCENARIOS])
+        for nombre, medidas in resultados.items():
+            self.assertLessEqual(medidas['p50_ms'], medidas['p95_ms'], nombre)
+            self.assertGreater(medidas['consultas'], 0, nombre)
+            self.assertGreater(medidas['memoria_kb'], 0, nombre)
+        # Los datos sintéticos se revierten
+        self.assertFalse(Convocatoria.objects.exists())
+
+    def test_comparar_con_la_base(self):
+        base = {'filtro': {'p50_ms': 10, 'p95_ms': 20, 'consultas': 2, 'memoria_kb': 500}}
+
+        # Dentro de la tolerancia, o por encima pero con diferencias mínimas
+        self.assertEqual(benchmarks.comparar(
+            {'filtro': {'p50_ms': 14, 'p95_ms': 28, 'consultas': 2, 'memoria_kb': 700}}, base
+        ), [])
+        regresiones = benchmarks.comparar(
+            {'filtro': {'p50_ms': 30, 'p95_ms': 20, 'consultas': 3, 'memoria_kb': 500}}, base
+        )
+        self.assertEqual(len(regresiones), 2)
+        self.assertIn('consultas', regresiones[0])
+        self.assertIn('p50_ms', regresiones[1])
+
+    def test_base_guardada_cubre_los_escenarios(self):
+        base = benchmarks.cargar_base()
+        self.assertIn('1000', base)
+        self.assertEqual(set(base['1000']), {escenario.nombre for escenario in benchmarks.ESCENARIOS})
+
+
+# ==================== PRESUPUESTO DE CONSULTAS ====================
+@override_settings(ROOT_URLCONF=__name__, CONVOCATORIAS_PDF_PRERENDER=False)
+class PresupuestoConsultasTests(PresupuestoMixin, TestCase):
+    """
+    Cada vista se queda en su presupuesto con más filas que presupuesto, y
+    un N+1 se reporta con la consulta repetida y el nodo de la plantilla
+    """
+
+    def _n_mas_1(self, filas=5):
+        for i in range(filas):
+            Convocatoria.objects.create(nombre=f"Liga {i}", deporte='Fútbol', requisitos="Credencial")
+        return self.client.get('/pruebas/n-mas-1/')
+
+    def test_todas_las_vistas_tienen_presupuesto(self):
+        for patron in urls.urlpatterns:
+            with self.subTest(vista=patron.name):
+                self.assertTrue(hasattr(patron.callback, 'presupuesto_consultas'))
+
+    def test_vistas_dentro_del_presupuesto(self):
+        with benchmarks.entorno_aislado():
+            ids = benchmarks.generar(30, 1, True)
+            azar = random.Random(1)
+            peticiones = [escenario.preparar(azar, ids) for escenario in benchmarks.ESCENARIOS] + [
+                ('get', reverse('convocatorias:create'), {}),
+                ('get', reverse('convocatorias:editar_convocatoria', args=[ids[0]]), {}),
+                ('get', reverse('convocatorias:delete'), {}),
+                ('post', reverse('convocatorias:delete'), {'ids': ids[:3]}),
+                ('get', reverse('convocatorias:filtro'), {'kword': 'liga', 'deporte': 'Fútbol'}),
+                ('get', reverse('convocatorias:estado_pdf', args=[ids[4]]), {}),
+                ('get', reverse('convocatorias:cartel', args=[ids[4]]), {}),
+                ('get', reverse('convocatorias:api_convocatorias'), {}),
+                ('get', reverse('convocatorias:api_convocatoria', args=[ids[4]]), {}),
+                ('get', reverse('convocatorias:tools'), {}),
+            ]
+            for metodo, url, datos in peticiones:
+                with self.subTest(url=url, datos=datos):
+                    response = getattr(self.client, metodo)(url, datos)
+                    self.assertLess(response.status_code, 400)
+                    self.assertPresupuesto(response)
+
+    def test_detecta_n_mas_1(self):
+        with self.assertLogs('applications.convocatorias.presupuesto', 'WARNING'):
+            response = self._n_mas_1()
+        with self.assertRaises(AssertionError) as error:
+            self.assertPresupuesto(response)
+        reporte = str(error.exception)
+        self.assertIn("listado_con_n_mas_1: 6 consultas, presupuesto 1", reporte)
+        self.assertIn("5 x SELECT", reporte)
+        self.assertIn("convocatoria.requisitos", reporte)
+
+    def test_modo_estricto(self):
+        with override_settings(CONVOCATORIAS_PRESUPUESTO='estricto'):
+            with self.assertRaises(PresupuestoExcedido):
+                self._n_mas_1()
+
+    def test_modo_registrar(self):
+        with override_settings(CONVOCATORIAS_PRESUPUESTO='registrar'):
+            with self.assertLogs('applications.convocatorias.presupuesto', 'WARNING') as registro:
+                self._n_mas_1()
+        self.assertIn("6 consultas, presupuesto 1", registro.output[0])
+        # Sin las pilas: eso es del modo depurar
+        self.assertNotIn("x SELECT", registro.output[0])
+
+    def test_modo_apagado(self):
+        with override_settings(CONVOCATORIAS_PRESUPUESTO='apagado'):
+            response = self._n_mas_1()
+        self.assertFalse(hasattr(response, 'consumo_consultas'))
+
+
+# ==================== CACHÉ DE PDF ====================
+@override_settings(ROOT_URLCONF=__name__)
+class CachePDFTests(AisladoMixin, TestCase):
+    """El PDF se sirve de la caché con ETag y se invalida al guardar"""
+
+    def test_etag_y_304(self):
+        convocatoria = self.crear()
+        url = reverse('convocatorias:generar_pdf', args=[convocatoria.id])
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['ETag'], f'"{clave_pdf(convocatoria)}"')
+        self.assertTrue(response.getvalue().startswith(b'%PDF'))
+        self.assertIsNotNone(obtener_backend().abrir(clave_pdf(convocatoria)))
+
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_guardar_invalida_el_pdf(self):
+        convocatoria = self.crear()
+        self.client.get(reverse('convocatorias:generar_pdf', args=[convocatoria.id]))
+        anterior = clave_pdf(convocatoria)
+
+        convocatoria.nombre = "Liga municipal de invierno"
+        convocatoria.save()
+        self.assertIsNone(obtener_backend().abrir(anterior))
+        self.assertNotEqual(clave_pdf(convocatoria), anterior)
+
+    def test_desaloja_los_menos_usados(self):
+        directorio = settings.CONVOCATORIAS_PDF_CACHE['OPTIONS']['directorio']
+        backend = CacheDisco(directorio=os.path.join(directorio, 'lru'), max_bytes=250)
+        for i, clave in enumerate(('1-a', '2-b', '3-c')):
+            backend.guardar(clave, BytesIO(b'x' * 100))
+            os.utime(backend._ruta(clave), (i, i))
+        self.assertIsNone(backend.abrir('1-a'))
+        with backend.abrir('3-c') as archivo:
+            self.assertEqual(len(archivo.read()), 100)
+
+    def test_no_recorre_el_directorio_en_cada_escritura(self):
+        directorio = settings.CONVOCATORIAS_PDF_CACHE['OPTIONS']['directorio']
+        backend = CacheDisco(directorio=os.path.join(directorio, 'conteo'), max_bytes=10_000)
+        with mock.patch.object(CacheDisco, '_desalojar', autospec=True, side_effect=CacheDisco._desalojar) as recorrido:
+            for i in range(5):
+                backend.guardar(f"{i}-a", BytesIO(b'x' * 100))
+        self.assertEqual(recorrido.call_count, 1)
+        self.assertEqual(backend._total, 500)
+
+
+# ==================== PDF SIN BLOQUEAR ====================
+@override_settings(ROOT_URLCONF=__name__)
+class ConstruccionesPDFTests(AisladoMixin, TestCase):
+    """
+    Los PDF se construyen en el pool con un máximo en vuelo; entre procesos
+    solo viaja la ruta del temporal, que se borra cuando nadie lo usa
+    """
+
+    def test_503_con_retry_after_si_el_pool_esta_lleno(self):
+        convocatoria = self.crear()
+        with mock.patch.object(tareas, '_construcciones', tareas.ConstruccionesPDF(0)):
+            response = self.client.get(reverse('convocatorias:generar_pdf', args=[convocatoria.id]))
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response['Retry-After'], str(tareas.reintentar_en()))
+
+    def test_mismo_pdf_una_construccion(self):
+        convocatoria = self.crear()
+        otra = self.crear(nombre="Copa de invierno")
+        construcciones = tareas.ConstruccionesPDF(1)
+
+        futuro = construcciones.enviar(clave_pdf(convocatoria), convocatoria)
+        self.assertIs(construcciones.enviar(clave_pdf(convocatoria), convocatoria), futuro)
+        with self.assertRaises(tareas.PoolSaturado):
+            construcciones.enviar(clave_pdf(otra), otra)
+
+        ruta = futuro.result(timeout=60)
+        with open(ruta, 'rb') as archivo:
+            self.assertTrue(archivo.read().startswith(b'%PDF'))
+        construcciones.soltar(futuro)
+        construcciones.soltar(futuro)
+        # _terminar() corre en el hilo del pool: se espera a que lo deje en la caché
+        for _intento in range(100):
+            if not construcciones.en_vuelo() and not os.path.exists(ruta):
+                break
+            time.sleep(0.05)
+        self.assertFalse(os.path.exists(ruta))
+        self.assertIsNotNone(obtener_backend().abrir(clave_pdf(convocatoria)))
+
+    async def test_descarga_asgi_por_bloques(self):
+        convocatoria = await Convocatoria.objects.acreate(nombre="Liga municipal", deporte='Fútbol')
+        response = await AsyncClient().get(reverse('convocatorias:generar_pdf', args=[convocatoria.id]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        contenido = b''.join([bloque async for bloque in response.streaming_content])
+        self.assertTrue(contenido.startswith(b'%PDF'))
+        self.assertEqual(len(contenido), int(response['Content-Length']))
+
+    def test_zip_usa_el_limite_en_vuelo(self):
+        convocatorias = [self.crear(nombre=f"Liga {numero}") for numero in range(3)]
+        lista = [(convocatoria.id, convocatoria.nombre) for convocatoria in convocatorias] + [(0, "Borrada")]
+        construcciones = tareas.ConstruccionesPDF(1)
+        enviar = mock.Mock(wraps=construcciones.enviar)
+
+        with mock.patch.object(construcciones, 'enviar', enviar), self.assertLogs('applications.convocatorias.zip_pdf', 'ERROR'):
+            contenido = b''.join(generar_zip(lista, Convocatoria.objects.activas(), 2, construcciones))
+
+        # Con un solo lugar en vuelo cada construcción espera a la anterior
+        self.assertEqual(enviar.call_count, 3)
+        self.assertTrue(all(llamada.kwargs['esperar'] for llamada in enviar.call_args_list))
+        with zipfile.ZipFile(BytesIO(contenido)) as zf:
+            nombres = zf.namelist()
+            self.assertEqual(nombres[:3], [nombre_en_zip(*par) for par in lista[:3]])
+            self.assertTrue(zf.read(nombres[0]).startswith(b'%PDF'))
+            self.assertIn("0 - Borrada", zf.read('ERRORES.txt').decode())
+
+    async def test_zip_asgi_por_partes(self):
+        convocatoria = await Convocatoria.objects.acreate(nombre="Liga municipal", deporte='Fútbol')
+        response = await AsyncClient().get(reverse('convocatorias:zip_pdf'))
+        self.assertTrue(response.is_async)
+        contenido = b''.join([bloque async for bloque in response.streaming_content])
+        with zipfile.ZipFile(BytesIO(contenido)) as zf:
+            self.assertEqual(zf.namelist(), [nombre_en_zip(convocatoria.id, convocatoria.nombre)])
+
+
+# ==================== BÚSQUEDA Y PAGINACIÓN ====================
+@override_settings(ROOT_URLCONF=__name__)
+class PaginacionTests(AisladoMixin, TestCase):
+    """Ranking por relevancia y paginación por cursor sobre (fecha, id)"""
+
+    def recorrer(self, params, tamano=2):
+        ids, cursor = [], None
+        while True:
+            elementos, cursor = pagina_de_resultados(Convocatoria.objects.activas(), {**params, 'cursor': cursor or ''}, tamano)
+            ids += [convocatoria.id for convocatoria in elementos]
+            if not cursor:
+                return ids
+
+    def test_cursor_recorre_todo_en_orden(self):
+        hoy = date.today()
+        convocatorias = [self.crear(fecha_inicio_torneo=hoy + timedelta(days=dias)) for dias in (3, 1, 3, 2, 1)]
+        esperado = [c.id for c in sorted(convocatorias, key=lambda c: (c.fecha_inicio_torneo, c.id), reverse=True)]
+        self.assertEqual(self.recorrer({}), esperado)
+
+    def test_ranking_por_peso_del_campo(self):
+        en_descripcion = self.crear(nombre="Copa de invierno", descripcion="Fase de liga")
+        en_nombre = self.crear(nombre="Liga de verano")
+        en_ambos = self.crear(nombre="Liga de otoño", descripcion="Liga a dos vueltas")
+        self.crear(nombre="Torneo relámpago")
+        self.assertEqual(self.recorrer({'kword': 'lig'}), [en_ambos.id, en_nombre.id, en_descripcion.id])
+
+    def test_cursor_alterado_es_la_primera_pagina(self):
+        for numero in range(3):
+            self.crear(nombre=f"Liga {numero}")
+        malos = [codificar_cursor(['x', 1]), codificar_cursor([[1], {'a': 1}]), codificar_cursor([None, 1]), '!!']
+        for params in ({}, {'kword': 'liga'}):
+            primera = pagina_de_resultados(Convocatoria.objects.activas(), params, 2)
+            for malo in malos:
+                with self.subTest(params=params, cursor=malo):
+                    self.assertEqual(
+                        pagina_de_resultados(Convocatoria.objects.activas(), {**params, 'cursor': malo}, 2),
+                        primera
+                    )
+                    for url in ('filtro', 'delete', 'api_convocatorias'):
+                        response = self.client.get(reverse(f'convocatorias:{url}'), {**params, 'cursor': malo})
+                        self.assertEqual(response.status_code, 200)
+
+
+# ==================== BAJA LÓGICA ====================
+@override_settings(ROOT_URLCONF=__name__)
+class BajaLogicaTests(AisladoMixin, TestCase):
+    """Las convocatorias dadas de baja no se sirven aunque la fila siga existiendo"""
+
+    def test_dada_de_baja_da_404(self):
+        convocatoria = self.crear()
+        self.assertEqual(eliminacion.dar_de_baja([convocatoria.id]), 1)
+        for url in ('editar_convocatoria', 'generar_pdf', 'estado_pdf', 'cartel', 'api_convocatoria'):
+            with self.subTest(url=url):
+                response = self.client.get(reverse(f'convocatorias:{url}', args=[convocatoria.id]))
+                self.assertEqual(response.status_code, 404)
+        self.assertTrue(Convocatoria.objects.filter(id=convocatoria.id).exists())
+
+    def test_descarta_pdf_y_carteles(self):
+        convocatoria = self.crear(logo_ayuntamiento=png())
+        otra = self.crear(nombre="Copa de verano")
+        for fila in (convocatoria, otra):
+            obtener_backend().guardar(clave_pdf(fila), BytesIO(b'%PDF-1.4'))
+        ruta = cartel.obtener_cartel(convocatoria)
+        vigente = cartel.obtener_cartel(otra)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertEqual(eliminacion.dar_de_baja([convocatoria.id]), 1)
+        self.assertIsNone(obtener_backend().abrir(clave_pdf(convocatoria)))
+        self.assertFalse(default_storage.exists(ruta))
+        with obtener_backend().abrir(clave_pdf(otra)) as archivo:
+            self.assertEqual(archivo.read(), b'%PDF-1.4')
+        self.assertTrue(default_storage.exists(vigente))
+
+
+# ==================== IMPORTACIÓN ====================
+def csv_de(*filas, encabezados=('nombre', 'deporte', 'categoria', 'rama', 'fecha_inicio_torneo')):
+    return BytesIO('\n'.join(','.join(fila) for fila in (encabezados, *filas)).encode('utf-8-sig'))
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class ImportacionTests(AisladoMixin, TestCase):
+    """Cada fila se valida con ImportacionForm y las válidas se guardan por lotes"""
+
+    def importar(self, archivo, **opciones):
+        return importacion.importar(importacion.leer_filas(archivo, 'convocatorias.csv'), **opciones)
+
+    def test_importa_e_indexa(self):
+        archivo = csv_de(
+            ('Copa regional', 'Fútbol', 'Libre', 'Mixta', '2030-05-01'),
+            ('Liga de otoño', 'Voleibol', 'Juvenil', 'Femenil', '2030-06-01'),
+            encabezados=('Nombre', 'Deporte', 'Categoria', 'Rama', 'Fecha_inicio_torneo'),
+        )
+        resultado = self.importar(archivo, tamano_lote=1)
+        self.assertEqual((resultado['filas'], resultado['creadas'], resultado['errores']), (2, 2, []))
+        copa = Convocatoria.objects.get(nombre="Copa regional")
+        self.assertEqual(copa.fecha_inicio_torneo, date(2030, 5, 1))
+        # La columna que no viene toma el valor por defecto del modelo
+        self.assertEqual(copa.fecha_limite_inscripcion, date.today())
+        elementos, _siguiente = pagina_de_resultados(Convocatoria.objects.activas(), {'kword': 'copa'})
+        self.assertEqual(elementos, [copa])
+
+    def test_una_fila_invalida_no_guarda_nada(self):
+        filas = (('Copa', 'Fútbol', 'Libre', 'Mixta', '2030-05-01'), ('Liga', 'Fútbol', 'Infantil', 'Mixta', 'mañana'))
+        resultado = self.importar(csv_de(*filas))
+        self.assertEqual(resultado['creadas'], 0)
+        self.assertEqual(
+            [(numero, sorted(errores)) for numero, errores in resultado['errores']],
+            [(3, ['categoria', 'fecha_inicio_torneo'])]
+        )
+        self.assertFalse(Convocatoria.objects.exists())
+
+        resultado = self.importar(csv_de(*filas), omitir_errores=True)
+        self.assertEqual(resultado['creadas'], 1)
+        self.assertEqual(list(Convocatoria.objects.values_list('nombre', flat=True)), ["Copa"])
+
+    def test_usa_las_validaciones_del_formulario(self):
+        with mock.patch.object(ImportacionForm, 'clean_nombre', create=True, side_effect=ValidationError("Nombre reservado")):
+            resultado = self.importar(csv_de(('Copa', 'Fútbol', 'Libre', 'Mixta', '2030-05-01')))
+        self.assertEqual(resultado['errores'], [(2, {'nombre': ["Nombre reservado"]})])
+
+    def test_columnas_desconocidas(self):
+        with self.assertRaisesMessage(importacion.ImportacionInvalida, "color"):
+            self.importar(csv_de(('Copa', 'rojo'), encabezados=('nombre', 'color')))
+
+    def test_vista(self):
+        archivo = SimpleUploadedFile('convocatorias.csv', csv_de(('Copa', 'Fútbol', 'Libre', 'Mixta', '2030-05-01')).getvalue())
+        response = self.client.post(reverse('convocatorias:importar'), {'archivo': archivo})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['resultado']['creadas'], 1)
+
+
+# ==================== RENDICIONES DE IMÁGENES ====================
+def png(tamano=(800, 600), color=(200, 30, 30)):
+    salida = BytesIO()
+    PILImage.new('RGB', tamano, color).save(salida, 'PNG')
+    return SimpleUploadedFile('logo.png', salida.getvalue(), content_type='image/png')
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class RendicionesTests(AisladoMixin, TestCase):
+    """Las rendiciones se registran sin cambiar la clave del PDF ya pre-renderizado"""
+
+    def test_rendiciones_no_cambian_la_clave_del_pdf(self):
+        convocatoria = self.crear(logo_ayuntamiento=png())
+        clave = clave_pdf(convocatoria)
+
+        self.assertTrue(imagenes.procesar_imagenes(convocatoria.id))
+        convocatoria.refresh_from_db()
+        self.assertEqual(set(convocatoria.rendiciones['logo_ayuntamiento']) - {'original', 'hash'}, set(imagenes.RENDICIONES))
+        self.assertEqual(clave_pdf(convocatoria), clave)
+        ruta = imagenes.ruta_rendicion(convocatoria.logo_ayuntamiento, 'miniatura')
+        with default_storage.open(ruta) as archivo, PILImage.open(archivo) as miniatura:
+            self.assertEqual(miniatura.size, (320, 240))
+
+    def test_rendiciones_renuevan_el_documento_y_los_fragmentos(self):
+        convocatoria = self.crear(logo_ayuntamiento=png())
+        previa = cartel.llave(convocatoria, 'cuadrado', 'png')
+        fragmento = fragmentos.llave('detalle', convocatoria)
+
+        self.assertTrue(imagenes.procesar_imagenes(convocatoria.id))
+        fresca = Convocatoria.objects.get(pk=convocatoria.pk)
+        self.assertEqual(fresca.updated_at, convocatoria.updated_at)
+        self.assertEqual(documento(fresca).logo.instance.rendiciones, fresca.rendiciones)
+        self.assertNotEqual(fragmentos.llave('detalle', fresca), fragmento)
+        # El cartel vigente es el que ya usa el hash de las rendiciones, no el del memo
+        llave = cartel.llave(fresca, 'cuadrado', 'png')
+        self.assertNotEqual(llave, previa)
+        self.assertEqual(llave, cartel.llave(fresca, 'cuadrado', 'png', doc=armar(fresca)))
+
+
+# ==================== ARCHIVOS HUÉRFANOS ====================
+@override_settings(ROOT_URLCONF=__name__)
+class HuerfanosTests(AisladoMixin, TestCase):
+    """limpiar_media solo borra lo que ya no corresponde a ninguna convocatoria"""
+
+    def test_conserva_los_carteles_vigentes(self):
+        convocatoria = self.crear(logo_ayuntamiento=png())
+        anterior = cartel.obtener_cartel(convocatoria)
+        convocatoria.nombre = "Liga municipal de invierno"
+        convocatoria.save()
+        vigente = cartel.obtener_cartel(convocatoria)
+        otra = cartel.obtener_cartel(self.crear(nombre="Copa de verano"))
+        eliminacion.dar_de_baja([Convocatoria.objects.get(nombre="Copa de verano").id])
+
+        rutas = {ruta for ruta, _tamano in huerfanos.huerfanos(timedelta(0))}
+        self.assertEqual(rutas, {anterior, otra})
+        self.assertNotIn(convocatoria.logo_ayuntamiento.name, rutas)
+        self.assertNotIn(vigente, rutas)
+
+
+# ==================== ESTADOS ====================
+@override_settings(ROOT_URLCONF=__name__)
+class EstadosTests(AisladoMixin, TestCase):
+    """Las transiciones por fecha y el filtro de convocatorias abiertas"""
+
+    def test_abiertas_incluye_el_ultimo_dia_de_inscripcion(self):
+        hoy = date.today()
+        ultimo_dia = self.crear(nombre="Último día", fecha_limite_inscripcion=hoy)
+        self.crear(nombre="Venció ayer", fecha_limite_inscripcion=hoy - timedelta(days=1))
+        self.crear(nombre="Cerrada antes", estado='Cerrada', fecha_limite_inscripcion=hoy + timedelta(days=5))
+
+        self.assertEqual(list(Convocatoria.objects.abiertas(hoy)), [ultimo_dia])
+        self.assertEqual(list(Convocatoria.objects.abiertas(hoy + timedelta(days=1))), [])
+        response = self.client.get(reverse('convocatorias:api_convocatorias'), {'abiertas': '1'})
+        self.assertEqual([fila['nombre'] for fila in response.json()['resultados']], ["Último día"])
+        response = self.client.get(reverse('convocatorias:filtro'), {'abiertas': '1'})
+        self.assertEqual([c.nombre for c in response.context['convocatorias']], ["Último día"])
+
+    def test_transiciones_con_un_update_cada_una(self):
+        hoy = date(2030, 6, 15)
+        atrasada = self.crear(
+            fecha_limite_inscripcion=hoy - timedelta(days=30), fecha_inicio_torneo=hoy - timedelta(days=20),
+            fecha_fin_torneo=hoy - timedelta(days=1)
+        )
+        # Cerrada pero el torneo no ha empezado: no puede pasar a En curso
+        cerrada = self.crear(
+            estado='Cerrada', fecha_limite_inscripcion=hoy - timedelta(days=1), fecha_inicio_torneo=hoy + timedelta(days=1)
+        )
+        finalizada = self.crear(estado='Finalizada', fecha_inicio_torneo=hoy - timedelta(days=3))
+        antes = {c.id: c.updated_at for c in (atrasada, cerrada, finalizada)}
+
+        with CaptureQueriesContext(connection) as consultas, mock.patch.object(facetas, 'invalidar') as invalidar:
+            resultado = estados.actualizar_estados(hoy)
+        self.assertEqual(resultado, [('Abierta', 'Cerrada', 1), ('Cerrada', 'En curso', 1), ('En curso', 'Finalizada', 1)])
+        self.assertEqual(sum(consulta['sql'].startswith('UPDATE') for consulta in consultas), 3)
+        invalidar.assert_called_once_with()
+
+        despues = dict(Convocatoria.objects.values_list('id', 'estado'))
+        self.assertEqual(despues, {atrasada.id: 'Finalizada', cerrada.id: 'Cerrada', finalizada.id: 'Finalizada'})
+        actualizadas = dict(Convocatoria.objects.values_list('id', 'updated_at'))
+        self.assertGreater(actualizadas[atrasada.id], antes[atrasada.id])
+        self.assertEqual(actualizadas[cerrada.id], antes[cerrada.id])
+
+        with mock.patch.object(facetas, 'invalidar') as invalidar:
+            estados.actualizar_estados(hoy)
+        invalidar.assert_not_called()
+
+
+# ==================== SUBIDAS POR PARTES ====================
+@override_settings(ROOT_URLCONF=__name__)
+class SubidasTests(AisladoMixin, TestCase):
+    """Las imágenes se suben por bloques reanudables, un bloque a la vez por subida"""
+
+    def setUp(self):
+        super().setUp()
+        self.datos = png().read()
+
+    def iniciar(self):
+        response = self.client.post(reverse('convocatorias:subidas'), {'nombre': 'logo.png', 'tamano': len(self.datos)})
+        self.assertEqual(response.status_code, 201)
+        return response.json()['id']
+
+    def bloque(self, subida_id, inicio, fin):
+        return self.client.put(
+            reverse('convocatorias:subir_bloque', args=[subida_id]), self.datos[inicio:fin + 1],
+            content_type='application/octet-stream', HTTP_CONTENT_RANGE=f"bytes {inicio}-{fin}/{len(self.datos)}"
+        )
+
+    def test_subida_reanudable(self):
+        subida_id = self.iniciar()
+        mitad = len(self.datos) // 2
+        self.assertEqual(self.bloque(subida_id, 0, mitad - 1).json()['recibido'], mitad)
+
+        # El mismo bloque otra vez (p. ej. un reintento): se indica desde dónde seguir
+        response = self.bloque(subida_id, 0, mitad - 1)
+        self.assertEqual((response.status_code, response.json()['recibido']), (409, mitad))
+
+        self.assertTrue(self.bloque(subida_id, mitad, len(self.datos) - 1).json()['completa'])
+        with subidas.abrir(subida_id) as archivo:
+            self.assertEqual(archivo.read(), self.datos)
+
+    def test_subida_expirada_no_se_recrea(self):
+        subida_id = self.iniciar()
+        subidas.limpiar(edad_maxima=-1)
+        self.assertEqual(self.bloque(subida_id, 0, 9).status_code, 400)
+        self.assertFalse(os.listdir(settings.CONVOCATORIAS_SUBIDAS_DIR))
+
+    @skipUnless(subidas.fcntl, "flock solo existe en POSIX")
+    def test_bloques_serializados_entre_procesos(self):
+        subida_id = self.iniciar()
+        _ruta_meta, ruta_datos = subidas._rutas(subida_id)
+        terminado = threading.Event()
+
+        def agregar():
+            subidas.agregar(subida_id, 0, BytesIO(self.datos[:10]), 10)
+            terminado.set()
+
+        # Otro descriptor del archivo tiene el candado, como lo tendría otro proceso
+        with open(ruta_datos, 'ab') as otro:
+            subidas.fcntl.flock(otro, subidas.fcntl.LOCK_EX)
+            hilo = threading.Thread(target=agregar)
+            hilo.start()
+            self.assertFalse(terminado.wait(0.2))
+        hilo.join(5)
+        self.assertTrue(terminado.is_set())
+        self.assertEqual(subidas.estado(subida_id)['recibido'], 10)
+
+    def test_limpieza_por_muestreo(self):
+        with mock.patch.object(subidas, 'limpiar') as limpiar:
+            with override_settings(CONVOCATORIAS_SUBIDAS_LIMPIEZA=0):
+                self.iniciar()
+            limpiar.assert_not_called()
+            with override_settings(CONVOCATORIAS_SUBIDAS_LIMPIEZA=1):
+                self.iniciar()
+            limpiar.assert_called_once_with()
+
+
+# ==================== VISTAS ASYNC ====================
+@override_settings(ROOT_URLCONF=__name__)
+class VistasAsyncTests(AisladoMixin, TestCase):
+    """Las vistas async no renderizan (ni usan la caché de fragmentos) en el event loop"""
+
+    async def test_renderizan_en_un_hilo(self):
+        await Convocatoria.objects.acreate(nombre="Liga municipal", deporte='Fútbol')
+        en_el_loop = []
+
+        def render_registrado(*args, **kwargs):
+            try:
+                asyncio.get_running_loop()
+                en_el_loop.append(True)
+            except RuntimeError:
+                en_el_loop.append(False)
+            return render(*args, **kwargs)
+
+        with mock.patch.object(views, 'render', render_registrado):
+            for url in ('filtro', 'edit', 'seleccionar_pdf'):
+                response = await AsyncClient().get(reverse(f'convocatorias:{url}'))
+                self.assertEqual(response.status_code, 200)
+        self.assertEqual(en_el_loop, [False, False, False])
+
+
+# ==================== EXPORTACIÓN ====================
+@override_settings(ROOT_URLCONF=__name__)
+class ExportacionTests(AisladoMixin, TestCase):
+    """El CSV se genera por filas con los filtros del listado; XLSX requiere openpyxl"""
+
+    def exportar(self, **params):
+        response = self.client.get(reverse('convocatorias:exportar'), params)
+        self.assertEqual(response.status_code, 200)
+        return b''.join(response.streaming_content).decode('utf-8')
+
+    def test_csv_con_filtros_y_campos(self):
+        hoy = date.today()
+        primera = self.crear(nombre="Copa, edición 2", fecha_inicio_torneo=hoy + timedelta(days=9))
+        segunda = self.crear(nombre="Liga municipal", fecha_inicio_torneo=hoy + timedelta(days=3))
+        self.crear(nombre="Torneo de voleibol", deporte='Voleibol')
+        dada_de_baja = self.crear(nombre="Liga anterior")
+        eliminacion.dar_de_baja([dada_de_baja.id])
+
+        contenido = self.exportar(deporte='fútbol', campos='nombre,fecha_inicio_torneo')
+        self.assertTrue(contenido.startswith('\ufeff'))
+        self.assertEqual(list(csv.reader(StringIO(contenido.lstrip('\ufeff')))), [
+            ['id', 'nombre', 'fecha_inicio_torneo'],
+            [str(primera.id), "Copa, edición 2", primera.fecha_inicio_torneo.isoformat()],
+            [str(segunda.id), "Liga municipal", segunda.fecha_inicio_torneo.isoformat()],
+        ])
+
+    async def test_csv_asgi_por_partes(self):
+        await Convocatoria.objects.acreate(nombre="Liga municipal", deporte='Fútbol')
+        response = await AsyncClient().get(reverse('convocatorias:exportar'), {'campos': 'nombre'})
+        self.assertTrue(response.is_async)
+        contenido = b''.join([bloque async for bloque in response.streaming_content]).decode()
+        self.assertEqual(contenido.lstrip('\ufeff').splitlines()[1].split(',')[1], "Liga municipal")
+
+    def test_formato_o_campo_invalido(self):
+        self.assertEqual(self.client.get(reverse('convocatorias:exportar'), {'formato': 'ods'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('convocatorias:exportar'), {'campos': 'color'}).status_code, 400)
+
+    def test_xlsx_sin_openpyxl(self):
+        with mock.patch.dict(sys.modules, {'openpyxl': None}):
+            response = self.client.get(reverse('convocatorias:exportar'), {'formato': 'xlsx'})
+        self.assertEqual(response.status_code, 501)
+        self.assertIn("openpyxl", response.json()['error'])
+
+
+# ==================== PRE-RENDERIZADO DEL PDF ====================
+@override_settings(ROOT_URLCONF=__name__)
+class PrerenderizadoTests(AisladoMixin, TestCase):
+    """Al guardar se encola el PDF; la cola no repite tareas pendientes y reintenta los fallos"""
+
+    def test_guardar_encola_al_confirmar(self):
+        with override_settings(CONVOCATORIAS_PDF_PRERENDER=True), \
+                mock.patch.object(tareas.ColaTareas, 'encolar') as encolar, \
+                self.captureOnCommitCallbacks(execute=True):
+            convocatoria = self.crear()
+            encolar.assert_not_called()
+        encolar.assert_called_once_with(convocatoria.id)
+
+    def test_no_repite_tareas_pendientes(self):
+        liberar = threading.Event()
+        ejecutadas = []
+
+        def tarea(convocatoria_id):
+            liberar.wait(5)
+            ejecutadas.append(convocatoria_id)
+
+        cola = tareas.ColaTareas(tarea, max_workers=1)
+        self.addCleanup(cola.cerrar)
+        cola.encolar(1)
+        for _vez in range(3):
+            cola.encolar(2)
+        self.assertEqual(cola.estado(2)['estado'], tareas.PENDIENTE)
+        liberar.set()
+        cola.cerrar()
+        self.assertEqual(ejecutadas, [1, 2])
+        self.assertEqual(cola.estado(2)['estado'], tareas.LISTO)
+
+    def test_registra_el_error(self):
+        def tarea(convocatoria_id):
+            raise ValueError("sin fuente")
+
+        cola = tareas.ColaTareas(tarea, max_workers=1)
+        with self.assertLogs('applications.convocatorias.tareas', 'ERROR'):
+            cola.encolar(1)
+            cola.cerrar()
+        self.assertEqual((cola.estado(1)['estado'], cola.estado(1)['error']), (tareas.ERROR, "sin fuente"))
+
+    def test_reintenta_y_deja_el_pdf_en_cache(self):
+        convocatoria = self.crear()
+        construir = mock.Mock(side_effect=[OSError("disco lleno"), BytesIO(b'%PDF-1.4')])
+        with mock.patch.object(tareas, 'obtener_pdf', construir), self.assertLogs('applications.convocatorias.tareas', 'WARNING'):
+            self.assertTrue(tareas.renderizar_pdf(convocatoria.id, reintentos=1, espera=0))
+        self.assertEqual(construir.call_count, 2)
+        self.assertFalse(tareas.renderizar_pdf(0))
+
+        tareas.renderizar_pdf(convocatoria.id)
+        self.assertIsNotNone(obtener_backend().abrir(clave_pdf(convocatoria)))
+
+    def test_estado_de_la_tarea(self):
+        convocatoria = self.crear()
+        with mock.patch.object(views, 'estado_pdf', return_value={'estado': tareas.LISTO, 'error': None}):
+            response = self.client.get(reverse('convocatorias:estado_pdf', args=[convocatoria.id]))
+        self.assertEqual(response.json(), {'id': convocatoria.id, 'tarea': {'estado': tareas.LISTO, 'error': None}})
+
+
+# ==================== PDF EN ARCHIVO TEMPORAL ====================
+@override_settings(ROOT_URLCONF=__name__)
+class PDFTemporalTests(AisladoMixin, TestCase):
+    """El PDF se construye en memoria mientras es pequeño y pasa a disco al crecer"""
+
+    def test_pdf_pequeno_en_memoria(self):
+        with pdf.construir_pdf_temporal(self.crear()) as temporal:
+            self.assertFalse(temporal._rolled)
+            self.assertEqual(temporal.tell(), 0)
+            self.assertTrue(temporal.read().startswith(b'%PDF'))
+
+    def test_pasa_a_disco_al_superar_el_maximo(self):
+        with mock.patch.object(pdf, 'PDF_MEMORIA_MAXIMA', 1024):
+            with pdf.construir_pdf_temporal(self.crear()) as temporal:
+                self.assertTrue(temporal._rolled)
+                self.assertTrue(temporal.read().startswith(b'%PDF'))
+
+    def test_obtener_pdf_usa_la_cache(self):
+        convocatoria = self.crear()
+        pdf.obtener_pdf(convocatoria).close()
+        with mock.patch.object(pdf, 'construir_pdf_temporal', wraps=pdf.construir_pdf_temporal) as construir:
+            with pdf.obtener_pdf(convocatoria) as archivo:
+                self.assertTrue(archivo.read().startswith(b'%PDF'))
+            construir.assert_not_called()
+            pdf.obtener_pdf(convocatoria, forzar=True).close()
+            construir.assert_called_once_with(convocatoria)
+
+
+# ==================== LOGO DEL PDF ====================
+@override_settings(ROOT_URLCONF=__name__)
+class LogoPDFTests(AisladoMixin, TestCase):
+    """El logo se reduce una vez por archivo (LRU por ruta y mtime) o se toma de su rendición"""
+
+    def setUp(self):
+        super().setUp()
+        pdf._logo_reducido.cache_clear()
+        self.addCleanup(pdf._logo_reducido.cache_clear)
+
+    def test_reduce_una_vez_por_version_del_archivo(self):
+        convocatoria = self.crear(logo_ayuntamiento=png((1200, 600)))
+        with PILImage.open(pdf.logo_para_pdf(convocatoria.logo_ayuntamiento)) as logo:
+            self.assertEqual(logo.size, pdf.LOGO_MAXIMO)
+        pdf.logo_para_pdf(convocatoria.logo_ayuntamiento)
+        self.assertEqual(pdf._logo_reducido.cache_info()[:2], (1, 1))
+
+        ruta = convocatoria.logo_ayuntamiento.path
+        os.utime(ruta, ns=(time.time_ns(), os.stat(ruta).st_mtime_ns + 1))
+        pdf.logo_para_pdf(convocatoria.logo_ayuntamiento)
+        self.assertEqual(pdf._logo_reducido.cache_info()[:2], (1, 2))
+
+    def test_usa_la_rendicion(self):
+        convocatoria = self.crear(logo_ayuntamiento=png((1200, 600)))
+        imagenes.procesar_imagenes(convocatoria.id)
+        convocatoria.refresh_from_db()
+        pdf.logo_para_pdf(convocatoria.logo_ayuntamiento)
+        self.assertEqual(pdf._logo_reducido.cache_info().misses, 0)
+
+    def test_logo_ilegible(self):
+        convocatoria = self.crear(logo_ayuntamiento=SimpleUploadedFile('logo.png', b'no es una imagen'))
+        self.assertIsNone(pdf.logo_para_pdf(convocatoria.logo_ayuntamiento))
+
+
+# ==================== FACETAS DEL FILTRO ====================
+@override_settings(ROOT_URLCONF=__name__)
+class FacetasTests(AisladoMixin, TestCase):
+    """Conteos por faceta que respetan las demás selecciones, en caché hasta la siguiente escritura"""
+
+    def setUp(self):
+        super().setUp()
+        facetas.invalidar()
+        for deporte, categoria in (('Fútbol', 'Libre'), ('Fútbol', 'Libre'), ('Fútbol', 'Juvenil'), ('Voleibol', 'Libre')):
+            self.crear(deporte=deporte, categoria=categoria)
+
+    def conteos(self, **params):
+        resultado = facetas.contar_facetas(Convocatoria.objects.activas(), params)
+        return {campo: {opcion['valor']: opcion['total'] for opcion in opciones} for campo, opciones in resultado.items()}
+
+    def test_conteos_respetan_las_otras_selecciones(self):
+        conteos = self.conteos(categoria='libre')
+        self.assertEqual(conteos['deporte'], {'Fútbol': 2, 'Voleibol': 1})
+        self.assertEqual(conteos['categoria'], {'Juvenil': 1, 'Libre': 3})
+        self.assertEqual(self.conteos(deporte='Voleibol', categoria='Juvenil')['categoria'], {'Juvenil': 0, 'Libre': 1})
+
+    def test_seleccion_sin_resultados_se_conserva(self):
+        opciones = facetas.contar_facetas(Convocatoria.objects.activas(), {'deporte': 'Ajedrez'})['deporte']
+        self.assertEqual(opciones[0], {'valor': 'Ajedrez', 'total': 0, 'seleccionado': True})
+
+    def test_cache_hasta_la_siguiente_escritura(self):
+        self.conteos()
+        with self.assertNumQueries(0):
+            self.assertEqual(self.conteos(deporte='Fútbol')['deporte'], {'Fútbol': 3, 'Voleibol': 1})
+        self.crear(deporte='Voleibol')
+        self.assertEqual(self.conteos()['deporte'], {'Fútbol': 3, 'Voleibol': 2})
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'facetas-default'},
+            'facetas': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'facetas'},
+        },
+        CONVOCATORIAS_FACETAS_CACHE='facetas'
+    )
+    def test_alias_de_cache(self):
+        self.conteos()
+        self.assertIsNotNone(caches['facetas'].get(facetas.VERSION))
+        self.assertIsNone(caches['default'].get(facetas.VERSION))
+        with self.assertNumQueries(0):
+            self.conteos()
+        self.crear(deporte='Voleibol')
+        self.assertEqual(self.conteos()['deporte'], {'Fútbol': 3, 'Voleibol': 2})
+
+
+# ==================== BORRADORES DE LA VISTA PREVIA ====================
+@override_settings(ROOT_URLCONF=__name__)
+class BorradoresTests(AisladoMixin, TestCase):
+    """La vista previa valida una vez y guarda un borrador; confirmar solo envía su token"""
+
+    def vista_previa(self):
+        datos = benchmarks._datos_formulario(random.Random(1))
+        datos['logo_ayuntamiento'] = png()
+        response = self.client.post(reverse('convocatorias:preview'), datos)
+        self.assertEqual(response.status_code, 200)
+        return datos, response.context['borrador']
+
+    def test_confirmar_guarda_una_sola_vez(self):
+        datos, token = self.vista_previa()
+        self.assertFalse(Convocatoria.objects.exists())
+        response = self.client.get(reverse('convocatorias:imagen_borrador', args=[token, 'logo_ayuntamiento']))
+        self.assertEqual(response.status_code, 200)
+        response.close()
+
+        response = self.client.post(reverse('convocatorias:confirmar'), {'borrador': token})
+        self.assertRedirects(response, reverse('convocatorias:edit'), fetch_redirect_response=False)
+        convocatoria = Convocatoria.objects.get()
+        self.assertEqual(convocatoria.nombre, datos['nombre'])
+        self.assertTrue(convocatoria.logo_ayuntamiento)
+
+        # Un doble envío no crea otra convocatoria
+        response = self.client.post(reverse('convocatorias:confirmar'), {'borrador': token})
+        self.assertIn("expiró", response.context['error'])
+        self.assertEqual(Convocatoria.objects.count(), 1)
+
+    def test_imagenes_expiradas(self):
+        _datos, token = self.vista_previa()
+        subidas.limpiar(edad_maxima=-1)
+        response = self.client.post(reverse('convocatorias:confirmar'), {'borrador': token})
+        self.assertIn("imágenes", response.context['error'])
+        self.assertFalse(Convocatoria.objects.exists())
+
+    @override_settings(
+        CACHES={
+            'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'default'},
+            'borradores': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'borradores'},
+        },
+        CONVOCATORIAS_BORRADORES_CACHE='borradores'
+    )
+    def test_alias_de_cache(self):
+        _datos, token = self.vista_previa()
+        llave = f"convocatorias:borrador:{token}"
+        self.assertIsNotNone(caches['borradores'].get(llave))
+        self.assertIsNone(caches['default'].get(llave))
+
+        response = self.client.post(reverse('convocatorias:confirmar'), {'borrador': token})
+        self.assertEqual(response.status_code, 302)
+        self.assertIsNone(caches['borradores'].get(llave))
+
+
+# ==================== CACHÉ DE FRAGMENTOS ====================
+@override_settings(ROOT_URLCONF=__name__)
+class FragmentosTests(AisladoMixin, TestCase):
+    """El HTML de cada fila se guarda por id y updated_at, con desalojo LRU por tamaño"""
+
+    def setUp(self):
+        super().setUp()
+        self.cache = fragmentos.CacheFragmentos(params={'TIMEOUT': None, 'OPTIONS': {'MAX_ENTRIES': 100}})
+        parche = mock.patch.object(fragmentos, '_cache', self.cache)
+        parche.start()
+        self.addCleanup(parche.stop)
+
+    def test_fragmento_cambia_con_updated_at(self):
+        plantilla = Template("{% load convocatorias_fragmentos %}{% fragmento 'fila' c %}{{ c.nombre }}{% endfragmento %}")
+        convocatoria = self.crear()
+        self.assertEqual(plantilla.render(Context({'c': convocatoria})), "Liga municipal")
+
+        # Sin guardar, updated_at es el mismo: se sirve el HTML en caché
+        convocatoria.nombre = "Copa de invierno"
+        self.assertEqual(plantilla.render(Context({'c': convocatoria})), "Liga municipal")
+        convocatoria.save()
+        self.assertEqual(plantilla.render(Context({'c': convocatoria})), "Copa de invierno")
+        self.assertEqual((self.cache.aciertos, self.cache.fallos), (1, 2))
+
+    def test_desaloja_lo_menos_usado_por_tamano(self):
+        cache = fragmentos.CacheFragmentos(params={'OPTIONS': {'MAX_BYTES': 250}})
+        for llave in 'abc':
+            cache.set(llave, 'x' * 50)
+        cache.get('a')
+        cache.set('d', 'x' * 50)
+        self.assertEqual([llave for llave in 'abcd' if cache.has_key(llave)], ['a', 'c', 'd'])
+        self.assertEqual(cache.estadisticas()['desalojos'], 1)
+        self.assertLessEqual(cache.estadisticas()['bytes'], 250)
+
+    def test_estadisticas(self):
+        response = self.client.get(reverse('convocatorias:estadisticas_fragmentos'))
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('aciertos', response.json()['cache'])
+
+
+# ==================== API JSON ====================
+@override_settings(ROOT_URLCONF=__name__)
+class APITests(AisladoMixin, TestCase):
+    """Listado paginado por cursor y detalle, con campos a elegir y revalidación por ETag"""
+
+    def test_listado_paginado_con_campos(self):
+        hoy = date.today()
+        convocatorias = [self.crear(nombre=f"Liga {dias}", fecha_inicio_torneo=hoy + timedelta(days=dias)) for dias in range(3)]
+        url = reverse('convocatorias:api_convocatorias')
+
+        datos = self.client.get(url, {'campos': 'nombre', 'limite': 2}).json()
+        self.assertEqual(datos['total'], 3)
+        self.assertEqual(datos['resultados'], [
+            {'id': convocatorias[2].id, 'nombre': "Liga 2"},
+            {'id': convocatorias[1].id, 'nombre': "Liga 1"},
+        ])
+        datos = self.client.get(datos['siguiente']).json()
+        self.assertEqual(datos['resultados'], [{'id': convocatorias[0].id, 'nombre': "Liga 0"}])
+        self.assertIsNone(datos['siguiente'])
+
+    def test_304_hasta_que_algo_cambia(self):
+        convocatoria = self.crear()
+        for url in (reverse('convocatorias:api_convocatorias'), reverse('convocatorias:api_convocatoria', args=[convocatoria.id])):
+            with self.subTest(url=url):
+                etag = self.client.get(url)['ETag']
+                with self.assertNumQueries(1):
+                    self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+                convocatoria.save()
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_detalle_con_imagen(self):
+        convocatoria = self.crear(logo_ayuntamiento=png(), costo_inscripcion='250.50')
+        url = reverse('convocatorias:api_convocatoria', args=[convocatoria.id])
+        datos = self.client.get(url, {'campos': 'logo_ayuntamiento,costo_inscripcion'}).json()
+        self.assertEqual(datos['costo_inscripcion'], '250.50')
+        self.assertEqual(datos['logo_ayuntamiento'], convocatoria.logo_ayuntamiento.url)
+
+        imagenes.procesar_imagenes(convocatoria.id)
+        datos = self.client.get(url, {'campos': 'logo_ayuntamiento'}).json()
+        self.assertIn(imagenes.DIRECTORIO, datos['logo_ayuntamiento'])
+
+    def test_parametros_invalidos(self):
+        url = reverse('convocatorias:api_convocatorias')
+        self.assertEqual(self.client.get(url, {'campos': 'rendiciones'}).status_code, 400)
+        self.assertEqual(self.client.get(url, {'limite': 'muchos'}).status_code, 400)
+        self.assertEqual(self.client.get(reverse('convocatorias:api_convocatoria', args=[0])).status_code, 404)
+
+
+# ==================== MÉTRICAS ====================
+@override_settings(
+    ROOT_URLCONF=__name__,
+    CONVOCATORIAS_METRICAS=True,
+    MIDDLEWARE=[*settings.MIDDLEWARE, 'applications.convocatorias.middleware.MetricasMiddleware'],
+)
+class MetricasTests(AisladoMixin, TestCase):
+    """Server-Timing por petición e histogramas por vista en formato Prometheus"""
+
+    def test_server_timing_y_histogramas(self):
+        self.crear()
+        response = self.client.get(reverse('convocatorias:api_convocatorias'))
+        self.assertRegex(response['Server-Timing'], r'^sql;dur=[\d.]+;desc="2 consultas", total;dur=[\d.]+$')
+
+        texto = self.client.get(reverse('convocatorias:metricas')).content.decode()
+        self.assertIn('convocatorias_sql_consultas_bucket{vista="convocatorias:api_convocatorias",le="2"}', texto)
+        self.assertIn('convocatorias_respuesta_bytes_count{vista="convocatorias:api_convocatorias"}', texto)
+
+    async def test_vistas_async_cuentan_sus_consultas(self):
+        await Convocatoria.objects.acreate(nombre="Liga municipal", deporte='Fútbol')
+        response = await AsyncClient().get(reverse('convocatorias:filtro'))
+        consultas = int(re.search(r'desc="(\d+) consultas"', response['Server-Timing']).group(1))
+        self.assertGreater(consultas, 0)
+
+    def test_histograma_acumulado(self):
+        histograma = metricas.Histograma('prueba_segundos', "Prueba", (0.1, 1))
+        for valor in (0.05, 0.5, 0.7, 3):
+            histograma.observar('v', valor)
+        self.assertEqual(histograma.exponer()[2:], [
+            'prueba_segundos_bucket{vista="v",le="0.1"} 1',
+            'prueba_segundos_bucket{vista="v",le="1"} 3',
+            'prueba_segundos_bucket{vista="v",le="+Inf"} 4',
+            'prueba_segundos_sum{vista="v"} 4.25',
+            'prueba_segundos_count{vista="v"} 4',
+        ])
+
+    def test_apagadas(self):
+        with override_settings(CONVOCATORIAS_METRICAS=False):
+            self.assertEqual(self.client.get(reverse('convocatorias:metricas')).status_code, 404)
@@ -6,13 +6,32 @@ app_name = 'convocatorias'
 urlpatterns = [
     path('create/', views.crear_convocatoria, name='create'),
     path('preview/', views.preview_convocatoria, name='preview'),
+    path('confirmar/', views.confirmar_convocatoria, name='confirmar'),
+    path('borrador/<str:token>/imagen/<str:campo>/', views.imagen_borrador, name='imagen_borrador'),
     path('edit/', views.seleccionar_convocatoria, name='edit'),
     path('edit/<int:id>/', views.editar_convocatoria, name='editar_convocatoria'),
     path('delete/', views.eliminar_convocatoria, name='delete'), 
+    path('importar/', views.importar_convocatorias, name='importar'),
     path('filtro/', views.filtro, name='filtro'),
+    path('filtro/exportar/', views.exportar_convocatorias, name='exportar'),
     path('tools/', views.tools, name='tools'),
+    path('tools/fragmentos/', views.estadisticas_fragmentos, name='estadisticas_fragmentos'),
+    path('metricas/', views.exponer_metricas, name='metricas'),
     
     # Rutas para PDF
     path('pdf/seleccionar/', views.seleccionar_pdf, name='seleccionar_pdf'),
     path('pdf/generar/<int:id>/', views.generar_pdf_convocatoria, name='generar_pdf'),
+    path('pdf/estado/<int:id>/', views.estado_pdf_convocatoria, name='estado_pdf'),
+    path('pdf/zip/', views.zip_pdf, name='zip_pdf'),
+
+    # Cartel para redes sociales
+    path('cartel/<int:id>/', views.cartel_convocatoria, name='cartel'),
+
+    # Subidas de imágenes por partes
+    path('subidas/', views.iniciar_subida, name='subidas'),
+    path('subidas/<uuid:subida_id>/', views.subir_bloque, name='subir_bloque'),
+
+    # API JSON de solo lectura
+    path('api/convocatorias/', views.api_convocatorias, name='api_convocatorias'),
+    path('api/convocatorias/<int:id>/', views.api_convocatoria, name='api_convocatoria'),
 ]
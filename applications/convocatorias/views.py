@@ -1,68 +1,119 @@
 #views.py
-from django.shortcuts import render, redirect, get_object_or_404
-from django.db.models import Q, Count
-from django.contrib import messages
-from django.http import HttpResponse
+from asgiref.sync import sync_to_async
+from django.shortcuts import render, redirect, get_object_or_404, aget_object_or_404
+from django.core.files.storage import default_storage
+from django.core.handlers.asgi import ASGIRequest
+from django.http import FileResponse, Http404, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.http import require_http_methods, require_POST
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from .models import Convocatoria
+from .presupuesto import presupuesto
 from .forms import ConvocatoriaForm
+from . import api, borradores, cartel, eliminacion, exportacion, fragmentos, importacion, metricas, subidas
+from .facetas import acontar_facetas
+from .filtros import apagina_de_resultados, filtrar_convocatorias, pagina_de_resultados
 
 # Importaciones para PDF
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, Image
-from reportlab.lib.enums import TA_CENTER, TA_JUSTIFY
-from io import BytesIO
-import os
+from .cache import clave_pdf, obtener_backend
+from .tareas import PoolSaturado, apdf_construido, estado_pdf, procesos_pdf, reintentar_en
+from .zip_pdf import generar_zip
+
+RESULTADOS_POR_PAGINA = 20
+
+# @presupuesto(n): consultas máximas de cada vista con su plantilla, sin
+# importar cuántas filas muestre (ver presupuesto.py)
 
 # ==================== CREAR ====================
+@presupuesto(3)
 def crear_convocatoria(request):
     if request.method == "POST":
         form = ConvocatoriaForm(request.POST, request.FILES)
         
         if "preview" in request.POST:
-            if form.is_valid():
-                convocatoria_preview = form.cleaned_data
-                return render(request, 'preview.html', {
-                    'convocatoria': convocatoria_preview,
-                    'accion': 'Vista Previa'
-                })
-        else:
-            if form.is_valid():
-                form.save()
-                return render(request, 'preview.html', {'accion': 'Crear'})
+            return _vista_previa(request, form)
+        if form.is_valid():
+            convocatoria = form.save()
+            return render(request, 'preview.html', {'convocatoria': convocatoria, 'accion': 'Crear'})
     else:
         form = ConvocatoriaForm()
     
     return render(request, 'create.html', {'form': form, 'accion': 'Crear'})
 
 # ==================== VISTA PREVIA ================== #
+@presupuesto(0)
 def preview_convocatoria(request):
     if request.method != 'POST':
         return redirect('convocatorias:create')
 
-    form = ConvocatoriaForm(request.POST, request.FILES)
+    return _vista_previa(request, ConvocatoriaForm(request.POST, request.FILES))
 
+def _vista_previa(request, form):
+    """
+    Valida una sola vez y guarda el resultado como borrador en el servidor.
+    Confirmar solo envía el token del borrador
+    """
     if not form.is_valid():
         return render(request, 'create.html', {
             'form': form,
             'accion': 'Crear'
         })
 
+    token = borradores.guardar(form)
+    borrador = borradores.cargar(token)
     return render(request, 'preview.html', {
-        'convocatoria': form.cleaned_data
+        'convocatoria': borradores.instancia(borrador),
+        'borrador': token,
+        'imagenes': {
+            campo: reverse('convocatorias:imagen_borrador', args=[token, campo])
+            for campo in borrador['archivos']
+        },
     })
 
+@require_POST
+@presupuesto(5)
+def confirmar_convocatoria(request):
+    """Guarda la convocatoria del borrador de la vista previa"""
+    try:
+        borradores.confirmar(request.POST.get('borrador'))
+    except borradores.BorradorExpirado as exc:
+        return render(request, 'create.html', {
+            'form': ConvocatoriaForm(),
+            'accion': 'Crear',
+            'error': str(exc)
+        })
+    return redirect('convocatorias:edit')
+
+@presupuesto(0)
+def imagen_borrador(request, token, campo):
+    """Imagen de un borrador, para mostrarla en la vista previa"""
+    borrador = borradores.cargar(token)
+    subida_id = borrador['archivos'].get(campo) if borrador else None
+    archivo = subidas.abrir(subida_id) if subida_id else None
+    if archivo is None:
+        raise Http404("La imagen de la vista previa ya no existe")
+    return FileResponse(archivo)
+
 # ==================== EDITAR ====================
-def seleccionar_convocatoria(request):
-    convocatorias = Convocatoria.objects.filter(activa=True)
-    return render(request, 'edit.html', {
+# Los listados y el PDF son vistas async: bajo ASGI no ocupan un hilo
+# mientras esperan a la base o al pool de procesos. Las listas se leen
+# completas antes de renderizar; la plantilla (y la caché de fragmentos que
+# usa) es síncrona y se renderiza en un hilo con arender()
+async def arender(request, plantilla, contexto):
+    return await sync_to_async(render)(request, plantilla, contexto)
+
+
+@presupuesto(1)
+async def seleccionar_convocatoria(request):
+    convocatorias = [c async for c in Convocatoria.objects.activas().proyeccion('edicion')]
+    return await arender(request, 'edit.html', {
         'convocatorias': convocatorias
     })
 
+@presupuesto(4)
 def editar_convocatoria(request, id):
-    convocatoria = get_object_or_404(Convocatoria, id=id)
+    convocatoria = get_object_or_404(Convocatoria.objects.activas(), id=id)
 
     if request.method == 'POST':
         form = ConvocatoriaForm(request.POST, request.FILES, instance=convocatoria)
@@ -81,250 +132,416 @@ def editar_convocatoria(request, id):
 
 
 # ==================== ELIMINAR ====================
+@presupuesto(4)
 def eliminar_convocatoria(request):
+    """
+    Baja lógica por id de las convocatorias seleccionadas: dejan de aparecer
+    en los listados y purgar_convocatorias las borra después junto con sus
+    imágenes. El listado se puede acotar con `kword`
+    """
     context = {}
 
     if request.method == 'POST':
-        kword = request.POST.get('kword', '').strip()
+        ids = [valor for valor in request.POST.getlist('ids') if valor.isdigit()]
+        if ids:
+            eliminadas = eliminacion.dar_de_baja(ids)
+            context['mensaje'] = f"{eliminadas} convocatoria(s) eliminada(s) correctamente."
+        else:
+            context['error'] = "Selecciona al menos una convocatoria."
 
-        if kword:
+    convocatorias, siguiente = pagina_de_resultados(
+        Convocatoria.objects.activas().proyeccion('pdf'),
+        request.GET,
+        RESULTADOS_POR_PAGINA
+    )
+    context.update({
+        'convocatorias': convocatorias,
+        'siguiente': siguiente,
+        'query': request.GET.get('kword', ''),
+    })
+    return render(request, 'delete.html', context)
+
+# ==================== IMPORTAR ====================
+@presupuesto(2)
+def importar_convocatorias(request):
+    """
+    Importa un CSV o XLSX de convocatorias (ver importacion.py). El archivo
+    se lee por filas y se guarda por lotes; se informan los errores por fila
+    """
+    resultado = None
+    error = None
+    if request.method == "POST":
+        archivo = request.FILES.get('archivo')
+        if archivo is None:
+            error = "Selecciona un archivo CSV o XLSX"
+        else:
             try:
-                convocatoria = Convocatoria.objects.get(nombre__iexact=kword)
-                convocatoria.delete()
-                context['mensaje'] = f"Convocatoria '{kword}' eliminada correctamente."
-            except Convocatoria.DoesNotExist:
-                context['error'] = f"No se encontró la convocatoria '{kword}'."
-            except Convocatoria.MultipleObjectsReturned:
-                context['error'] = "Hay varias convocatorias con ese nombre."
+                resultado = importacion.importar(
+                    importacion.leer_filas(archivo, archivo.name),
+                    omitir_errores=bool(request.POST.get('omitir_errores'))
+                )
+            except importacion.ImportacionInvalida as exc:
+                error = str(exc)
 
-    return render(request, 'delete.html', context)
+    return render(request, 'importar.html', {
+        'resultado': resultado,
+        'error': error,
+    })
 
 # ==================== FILTRO/BUSCAR ====================
-def filtro(request):
+@presupuesto(3)
+async def filtro(request):
     query = request.GET.get('kword', '')
     deporte = request.GET.get('deporte', '')
     categoria = request.GET.get('categoria', '')
     estado = request.GET.get('estado', '')
+    abiertas = bool(request.GET.get('abiertas'))
     
-    convocatorias = Convocatoria.objects.filter(activa=True)
-    
-    if query:
-        convocatorias = convocatorias.filter(
-            Q(nombre__icontains=query) |
-            Q(deporte__icontains=query) |
-            Q(descripcion__icontains=query)
-        )
-    
-    if deporte:
-        convocatorias = convocatorias.filter(deporte__iexact=deporte)
-    
-    if categoria:
-        convocatorias = convocatorias.filter(categoria__iexact=categoria)
-    
-    if estado:
-        convocatorias = convocatorias.filter(estado__iexact=estado)
+    convocatorias, siguiente = await apagina_de_resultados(
+        Convocatoria.objects.activas().proyeccion('filtro'),
+        request.GET,
+        RESULTADOS_POR_PAGINA
+    )
     
-    deportes = Convocatoria.objects.filter(activa=True).values_list('deporte', flat=True).distinct()
-    categorias = Convocatoria.objects.filter(activa=True).values_list('categoria', flat=True).distinct()
-    estados = Convocatoria.objects.filter(activa=True).values_list('estado', flat=True).distinct()
+    # Valores de las listas con su conteo: una consulta, o ninguna si están en caché
+    facetas = await acontar_facetas(Convocatoria.objects.activas(), request.GET)
     
-    return render(request, 'filtro.html', {
+    return await arender(request, 'filtro.html', {
         'convocatorias': convocatorias,
-        'deportes': deportes,
-        'categorias': categorias,
-        'estados': estados,
+        'siguiente': siguiente,
+        'deportes': facetas['deporte'],
+        'categorias': facetas['categoria'],
+        'estados': facetas['estado'],
         'query': query,
         'deporte_selected': deporte,
         'categoria_selected': categoria,
         'estado_selected': estado,
+        'abiertas_selected': abiertas,
     })
 
 # ==================== HERRAMIENTAS ====================
+@presupuesto(0)
 def tools(request):
     return render(request,'tools.html')
 
+@presupuesto(0)
+def estadisticas_fragmentos(request):
+    """
+    Aciertos y fallos de la caché de fragmentos de este proceso, y el tiempo
+    de plantilla que se estima ahorrado
+    """
+    return JsonResponse(fragmentos.estadisticas())
+
+@presupuesto(0)
+def exponer_metricas(request):
+    """
+    Histogramas de las peticiones en formato de texto de Prometheus. Solo
+    existe si CONVOCATORIAS_METRICAS está encendido
+    """
+    if not metricas.habilitadas():
+        raise Http404
+    return HttpResponse(metricas.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
 # ==================== GENERAR PDF ====================
-def generar_pdf_convocatoria(request, id):
+# Bajo ASGI Django lee completo un iterador síncrono antes de enviarlo: el
+# archivo se entrega por bloques leídos en un hilo
+BLOQUE_PDF = 64 * 1024
+
+
+async def _bloques(archivo):
+    leer = sync_to_async(archivo.read, thread_sensitive=False)
+    while bloque := await leer(BLOQUE_PDF):
+        yield bloque
+
+
+def _respuesta_pdf(request, pdf, nombre):
+    response = FileResponse(pdf, as_attachment=True, filename=nombre, content_type='application/pdf')
+    if isinstance(request, ASGIRequest):
+        response.streaming_content = _bloques(pdf)
+    return response
+
+
+_FIN = object()
+
+
+async def _en_hilo(contenido):
     """
-    Genera un PDF con el formato oficial de la convocatoria
+    Entrega un generador síncrono que consulta la base (ZIP, CSV) avanzándolo
+    en el hilo de sync_to_async, un bloque a la vez
     """
-    convocatoria = get_object_or_404(Convocatoria, id=id)
-    
-    # Crear el objeto HttpResponse con el tipo de contenido PDF
-    response = HttpResponse(content_type='application/pdf')
-    response['Content-Disposition'] = f'attachment; filename="convocatoria_{convocatoria.nombre}.pdf"'
-    
-    # Crear el PDF
-    buffer = BytesIO()
-    doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    
-    # Contenedor de elementos
-    elementos = []
-    
-    # Estilos
-    styles = getSampleStyleSheet()
-    style_title = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1a5490'),
-        alignment=TA_CENTER,
-        spaceAfter=12
-    )
-    style_subtitle = ParagraphStyle(
-        'CustomSubtitle',
-        parent=styles['Heading2'],
-        fontSize=12,
-        textColor=colors.HexColor('#2c5aa0'),
-        spaceAfter=10
-    )
-    style_normal = ParagraphStyle(
-        'CustomNormal',
-        parent=styles['Normal'],
-        fontSize=10,
-        alignment=TA_JUSTIFY,
-        spaceAfter=6
-    )
-    
-    # Logo del ayuntamiento (si existe)
-    if convocatoria.logo_ayuntamiento:
+    siguiente = sync_to_async(next)
+    try:
+        while (bloque := await siguiente(contenido, _FIN)) is not _FIN:
+            yield bloque
+    finally:
+        await sync_to_async(contenido.close)()
+
+
+def _respuesta_por_partes(request, contenido, **kwargs):
+    """StreamingHttpResponse que bajo ASGI no se lee completo antes de enviarse"""
+    if isinstance(request, ASGIRequest):
+        contenido = _en_hilo(contenido)
+    return StreamingHttpResponse(contenido, **kwargs)
+
+@presupuesto(1)
+async def generar_pdf_convocatoria(request, id):
+    """
+    Genera un PDF con el formato oficial de la convocatoria.
+    El PDF se sirve desde la caché mientras no cambie la convocatoria ni su
+    logo. Si hay que construirlo se hace en el pool de procesos; con el
+    pool saturado se responde 503 con Retry-After
+    """
+    convocatoria = await aget_object_or_404(Convocatoria.objects.activas(), id=id)
+
+    clave = await sync_to_async(clave_pdf, thread_sensitive=False)(convocatoria)
+    etag = f'"{clave}"'
+    last_modified = int(convocatoria.updated_at.timestamp())
+
+    # 304 si el cliente ya tiene esta versión
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    pdf = await sync_to_async(obtener_backend().abrir, thread_sensitive=False)(clave)
+    if pdf is None:
         try:
-            logo_path = convocatoria.logo_ayuntamiento.path
-            img = Image(logo_path, width=2*inch, height=1*inch)
-            img.hAlign = 'CENTER'
-            elementos.append(img)
-            elementos.append(Spacer(1, 0.2*inch))
-        except:
-            pass
-    
-    # Título principal
-    titulo = Paragraph(f"<b>CONVOCATORIA</b><br/>{convocatoria.nombre.upper()}", style_title)
-    elementos.append(titulo)
-    elementos.append(Spacer(1, 0.2*inch))
-    
-    # Institución responsable
-    institucion = Paragraph(f"<b>{convocatoria.institucion_responsable}</b>", style_normal)
-    institucion.hAlign = 'CENTER'
-    elementos.append(institucion)
-    elementos.append(Spacer(1, 0.3*inch))
-    
-    # Información básica en tabla
-    info_data = [
-        ['Deporte:', convocatoria.deporte],
-        ['Categoría:', convocatoria.categoria],
-        ['Rama:', convocatoria.rama],
-        ['Fecha de Inicio:', convocatoria.fecha_inicio_torneo.strftime('%d/%m/%Y')],
-        ['Fecha Límite Inscripción:', convocatoria.fecha_limite_inscripcion.strftime('%d/%m/%Y')],
-        ['Estado:', convocatoria.estado],
-    ]
-    
-    tabla_info = Table(info_data, colWidths=[2.5*inch, 4*inch])
-    tabla_info.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e6f2ff')),
-        ('TEXTCOLOR', (0, 0), (-1, -1), colors.black),
-        ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTNAME', (1, 0), (1, -1), 'Helvetica'),
-        ('FONTSIZE', (0, 0), (-1, -1), 10),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
-        ('TOPPADDING', (0, 0), (-1, -1), 4),
-        ('BOTTOMPADDING', (0, 0), (-1, -1), 4),
-    ]))
-    
-    elementos.append(tabla_info)
-    elementos.append(Spacer(1, 0.2*inch))
-    
-    # Descripción
-    if convocatoria.descripcion:
-        elementos.append(Paragraph("<b>DESCRIPCIÓN</b>", style_subtitle))
-        elementos.append(Paragraph(convocatoria.descripcion, style_normal))
-        elementos.append(Spacer(1, 0.15*inch))
-    
-    # Sistema de competencia
-    if convocatoria.sistema_competencia:
-        elementos.append(Paragraph("<b>SISTEMA DE COMPETENCIA</b>", style_subtitle))
-        elementos.append(Paragraph(convocatoria.sistema_competencia, style_normal))
-        elementos.append(Spacer(1, 0.15*inch))
-    
-    # Requisitos
-    if convocatoria.requisitos:
-        elementos.append(Paragraph("<b>REQUISITOS</b>", style_subtitle))
-        elementos.append(Paragraph(convocatoria.requisitos, style_normal))
-        elementos.append(Spacer(1, 0.15*inch))
-    
-    # Inscripciones
-    elementos.append(Paragraph("<b>INSCRIPCIONES</b>", style_subtitle))
-    inscripcion_data = [
-        ['Costo:', f"${convocatoria.costo_inscripcion}"],
-    ]
-    if convocatoria.lugar_inscripcion:
-        inscripcion_data.append(['Lugar:', convocatoria.lugar_inscripcion])
-    if convocatoria.forma_pago:
-        inscripcion_data.append(['Forma de pago:', convocatoria.forma_pago])
-    
-    tabla_inscripcion = Table(inscripcion_data, colWidths=[2*inch, 4.5*inch])
-    tabla_inscripcion.setStyle(TableStyle([
-        ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ('LEFTPADDING', (0, 0), (-1, -1), 6),
-    ]))
-    elementos.append(tabla_inscripcion)
-    elementos.append(Spacer(1, 0.15*inch))
-    
-    # Premiación
-    if convocatoria.premiacion_primero:
-        elementos.append(Paragraph("<b>PREMIACIÓN</b>", style_subtitle))
-        premiacion_items = []
-        if convocatoria.premiacion_primero:
-            premiacion_items.append(f"🥇 <b>1er Lugar:</b> {convocatoria.premiacion_primero}")
-        if convocatoria.premiacion_segundo:
-            premiacion_items.append(f"🥈 <b>2do Lugar:</b> {convocatoria.premiacion_segundo}")
-        if convocatoria.premiacion_tercero:
-            premiacion_items.append(f"🥉 <b>3er Lugar:</b> {convocatoria.premiacion_tercero}")
-        
-        for item in premiacion_items:
-            elementos.append(Paragraph(item, style_normal))
-        elementos.append(Spacer(1, 0.15*inch))
-    
-    # Comité organizador
-    if convocatoria.comite_organizador:
-        elementos.append(Paragraph("<b>COMITÉ ORGANIZADOR</b>", style_subtitle))
-        elementos.append(Paragraph(convocatoria.comite_organizador, style_normal))
-        elementos.append(Spacer(1, 0.15*inch))
-    
-    # Contacto
-    elementos.append(Paragraph("<b>INFORMACIÓN DE CONTACTO</b>", style_subtitle))
-    contacto_text = ""
-    if convocatoria.direccion:
-        contacto_text += f"<b>Dirección:</b> {convocatoria.direccion}<br/>"
-    if convocatoria.telefono:
-        contacto_text += f"<b>Teléfono:</b> {convocatoria.telefono}<br/>"
-    if convocatoria.correo:
-        contacto_text += f"<b>Correo:</b> {convocatoria.correo}"
-    
-    elementos.append(Paragraph(contacto_text, style_normal))
-    
-    # Construir PDF
-    doc.build(elementos)
-    
-    # Obtener el valor del buffer y escribirlo en la respuesta
-    pdf = buffer.getvalue()
-    buffer.close()
-    response.write(pdf)
-    
+            # ReportLab corre en otro proceso: aquí se mide la espera
+            with metricas.medir('pdf'):
+                pdf = await apdf_construido(convocatoria, clave)
+        except PoolSaturado:
+            response = JsonResponse({'error': "Hay demasiados PDF en construcción, intenta de nuevo"}, status=503)
+            response['Retry-After'] = str(reintentar_en())
+            return response
+
+    # FileResponse envía el archivo por bloques y lo cierra al terminar
+    response = _respuesta_pdf(request, pdf, f"convocatoria_{convocatoria.nombre}.pdf")
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(last_modified)
+
+    return response
+
+@presupuesto(1)
+async def estado_pdf_convocatoria(request, id):
+    """
+    Estado del pre-renderizado en segundo plano del PDF de la convocatoria
+    """
+    convocatoria = await aget_object_or_404(Convocatoria.objects.activas().only('id'), id=id)
+    return JsonResponse({
+        'id': convocatoria.id,
+        'tarea': estado_pdf(convocatoria.id),
+    })
+
+# ==================== CARTEL ====================
+@presupuesto(1)
+def cartel_convocatoria(request, id):
+    """
+    Cartel para redes sociales (`tamano` cuadrado o historia, `formato` png
+    o jpg), con el mismo contenido que la vista previa y el PDF. Se compone
+    una sola vez por contenido y después se sirve del almacenamiento
+    """
+    formato = request.GET.get('formato', 'png')
+    tamano = request.GET.get('tamano', 'cuadrado')
+    if formato not in cartel.FORMATOS:
+        return JsonResponse({'error': f"Formato no soportado: {formato}"}, status=400)
+    if tamano not in cartel.TAMANOS:
+        return JsonResponse({'error': f"Tamaño no soportado: {tamano}"}, status=400)
+    convocatoria = get_object_or_404(Convocatoria.objects.activas(), id=id)
+
+    clave = cartel.llave(convocatoria, tamano, formato)
+    etag = f'"{clave}"'
+    response = get_conditional_response(request, etag=etag)
+    if response is not None:
+        return response
+
+    response = FileResponse(
+        default_storage.open(cartel.obtener_cartel(convocatoria, tamano, formato, clave), 'rb'),
+        as_attachment=True,
+        filename=f"cartel_{convocatoria.id}_{tamano}.{formato}",
+        content_type=cartel.FORMATOS[formato][1]
+    )
+    response['ETag'] = etag
     return response
 
 # ==================== SELECCIONAR CONVOCATORIA PARA PDF ====================
-def seleccionar_pdf(request):
+@presupuesto(1)
+async def seleccionar_pdf(request):
     """
     Vista para seleccionar qué convocatoria convertir a PDF
     """
-    convocatorias = Convocatoria.objects.filter(activa=True).order_by('-created_at')
-    return render(request, 'seleccionar_pdf.html', {
+    convocatorias = [c async for c in Convocatoria.objects.activas().proyeccion('pdf').order_by('-created_at')]
+    return await arender(request, 'seleccionar_pdf.html', {
         'convocatorias': convocatorias
-    })
\ No newline at end of file
+    })
+
+# ==================== DESCARGAR PDF EN ZIP ====================
+@presupuesto(1)
+def zip_pdf(request):
+    """
+    Descarga en un ZIP los PDF de las convocatorias activas que cumplan los
+    filtros (deporte, categoria, estado, desde, hasta). El ZIP se envía
+    conforme se van construyendo los PDF
+    """
+    convocatorias = filtrar_convocatorias(Convocatoria.objects.activas(), request.GET)
+    lista = list(convocatorias.order_by('-created_at').values_list('id', 'nombre'))
+
+    response = _respuesta_por_partes(
+        request,
+        generar_zip(lista, Convocatoria.objects.activas(), ventana=2 * procesos_pdf()),
+        content_type='application/zip'
+    )
+    response['Content-Disposition'] = 'attachment; filename="convocatorias.zip"'
+    return response
+
+# ==================== SUBIDAS POR PARTES ====================
+@require_POST
+@presupuesto(0)
+def iniciar_subida(request):
+    """
+    Registra la subida por partes de una imagen (`nombre`, `tamano` en
+    bytes). El formulario después solo envía el id de la subida completa
+    """
+    try:
+        estado = subidas.iniciar(request.POST.get('nombre', ''), int(request.POST.get('tamano', 0)))
+    except (ValueError, subidas.SubidaInvalida) as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse({**estado, 'bloque': subidas.TAMANO_BLOQUE}, status=201)
+
+
+@require_http_methods(['GET', 'PUT', 'POST'])
+@presupuesto(0)
+def subir_bloque(request, subida_id):
+    """
+    GET: estado de la subida (para reanudar desde `recibido`).
+    PUT/POST: el cuerpo es un bloque del archivo, con
+    Content-Range: bytes <inicio>-<fin>/<total>
+    """
+    if request.method == 'GET':
+        estado = subidas.estado(subida_id)
+        if estado is None:
+            return JsonResponse({'error': "La subida no existe o ya expiró"}, status=404)
+        return JsonResponse(estado)
+
+    try:
+        unidad, rango = request.headers.get('Content-Range', '').split(' ', 1)
+        inicio, fin = (int(valor) for valor in rango.split('/', 1)[0].split('-', 1))
+        if unidad != 'bytes' or fin < inicio:
+            raise ValueError
+    except ValueError:
+        return JsonResponse({'error': "Content-Range inválido"}, status=400)
+
+    try:
+        # Se lee del stream de la petición, sin cargar el bloque en memoria
+        estado = subidas.agregar(subida_id, inicio, request, fin - inicio + 1)
+    except subidas.DesfaseSubida as exc:
+        return JsonResponse({'error': str(exc), 'recibido': exc.recibido}, status=409)
+    except subidas.SubidaInvalida as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+    return JsonResponse(estado)
+
+# ==================== EXPORTAR ====================
+@presupuesto(1)
+def exportar_convocatorias(request):
+    """
+    Exporta en CSV o XLSX (`formato`) las convocatorias activas que cumplen
+    los filtros de la búsqueda. Las filas se leen por bloques con
+    iterator(), así la memoria no crece con el número de filas
+    """
+    formato = request.GET.get('formato', 'csv')
+    if formato not in exportacion.FORMATOS:
+        return JsonResponse({'error': f"Formato no soportado: {formato}"}, status=400)
+    try:
+        campos, filas = exportacion.filas(Convocatoria.objects.activas(), request.GET)
+    except api.ParametroInvalido as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    if formato == 'csv':
+        response = _respuesta_por_partes(
+            request,
+            exportacion.generar_csv(campos, filas),
+            content_type='text/csv; charset=utf-8'
+        )
+        response['Content-Disposition'] = 'attachment; filename="convocatorias.csv"'
+        return response
+
+    try:
+        archivo = exportacion.generar_xlsx(campos, filas)
+    except exportacion.ExportacionNoDisponible as exc:
+        return JsonResponse({'error': str(exc)}, status=501)
+    return FileResponse(
+        archivo,
+        as_attachment=True,
+        filename='convocatorias.xlsx',
+        content_type='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+    )
+
+# ==================== API JSON ====================
+def _respuesta_api(datos, etag, last_modified):
+    response = JsonResponse(datos)
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+    # El cliente siempre revalida: con If-None-Match recibe 304 si nada cambió
+    response['Cache-Control'] = 'no-cache'
+    return response
+
+@require_http_methods(["GET", "HEAD"])
+@presupuesto(2)
+def api_convocatorias(request):
+    """
+    Listado de convocatorias activas en JSON. Acepta los parámetros del
+    filtro (kword, deporte, categoria, estado, desde, hasta, abiertas),
+    `campos`, `limite` y `cursor`. El ETag depende del max updated_at y del total del
+    conjunto filtrado, así que una consulta de polling sin cambios termina
+    en un 304 después de una sola consulta de agregación
+    """
+    try:
+        convocatorias, campos, tamano = api.listado(Convocatoria.objects.activas(), request.GET)
+    except api.ParametroInvalido as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    ultima, total = api.version_listado(convocatorias)
+    etag = api.etag(ultima.isoformat() if ultima else '', total, sorted(request.GET.lists()))
+    last_modified = int(ultima.timestamp()) if ultima else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    resultados, cursor = api.pagina(convocatorias, campos, request.GET.get('cursor'), tamano)
+    siguiente = None
+    if cursor:
+        params = request.GET.copy()
+        params['cursor'] = cursor
+        siguiente = f"{request.path}?{params.urlencode()}"
+
+    return _respuesta_api({
+        'total': total,
+        'resultados': resultados,
+        'siguiente': siguiente,
+    }, etag, last_modified)
+
+@require_http_methods(["GET", "HEAD"])
+@presupuesto(2)
+def api_convocatoria(request, id):
+    """
+    Detalle de una convocatoria activa en JSON (todos los campos, o los de
+    `campos`). Un 304 solo consulta updated_at
+    """
+    try:
+        campos = api.campos_solicitados(request.GET)
+    except api.ParametroInvalido as exc:
+        return JsonResponse({'error': str(exc)}, status=400)
+
+    activas = Convocatoria.objects.activas()
+    actualizada = activas.filter(id=id).values_list('updated_at', flat=True).first()
+    if actualizada is None:
+        return JsonResponse({'error': "La convocatoria no existe"}, status=404)
+
+    etag = api.etag(id, actualizada.isoformat(), ','.join(campos))
+    last_modified = int(actualizada.timestamp())
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        return response
+
+    convocatoria = get_object_or_404(activas.only(*api.columnas(campos)), id=id)
+    return _respuesta_api(api.serializar(convocatoria, campos), etag, last_modified)
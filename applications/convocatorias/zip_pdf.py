@@ -0,0 +1,105 @@
+#zip_pdf.py
+import io
+import logging
+import shutil
+import zipfile
+from collections import deque
+from itertools import islice
+
+from django.utils.text import slugify
+
+logger = logging.getLogger(__name__)
+
+
+class _SalidaZip(io.RawIOBase):
+    """
+    Destino no "seekable" para zipfile: acumula lo escrito hasta que el
+    generador lo entrega, así nunca se guarda el ZIP completo
+    """
+
+    def __init__(self):
+        self._bloques = []
+
+    def writable(self):
+        return True
+
+    def write(self, datos):
+        self._bloques.append(bytes(datos))
+        return len(datos)
+
+    def vaciar(self):
+        datos = b''.join(self._bloques)
+        self._bloques.clear()
+        return datos
+
+
+def nombre_en_zip(convocatoria_id, nombre):
+    return f"{convocatoria_id}_{slugify(nombre) or 'convocatoria'}.pdf"
+
+
+# ==================== ZIP DE PDF ====================
+def generar_zip(convocatorias, filas, ventana, construcciones=None):
+    """
+    Generador que entrega por partes un ZIP con el PDF de cada
+    convocatoria. `convocatorias` es una lista de (id, nombre); los
+    registros completos se leen de `filas` (queryset) de `ventana` en
+    `ventana` en este proceso. Los PDF que no están en la caché se
+    construyen en el pool de procesos dentro del mismo límite de
+    construcciones en vuelo que las descargas (`construcciones`, por
+    omisión el tareas.ConstruccionesPDF compartido).
+    Como mucho hay `ventana` PDF pendientes; el orden del ZIP es el de la
+    lista y cada PDF se copia al ZIP desde su archivo
+    """
+    from .cache import clave_pdf, obtener_backend
+    from .tareas import obtener_construcciones
+
+    backend = obtener_backend()
+    if construcciones is None:
+        construcciones = obtener_construcciones()
+    salida = _SalidaZip()
+    errores = []
+    pendientes = deque()  # (id, nombre, archivo en caché o None, Future o None)
+    restantes = iter(convocatorias)
+
+    def enviar():
+        lote = list(islice(restantes, ventana - len(pendientes)))
+        por_id = filas.in_bulk([convocatoria_id for convocatoria_id, _nombre in lote]) if lote else {}
+        for convocatoria_id, nombre in lote:
+            convocatoria = por_id.get(convocatoria_id)
+            if convocatoria is None:
+                pendientes.append((convocatoria_id, nombre, None, None))
+                continue
+            clave = clave_pdf(convocatoria)
+            pdf = backend.abrir(clave)
+            futuro = None if pdf is not None else construcciones.enviar(clave, convocatoria, esperar=True)
+            pendientes.append((convocatoria_id, nombre, pdf, futuro))
+
+    def abrir(convocatoria_id, pdf, futuro):
+        if futuro is None:
+            if pdf is None:
+                raise LookupError("La convocatoria ya no existe")
+            return pdf
+        try:
+            return open(futuro.result(), 'rb')
+        finally:
+            construcciones.soltar(futuro)
+
+    with zipfile.ZipFile(salida, 'w', compression=zipfile.ZIP_STORED) as zf:
+        enviar()
+        while pendientes:
+            convocatoria_id, nombre, pdf, futuro = pendientes.popleft()
+            try:
+                pdf = abrir(convocatoria_id, pdf, futuro)
+            except Exception as exc:
+                logger.exception("No se pudo generar el PDF de la convocatoria %s", convocatoria_id)
+                errores.append(f"{convocatoria_id} - {nombre}: {exc}")
+            else:
+                with pdf, zf.open(nombre_en_zip(convocatoria_id, nombre), 'w') as destino:
+                    shutil.copyfileobj(pdf, destino)
+            enviar()
+            yield salida.vaciar()
+
+        if errores:
+            zf.writestr('ERRORES.txt', '\n'.join(errores))
+
+    yield salida.vaciar()